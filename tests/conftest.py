@@ -7,6 +7,15 @@ from datetime import date, time, timedelta
 from unittest.mock import MagicMock, PropertyMock
 
 
+@pytest.fixture(autouse=True)
+def fresh_namespace_versions():
+    """Polled namespace versions outlive the per-test transaction rollback."""
+    from trip_planner.core.cache import CacheClient
+    CacheClient.forget_versions()
+    yield
+    CacheClient.forget_versions()
+
+
 # ---------------------------------------------------------------------------
 # Trip request fixtures
 # ---------------------------------------------------------------------------
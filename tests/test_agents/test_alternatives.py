@@ -0,0 +1,68 @@
+"""
+Tests for the AlternativesAgent.
+"""
+from unittest.mock import patch
+
+from trip_planner.agents.alternatives import AlternativesAgent, ALTERNATIVES_PER_SLOT
+
+
+SCHEDULE = {
+    "days": [{
+        "date": "2026-04-01",
+        "schedule": [
+            {"start_time": "09:00", "end_time": "11:30", "title": "Louvre Museum",
+             "description": "Art museum visit", "block_type": "activity"},
+            {"start_time": "12:00", "end_time": "13:00", "title": "Lunch", "block_type": "meal"},
+            {"start_time": "14:00", "end_time": "17:00", "title": "Seine walk",
+             "description": "Riverside park stroll", "block_type": "activity"},
+        ],
+    }]
+}
+
+ATTRACTIONS = {
+    "attractions": [
+        {"name": "Louvre Museum", "rating": 4.8},
+        {"name": "Musée d'Orsay", "rating": 4.7, "types": ["museum", "art"]},
+        {"name": "Jardin du Luxembourg", "rating": 4.6, "types": ["park"]},
+        {"name": "Sainte-Chapelle", "rating": 4.5, "types": ["church"]},
+        {"name": "Catacombs", "rating": 4.4, "types": ["tourist_attraction"]},
+    ]
+}
+
+
+class TestAlternativesAgentStub:
+    def test_local_ranking(self, sample_trip, mock_gemini_unavailable):
+        agent = AlternativesAgent(gemini_client=mock_gemini_unavailable)
+        alternatives = agent.run(sample_trip, SCHEDULE, ATTRACTIONS).data["alternatives"]
+
+        # Only activity blocks get alternatives, and scheduled places are excluded
+        assert set(alternatives) == {"0:0", "0:2"}
+        titles = [alt["title"] for alt in alternatives["0:0"]]
+        assert len(titles) == ALTERNATIVES_PER_SLOT
+        assert "Louvre Museum" not in titles
+        # Word overlap with the block ranks the museum and the park first
+        assert titles[0] == "Musée d'Orsay"
+        assert alternatives["0:2"][0]["title"] == "Jardin du Luxembourg"
+
+    def test_no_candidates(self, sample_trip, mock_gemini_unavailable):
+        agent = AlternativesAgent(gemini_client=mock_gemini_unavailable)
+        assert agent.run(sample_trip, SCHEDULE, {"attractions": []}).data == {"alternatives": {}}
+
+
+class TestAlternativesAgentAI:
+    @patch("trip_planner.agents.alternatives.generate_validated")
+    def test_model_order_with_local_fill(self, mock_gen, sample_trip, mock_gemini_client):
+        mock_gen.return_value = ({"slots": [
+            {"slot": "0:0", "alternatives": [{"name": "Catacombs", "reason": "Underground history"},
+                                             {"name": "Made-up Place"}]},
+        ]}, [], [])
+        agent = AlternativesAgent(gemini_client=mock_gemini_client)
+        alternatives = agent.run(sample_trip, SCHEDULE, ATTRACTIONS).data["alternatives"]
+
+        assert mock_gen.call_count == 1
+        first = alternatives["0:0"]
+        assert first[0]["title"] == "Catacombs"
+        assert first[0]["reason"] == "Underground history"
+        assert "Made-up Place" not in [alt["title"] for alt in first]
+        assert len(first) == ALTERNATIVES_PER_SLOT
+        assert alternatives["0:2"][0]["title"] == "Jardin du Luxembourg"
@@ -1,7 +1,9 @@
 """
 Tests for the ValidatorAgent (rule-based, no AI needed).
 """
+import numpy as np
 import pytest
+from unittest.mock import patch
 
 from trip_planner.agents.validator import ValidatorAgent
 
@@ -134,3 +136,55 @@ class TestValidatorScheduleChecks:
         result = agent.run(trip=sample_trip, scheduler_output=schedule)
         window_issues = [v for v in result.data["validation"] if v["check"] == "daily_window"]
         assert len(window_issues) == 1
+
+
+class TestValidatorTravelCheck:
+    def _schedule(self):
+        return {
+            "days": [{
+                "date": "2026-04-01",
+                "schedule": [
+                    {"start_time": "09:00", "end_time": "11:00", "title": "Louvre", "location": "Louvre"},
+                    {"start_time": "11:10", "end_time": "12:30", "title": "Lunch", "location": "Marais"},
+                    {"start_time": "13:30", "end_time": "16:00", "title": "Orsay", "location": "Orsay"},
+                ]
+            }]
+        }
+
+    @patch("trip_planner.agents.validator.get_travel_times")
+    def test_short_gap_warns(self, mock_times, sample_trip):
+        mock_times.side_effect = lambda pairs: {("Louvre", "Marais"): 25, ("Marais", "Orsay"): 20}
+
+        result = ValidatorAgent().run(trip=sample_trip, scheduler_output=self._schedule(), check_travel=True)
+
+        travel = [v for v in result.data["validation"] if v["check"] == "travel_time"]
+        assert len(travel) == 1
+        assert "Lunch" in travel[0]["details"]
+        mock_times.assert_called_once_with([("Louvre", "Marais"), ("Marais", "Orsay")])
+
+    @patch("trip_planner.agents.validator.get_travel_times")
+    def test_travel_check_is_opt_in(self, mock_times, sample_trip):
+        ValidatorAgent().run(trip=sample_trip, scheduler_output=self._schedule())
+        mock_times.assert_not_called()
+
+    @patch("trip_planner.agents.validator.estimate_travel_matrix")
+    @patch("trip_planner.agents.validator.get_travel_times")
+    def test_only_suspect_legs_are_looked_up(self, mock_times, mock_estimate, sample_trip):
+        # Louvre → Marais is tight (10 min gap), Marais → Orsay has an hour to spare
+        mock_estimate.return_value = np.full((3, 3), 8.0)
+        mock_times.return_value = {("Louvre", "Marais"): 25}
+
+        result = ValidatorAgent().run(trip=sample_trip, scheduler_output=self._schedule(), check_travel=True)
+
+        mock_times.assert_called_once_with([("Louvre", "Marais")])
+        assert len([v for v in result.data["validation"] if v["check"] == "travel_time"]) == 1
+
+    @patch("trip_planner.agents.validator.estimate_travel_matrix")
+    @patch("trip_planner.agents.validator.get_travel_times")
+    def test_generous_gaps_skip_network_check(self, mock_times, mock_estimate, sample_trip):
+        mock_estimate.return_value = np.full((3, 3), 2.0)
+
+        result = ValidatorAgent().run(trip=sample_trip, scheduler_output=self._schedule(), check_travel=True)
+
+        mock_times.assert_not_called()
+        assert not [v for v in result.data["validation"] if v["check"] == "travel_time"]
@@ -2,7 +2,9 @@
 API endpoint tests using Django REST Framework test client.
 """
 import pytest
+import json
 import uuid
+from types import SimpleNamespace
 from unittest.mock import patch
 from datetime import date, timedelta
 
@@ -103,6 +105,129 @@ class TestItineraryGenerate:
         resp = api_client.post("/api/itineraries/generate", {"destination": "X"}, format="json")
         assert resp.status_code == 400
 
+    @pytest.fixture
+    def saturated_quota(self):
+        from trip_planner.services.admission import admission
+        from trip_planner.services.gemini import gemini_quota
+        gemini_quota.record_exhausted()
+        yield
+        gemini_quota.reset()
+        admission.reset()
+
+    @patch("trip_planner.api.views.itineraries.generate_itinerary")
+    def test_shed_when_quota_saturated(self, mock_gen, api_client, sample_trip, saturated_quota, settings):
+        settings.GENERATION_SLO_SECONDS = 30
+        resp = api_client.post("/api/itineraries/generate", sample_trip, format="json")
+        assert resp.status_code == 429
+        assert int(resp["Retry-After"]) > 0
+        mock_gen.assert_not_called()
+        assert not Itinerary.objects.exists()
+
+        settings.METRICS_TOKEN = "scrape"
+        metrics = api_client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape").json()["generation"]
+        assert metrics["rejected_quota"] == 1
+        assert metrics["gemini_quota"]["exhausted"] == 1
+
+    @patch("trip_planner.api.views.itineraries.generate_itinerary")
+    def test_shed_to_queue_when_async_preferred(self, mock_gen, api_client, sample_trip, saturated_quota, settings):
+        settings.GENERATION_SLO_SECONDS = 30
+        resp = api_client.post("/api/itineraries/generate", sample_trip, format="json",
+                               HTTP_PREFER="respond-async")
+        assert resp.status_code == 202
+        itinerary = Itinerary.objects.get()
+        assert itinerary.status == ItineraryStatus.QUEUED
+        assert resp["Location"] == f"/api/itineraries/{itinerary.id}/"
+        mock_gen.assert_not_called()
+
+        settings.METRICS_TOKEN = "scrape"
+        metrics = api_client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape").json()["generation"]
+        assert (metrics["queued"], metrics["queue_depth"]) == (1, 1)
+
+    @patch("trip_planner.api.views.itineraries.generate_itinerary")
+    def test_idempotency_key_replays(self, mock_gen, api_client, sample_trip):
+        mock_gen.return_value = {"summary": "Trip to Paris", "days": []}
+        first = api_client.post("/api/itineraries/generate", sample_trip, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        retry = api_client.post("/api/itineraries/generate", sample_trip, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        assert mock_gen.call_count == 1
+        assert retry.status_code == 200
+        assert retry.content == first.content
+        assert retry["Idempotent-Replayed"] == "true"
+        assert Itinerary.objects.count() == 1
+
+        other = dict(sample_trip, destination="Rome, Italy")
+        resp = api_client.post("/api/itineraries/generate", other, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        assert resp.status_code == 422
+        assert resp.json()["error"] == "idempotency_key_reused"
+
+    @patch("trip_planner.api.views.itineraries.generate_itinerary")
+    def test_idempotency_key_released_on_failure(self, mock_gen, api_client, sample_trip):
+        mock_gen.side_effect = [RuntimeError("Unexpected"), {"summary": "Trip to Paris", "days": []}]
+        first = api_client.post("/api/itineraries/generate", sample_trip, format="json", HTTP_IDEMPOTENCY_KEY="k2")
+        retry = api_client.post("/api/itineraries/generate", sample_trip, format="json", HTTP_IDEMPOTENCY_KEY="k2")
+        assert (first.status_code, retry.status_code) == (500, 200)
+        assert mock_gen.call_count == 2
+
+    @patch("trip_planner.api.views.itineraries.generate_itinerary")
+    def test_idempotency_key_waits_for_in_flight(self, mock_gen, api_client, sample_trip, settings):
+        from django.core.cache import cache as django_cache
+        from trip_planner.core import idempotency
+
+        body = json.dumps(sample_trip).encode()
+        fingerprint = idempotency._fingerprint(
+            SimpleNamespace(method="POST", path="/api/itineraries/generate", content_type="application/json",
+                            body=body))
+        key = idempotency._cache_key("generate", "k3")
+        django_cache.set(key, {"state": "pending", "fingerprint": fingerprint})
+
+        def finish(seconds):
+            django_cache.set(key, {"state": "done", "fingerprint": fingerprint, "status": 200, "headers": {},
+                                   "content": b'{"summary": "done"}', "content_type": "application/json"})
+
+        with patch("trip_planner.core.idempotency.time.sleep", side_effect=finish):
+            resp = api_client.post("/api/itineraries/generate", body, content_type="application/json",
+                                   HTTP_IDEMPOTENCY_KEY="k3")
+        assert resp.json() == {"summary": "done"}
+        mock_gen.assert_not_called()
+
+        django_cache.set(key, {"state": "pending", "fingerprint": fingerprint})
+        settings.IDEMPOTENCY_WAIT_SECONDS = 0
+        resp = api_client.post("/api/itineraries/generate", body, content_type="application/json",
+                               HTTP_IDEMPOTENCY_KEY="k3")
+        assert resp.status_code == 409
+        assert resp["Retry-After"]
+
+
+# ---------------------------------------------------------------------------
+# GET /api/itineraries/ — List
+# ---------------------------------------------------------------------------
+
+class TestItineraryList:
+    def test_keyset_pages(self, api_client, sample_trip):
+        created = [Itinerary.objects.create(request_json=sample_trip) for _ in range(5)]
+        first = api_client.get("/api/itineraries/", {"limit": 3}).json()
+        assert len(first["results"]) == 3
+        assert first["next"]
+        second = api_client.get("/api/itineraries/", {"limit": 3, "after": first["next"]}).json()
+        assert second["next"] is None
+        ids = [row["id"] for row in first["results"] + second["results"]]
+        assert sorted(ids) == sorted(str(it.id) for it in created)
+
+    def test_summary_and_filters(self, api_client, sample_trip):
+        Itinerary.objects.create(request_json=sample_trip, status=ItineraryStatus.COMPLETED)
+        Itinerary.objects.create(request_json={**sample_trip, "destination": "Rome, Italy"})
+        resp = api_client.get("/api/itineraries/", {"status": "completed"})
+        assert resp.status_code == 200
+        [row] = resp.json()["results"]
+        assert row["destination"] == sample_trip["destination"]
+        assert row["start_date"] == sample_trip["start_date"]
+        assert "result" not in row
+        rows = api_client.get("/api/itineraries/", {"destination": "rome"}).json()["results"]
+        assert [row["destination"] for row in rows] == ["Rome, Italy"]
+
+    def test_invalid_params(self, api_client):
+        assert api_client.get("/api/itineraries/", {"after": "not-a-cursor"}).status_code == 400
+        assert api_client.get("/api/itineraries/", {"status": "bogus"}).status_code == 400
+
 
 # ---------------------------------------------------------------------------
 # GET /api/itineraries/<id>/ — Detail
@@ -120,6 +245,89 @@ class TestItineraryDetail:
         resp = api_client.get(f"/api/itineraries/{fake_id}/")
         assert resp.status_code == 404
 
+    def test_etag_not_modified(self, api_client, sample_trip):
+        it = Itinerary.objects.create(request_json=sample_trip)
+        resp = api_client.get(f"/api/itineraries/{it.id}/")
+        etag = resp["ETag"]
+        assert "no-cache" in resp["Cache-Control"]
+        resp = api_client.get(f"/api/itineraries/{it.id}/", HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 304
+        assert resp["ETag"] == etag
+        assert "no-cache" in resp["Cache-Control"]
+
+    def test_etag_changes_after_patch(self, api_client, sample_trip):
+        it = Itinerary.objects.create(request_json=sample_trip, status=ItineraryStatus.COMPLETED)
+        etag = api_client.get(f"/api/itineraries/{it.id}/")["ETag"]
+        api_client.patch(f"/api/itineraries/{it.id}/", {"result": {"days": []}}, format="json")
+        resp = api_client.get(f"/api/itineraries/{it.id}/", HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 200
+        assert resp["ETag"] != etag
+
+    def test_served_from_stored_bytes(self, api_client, sample_trip):
+        it = Itinerary.objects.create(request_json=sample_trip)
+        it.mark_completed({"days": [], "summary": "Done"})
+        # Views serve the stored encoding rather than re-rendering result_json
+        Itinerary.objects.filter(id=it.id).update(result_bytes=b'{"summary":"Stored"}')
+        body = api_client.get(f"/api/itineraries/{it.id}/").json()
+        assert body["result"] == {"summary": "Stored"}
+        assert body["id"] == str(it.id)
+        assert body["status"] == "completed"
+
+    def test_patch_invalidates_stored_bytes(self, api_client, sample_trip):
+        it = Itinerary.objects.create(request_json=sample_trip)
+        it.mark_completed({"days": [], "summary": "Done"})
+        resp = api_client.generic("PATCH", f"/api/itineraries/{it.id}/",
+                                  json.dumps({"result": {"summary": "Edited"}}),
+                                  content_type="application/merge-patch+json")
+        assert resp.status_code == 204
+        assert api_client.get(f"/api/itineraries/{it.id}/").json()["result"]["summary"] == "Edited"
+        it.refresh_from_db()
+        assert json.loads(bytes(it.result_bytes))["summary"] == "Edited"
+
+    def test_sparse_fields(self, api_client, sample_trip):
+        result = {"days": [{"date": "2026-04-01", "schedule": []}], "budget": {"total": 100}}
+        it = Itinerary.objects.create(request_json=sample_trip, result_json=result,
+                                      status=ItineraryStatus.COMPLETED)
+        resp = api_client.get(f"/api/itineraries/{it.id}/", {"fields": "status,result.days"})
+        assert resp.status_code == 200
+        assert resp.json() == {"status": "completed", "result": {"days": result["days"]}}
+
+    def test_sparse_fields_without_result(self, api_client, sample_trip):
+        it = Itinerary.objects.create(request_json=sample_trip)
+        resp = api_client.get(f"/api/itineraries/{it.id}/", {"fields": "id,result.days"})
+        assert resp.json() == {"id": str(it.id), "result": None}
+
+    def test_sparse_fields_unknown(self, api_client, sample_trip):
+        it = Itinerary.objects.create(request_json=sample_trip)
+        resp = api_client.get(f"/api/itineraries/{it.id}/", {"fields": "status,request.destination"})
+        assert resp.status_code == 400
+        assert resp.json()["error"] == "invalid_fields"
+
+
+# ---------------------------------------------------------------------------
+# GET /api/itineraries/<id>/days/<n> — Single day
+# ---------------------------------------------------------------------------
+
+class TestItineraryDay:
+    def test_get_day(self, api_client, sample_trip):
+        days = [{"date": "2026-04-01", "schedule": []}, {"date": "2026-04-02", "schedule": []}]
+        it = Itinerary.objects.create(request_json=sample_trip, result_json={"days": days},
+                                      status=ItineraryStatus.COMPLETED)
+        resp = api_client.get(f"/api/itineraries/{it.id}/days/2")
+        assert resp.status_code == 200
+        assert resp.json() == days[1]
+        assert "ETag" in resp
+
+    def test_day_out_of_range(self, api_client, sample_trip):
+        it = Itinerary.objects.create(request_json=sample_trip, result_json={"days": []},
+                                      status=ItineraryStatus.COMPLETED)
+        assert api_client.get(f"/api/itineraries/{it.id}/days/1").status_code == 404
+        assert api_client.get(f"/api/itineraries/{it.id}/days/0").status_code == 404
+
+    def test_day_without_result(self, api_client, sample_trip):
+        it = Itinerary.objects.create(request_json=sample_trip)
+        assert api_client.get(f"/api/itineraries/{it.id}/days/1").status_code == 400
+
 
 # ---------------------------------------------------------------------------
 # PATCH /api/itineraries/<id>/ — Update result
@@ -134,6 +342,101 @@ class TestItineraryPatch:
         it.refresh_from_db()
         assert it.result_json == new_result
 
+    def test_merge_patch(self, api_client, sample_trip):
+        result = {"days": [{"date": "2026-04-01"}], "notes": "keep", "draft": True}
+        it = Itinerary.objects.create(request_json=sample_trip, result_json=result)
+        resp = api_client.generic(
+            "PATCH", f"/api/itineraries/{it.id}/",
+            json.dumps({"result": {"draft": None, "title": "Paris"}}),
+            content_type="application/merge-patch+json",
+        )
+        assert resp.status_code == 204
+        assert resp["ETag"]
+        it.refresh_from_db()
+        assert it.result_json == {"days": [{"date": "2026-04-01"}], "notes": "keep", "title": "Paris"}
+
+    def test_json_patch(self, api_client, sample_trip):
+        result = {"days": [{"schedule": [{"title": "Louvre"}, {"title": "Lunch"}]}]}
+        it = Itinerary.objects.create(request_json=sample_trip, result_json=result)
+        ops = [{"op": "replace", "path": "/result/days/0/schedule/1/title", "value": "Picnic"}]
+        resp = api_client.generic("PATCH", f"/api/itineraries/{it.id}/", json.dumps(ops),
+                                  content_type="application/json-patch+json")
+        assert resp.status_code == 204
+        it.refresh_from_db()
+        assert it.result_json["days"][0]["schedule"][1]["title"] == "Picnic"
+
+    def test_patch_rejected(self, api_client, sample_trip):
+        it = Itinerary.objects.create(request_json=sample_trip, result_json={"days": []})
+        for content_type, body in [
+            ("application/json-patch+json", [{"op": "replace", "path": "/status", "value": "failed"}]),
+            ("application/json-patch+json", [{"op": "remove", "path": "/result/missing"}]),
+            ("application/merge-patch+json", {"status": "failed"}),
+        ]:
+            resp = api_client.generic("PATCH", f"/api/itineraries/{it.id}/", json.dumps(body),
+                                      content_type=content_type)
+            assert resp.status_code == 422
+            assert resp.json()["error"] == "patch_failed"
+        it.refresh_from_db()
+        assert it.result_json == {"days": []}
+
+    def test_if_match(self, api_client, sample_trip):
+        it = Itinerary.objects.create(request_json=sample_trip, result_json={"v": 1})
+        etag = api_client.get(f"/api/itineraries/{it.id}/")["ETag"]
+        body = json.dumps({"result": {"v": 2}})
+        resp = api_client.generic("PATCH", f"/api/itineraries/{it.id}/", body,
+                                  content_type="application/merge-patch+json", HTTP_IF_MATCH=etag)
+        assert resp.status_code == 204
+        assert resp["ETag"] == api_client.get(f"/api/itineraries/{it.id}/")["ETag"]
+        # The stale ETag no longer matches
+        resp = api_client.generic("PATCH", f"/api/itineraries/{it.id}/", json.dumps({"result": {"v": 3}}),
+                                  content_type="application/merge-patch+json", HTTP_IF_MATCH=etag)
+        assert resp.status_code == 412
+        it.refresh_from_db()
+        assert it.result_json == {"v": 2}
+
+
+# ---------------------------------------------------------------------------
+# POST /api/itineraries/<id>/days/<n>/blocks/<m>/swap — Precomputed alternatives
+# ---------------------------------------------------------------------------
+
+class TestItinerarySwap:
+    @pytest.fixture
+    def itinerary(self, sample_trip):
+        block = {
+            "start_time": "09:00", "end_time": "11:00", "title": "Louvre", "location": "Rue de Rivoli",
+            "description": "Art", "block_type": "activity", "buffer_mins": 15,
+            "alternatives": [
+                {"title": "Orsay", "location": "Rue de Lille", "description": "Impressionists",
+                 "block_type": "activity", "website": None, "reason": "Smaller crowds"},
+            ],
+        }
+        it = Itinerary.objects.create(request_json=sample_trip, status=ItineraryStatus.COMPLETED)
+        it.mark_completed({"days": [{"date": "2026-04-01", "schedule": [block]}]})
+        return it
+
+    def test_swap_and_undo(self, api_client, itinerary):
+        url = f"/api/itineraries/{itinerary.id}/days/1/blocks/1/swap"
+        resp = api_client.post(url, {}, format="json")
+        assert resp.status_code == 200
+        block = resp.json()["block"]
+        assert (block["title"], block["start_time"], block["buffer_mins"]) == ("Orsay", "09:00", 15)
+        assert block["reason"] == "Smaller crowds"
+        assert block["alternatives"][0]["title"] == "Louvre"
+
+        day = api_client.get(f"/api/itineraries/{itinerary.id}/days/1").json()
+        assert day["schedule"][0]["title"] == "Orsay"
+
+        block = api_client.post(url, {"alternative": 0}, format="json").json()["block"]
+        assert block["title"] == "Louvre"
+        assert block["alternatives"][0]["title"] == "Orsay"
+
+    def test_swap_errors(self, api_client, itinerary):
+        base = f"/api/itineraries/{itinerary.id}/days/1/blocks"
+        assert api_client.post(f"{base}/2/swap", {}, format="json").status_code == 404
+        assert api_client.post(f"{base}/1/swap", {"alternative": 3}, format="json").status_code == 422
+        resp = api_client.post(f"{base}/1/swap", {}, format="json", HTTP_IF_MATCH='"stale"')
+        assert resp.status_code == 412
+
 
 # ---------------------------------------------------------------------------
 # GET /api/itineraries/<id>/ics — ICS download
@@ -167,6 +470,16 @@ class TestItineraryICS:
         resp = api_client.get(f"/api/itineraries/{it.id}/ics")
         assert resp.status_code == 400
 
+    def test_ics_not_modified(self, api_client, sample_trip):
+        result = {"days": [{"date": "2026-04-01", "schedule": []}]}
+        it = Itinerary.objects.create(
+            request_json=sample_trip, result_json=result, status=ItineraryStatus.COMPLETED,
+        )
+        etag = api_client.get(f"/api/itineraries/{it.id}/ics")["ETag"]
+        assert etag != api_client.get(f"/api/itineraries/{it.id}/")["ETag"]
+        resp = api_client.get(f"/api/itineraries/{it.id}/ics", HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 304
+
 
 # ---------------------------------------------------------------------------
 # GET /api/places/autocomplete — Places proxy
@@ -191,6 +504,161 @@ class TestPlacesAutocomplete:
         assert resp.json()["predictions"] == []
 
 
+# ---------------------------------------------------------------------------
+# POST /api/edit/block — Single block edit
+# ---------------------------------------------------------------------------
+
+def _block(title, start="09:00", end="10:00"):
+    return {"start_time": start, "end_time": end, "title": title, "location": "Paris",
+            "description": "Visit", "block_type": "activity"}
+
+
+class TestEditBlock:
+    @patch("trip_planner.api.views.edit.gemini_client")
+    def test_mechanical_edit_is_local(self, mock_gemini, api_client):
+        from trip_planner.services import schedule_edit
+        schedule_edit.reset_metrics()
+        day = [_block("Louvre"), _block("Lunch", "10:00", "11:00")]
+        resp = api_client.post("/api/edit/block", {
+            "day_index": 0, "block_index": 0, "instruction": "make it 30 minutes longer",
+            "current_block": day[0], "day_blocks": day, "destination": "Paris",
+        }, format="json")
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["source"] == "local"
+        assert body["block"]["end_time"] == "10:30:00"
+        assert body["day_blocks"][1]["start_time"] == "10:30:00"
+        assert body["validation"][0]["status"] == "pass"
+        mock_gemini.generate_content.assert_not_called()
+        assert schedule_edit.metrics()["local"] == 1
+
+    @patch("trip_planner.api.views.edit.gemini_client")
+    def test_local_edit_keeps_alternatives(self, mock_gemini, api_client):
+        alternatives = [{"name": "Musée Rodin", "reason": "Quieter"}]
+        day = [{**_block("Louvre"), "alternatives": alternatives}, _block("Lunch", "10:00", "11:00")]
+        resp = api_client.post("/api/edit/block", {
+            "day_index": 0, "block_index": 0, "instruction": "make it 30 minutes longer",
+            "current_block": day[0], "day_blocks": day, "destination": "Paris",
+        }, format="json")
+        body = resp.json()
+        assert body["source"] == "local"
+        assert body["block"]["alternatives"] == alternatives
+        assert body["day_blocks"][0]["alternatives"] == alternatives
+        assert "alternatives" not in body["day_blocks"][1]
+
+    @patch("trip_planner.api.views.edit.gemini_client")
+    def test_backward_overlap_goes_to_gemini(self, mock_gemini, api_client):
+        mock_gemini.is_available = True
+        mock_gemini.generate_content.return_value = json.dumps(_block("Lunch", "09:30", "10:30"))
+        day = [_block("Louvre"), _block("Lunch", "10:00", "11:00")]
+        resp = api_client.post("/api/edit/block", {
+            "day_index": 0, "block_index": 1, "instruction": "move to 9:30",
+            "current_block": day[1], "day_blocks": day, "destination": "Paris",
+        }, format="json")
+        assert resp.json()["source"] == "llm"
+        mock_gemini.generate_content.assert_called_once()
+
+    @patch("trip_planner.api.views.edit.gemini_client")
+    def test_creative_edit_uses_gemini(self, mock_gemini, api_client):
+        mock_gemini.is_available = True
+        mock_gemini.generate_content.return_value = json.dumps(_block("Sunset cruise"))
+        resp = api_client.post("/api/edit/block", {
+            "day_index": 0, "block_index": 0, "instruction": "something romantic",
+            "current_block": _block("Louvre"), "destination": "Paris",
+        }, format="json")
+        assert resp.json()["source"] == "llm"
+        assert resp.json()["block"]["title"] == "Sunset cruise"
+
+
+
+# ---------------------------------------------------------------------------
+
+class TestEditBlocks:
+    @patch("trip_planner.api.views.edit.gemini_client")
+    def test_day_instruction_single_call(self, mock_gemini, api_client):
+        mock_gemini.is_available = True
+        mock_gemini.generate_content.return_value = json.dumps({"blocks": [
+            {"id": 1, **_block("Long lunch", "12:00", "14:00")},
+            {"id": 0, **_block("Late start", "10:00", "11:00"), "description": "Sleep in"},
+        ]})
+        resp = api_client.post("/api/edit/blocks", {
+            "destination": "Paris",
+            "day_index": 1,
+            "day_blocks": [_block("Louvre"), _block("Lunch", "12:00", "13:00")],
+            "instruction": "make it more relaxed",
+        }, format="json")
+        assert resp.status_code == 200
+        edits = resp.json()["edits"]
+        assert mock_gemini.generate_content.call_count == 1
+        assert [(e["day_index"], e["block_index"]) for e in edits] == [(1, 0), (1, 1)]
+        assert edits[0]["block"]["title"] == "Late start"
+        assert edits[1]["block"]["end_time"] == "14:00:00"
+
+    @patch("trip_planner.api.views.edit.gemini_client")
+    def test_invalid_block_keeps_original(self, mock_gemini, api_client):
+        mock_gemini.is_available = True
+        mock_gemini.generate_content.return_value = json.dumps({"blocks": [{"id": 0, "title": "Oops"}]})
+        resp = api_client.post("/api/edit/blocks", {
+            "destination": "Paris",
+            "edits": [
+                {"day_index": 0, "block_index": 0, "instruction": "shorter", "current_block": _block("A")},
+                {"day_index": 0, "block_index": 1, "instruction": "later", "current_block": _block("B")},
+            ],
+        }, format="json")
+        edits = resp.json()["edits"]
+        assert all(e["warning"] == "AI response invalid" for e in edits)
+        assert [e["block"]["title"] for e in edits] == ["A", "B"]
+
+    @pytest.mark.parametrize("reply", ["Sorry, I can't help with that.", "42", '{"blocks": "none"}'])
+    @patch("trip_planner.api.views.edit.gemini_client")
+    def test_malformed_reply_keeps_originals(self, mock_gemini, api_client, reply):
+        mock_gemini.is_available = True
+        mock_gemini.generate_content.return_value = reply
+        resp = api_client.post("/api/edit/blocks", {
+            "destination": "Paris",
+            "day_index": 0,
+            "day_blocks": [_block("Louvre"), _block("Lunch", "12:00", "13:00")],
+            "instruction": "make it more relaxed",
+        }, format="json")
+        assert resp.status_code == 200
+        edits = resp.json()["edits"]
+        assert [e["block"]["title"] for e in edits] == ["Louvre", "Lunch"]
+        assert all(e["warning"] == "AI response invalid" for e in edits)
+
+    def test_requires_instruction(self, api_client):
+        resp = api_client.post("/api/edit/blocks", {
+            "destination": "Paris",
+            "edits": [{"day_index": 0, "block_index": 0, "current_block": _block("A")}],
+        }, format="json")
+        assert resp.status_code == 400
+
+
+# ---------------------------------------------------------------------------
+# POST /api/analysis/image — Image analysis
+# ---------------------------------------------------------------------------
+
+class TestImageAnalysis:
+    @patch("trip_planner.api.views.analysis.gemini_client")
+    def test_large_upload_with_idempotency_key(self, mock_gemini, api_client):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        mock_gemini.is_available = True
+        mock_gemini.generate_from_image.return_value = json.dumps({"destination": "Kyoto"})
+        content = b"\x89PNG" + b"0" * (3 * 1024 * 1024)
+
+        def post():
+            image = SimpleUploadedFile("trip.png", content, content_type="image/png")
+            return api_client.post("/api/analysis/image", {"image": image}, format="multipart",
+                                   HTTP_IDEMPOTENCY_KEY="upload-1")
+
+        first, retry = post(), post()
+        assert first.status_code == 200
+        assert first.json()["destination"] == "Kyoto"
+        # The view still reads the whole file after it was hashed
+        assert mock_gemini.generate_from_image.call_args.args[0] == content
+        assert retry["Idempotent-Replayed"] == "true"
+        assert mock_gemini.generate_from_image.call_count == 1
+
+
 # ---------------------------------------------------------------------------
 # Health check
 # ---------------------------------------------------------------------------
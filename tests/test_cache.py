@@ -2,7 +2,12 @@
 Tests for the CacheClient dual-layer caching system.
 """
 import pytest
+from unittest.mock import patch
+from django.core.cache import cache as django_cache
+
 from trip_planner.core.cache import CacheClient
+from trip_planner.core.codec import encode_payload, decode_payload, MAGIC, FLAG_RAW, FLAG_ZLIB
+from trip_planner.models import ExternalCache
 
 
 pytestmark = pytest.mark.django_db
@@ -25,16 +30,24 @@ class TestCacheKeyGeneration:
 
 
 class TestWeatherCache:
-    def test_set_and_get(self):
-        data = {"forecast_source": "test", "daily": []}
-        CacheClient.set_weather("Paris", "2026-04-01:2026-04-03", data)
-        result = CacheClient.get_weather("Paris", "2026-04-01:2026-04-03")
-        assert result is not None
-        assert result["forecast_source"] == "test"
+    def test_set_and_get_days(self):
+        days = {"2026-04-01": {"high_c": 20}, "2026-04-02": {"high_c": 22}}
+        CacheClient.set_weather_days("paris", days)
+        result = CacheClient.get_weather_days("paris", ["2026-04-01", "2026-04-02", "2026-04-03"])
+        assert result == days
 
-    def test_miss(self):
-        result = CacheClient.get_weather("NowhereVille", "2099-01-01:2099-01-02")
-        assert result is None
+    def test_days_miss(self):
+        assert CacheClient.get_weather_days("nowhereville", ["2099-01-01"]) == {}
+
+    def test_days_served_from_db_tier(self):
+        CacheClient.set_weather_days("rome", {"2026-04-01": {"high_c": 18}})
+        django_cache.clear()
+        assert CacheClient.get_weather_days("rome", ["2026-04-01"]) == {"2026-04-01": {"high_c": 18}}
+
+    def test_forecast_set_and_get(self):
+        CacheClient.set_forecast("paris", {"list": []})
+        assert CacheClient.get_forecast("paris") == {"list": []}
+        assert CacheClient.get_forecast("lyon") is None
 
 
 class TestPlacesCache:
@@ -61,9 +74,113 @@ class TestTravelTimeCache:
 
 class TestCurrencyRateCache:
     def test_set_and_get(self):
-        CacheClient.set_currency_rate("USD", "EUR", 0.85)
-        result = CacheClient.get_currency_rate("USD", "EUR")
-        assert result == 0.85
+        CacheClient.set_rate_table("USD", {"base": "USD", "rates": {"EUR": 0.85}, "fetched_at": 0})
+        result = CacheClient.get_rate_table("USD")
+        assert result["rates"] == {"EUR": 0.85}
 
     def test_miss(self):
-        assert CacheClient.get_currency_rate("ABC", "XYZ") is None
+        assert CacheClient.get_rate_table("XYZ") is None
+
+
+class TestPayloadEncoding:
+    def test_roundtrip_small_payload_uncompressed(self):
+        encoded, raw_size = encode_payload({"rate": 0.85}, threshold=1024)
+        assert encoded[:2] == MAGIC
+        assert encoded[3] == FLAG_RAW
+        assert decode_payload(encoded) == {"rate": 0.85}
+
+    def test_large_payload_is_compressed(self):
+        data = {"attractions": [{"name": f"Place {i}", "address": "Main Street"} for i in range(200)]}
+        encoded, raw_size = encode_payload(data, threshold=1024)
+        assert encoded[3] == FLAG_ZLIB
+        assert len(encoded) < raw_size
+        assert decode_payload(encoded) == data
+
+    def test_legacy_json_passes_through(self):
+        assert decode_payload({"minutes": 12}) == {"minutes": 12}
+
+    def test_db_tier_stores_binary(self):
+        CacheClient.set("enc:test", {"minutes": 30}, 60, "travel")
+        entry = ExternalCache.objects.get(cache_key="enc:test")
+        assert entry.payload_json is None
+        assert entry.size_bytes == len(bytes(entry.payload_blob))
+
+    def test_legacy_db_entry_readable(self):
+        ExternalCache.set_cache("legacy:key", "places", {"hotels": []}, ttl_seconds=60)
+        assert CacheClient.get("legacy:key") == {"hotels": []}
+
+    def test_db_fallback_decodes(self):
+        CacheClient.set("enc:db", [1, 2, 3], 60, "general")
+        django_cache.delete("enc:db")
+        assert CacheClient.get("enc:db") == [1, 2, 3]
+
+    def test_encoding_stats_track_bytes_saved(self):
+        data = {"daily": [{"summary": "Light rain"} for _ in range(300)]}
+        CacheClient.set("enc:stats", data, 60, "weather")
+        stats = CacheClient.encoding_stats()["weather"]
+        assert stats["entries"] >= 1
+        assert stats["bytes_saved"] > 0
+
+
+class TestNamespaceVersioning:
+    def test_keys_include_version(self):
+        CacheClient.set_places("Rome", "museums", {"attractions": []})
+        key = ExternalCache.objects.get(source="places").cache_key
+        assert key.startswith(f"places:v{CacheClient.namespace_version('places')}:")
+
+    def test_lookups_do_not_reread_the_version(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        CacheClient.set_places("Rome", "museums", {"attractions": []})
+        with CaptureQueriesContext(connection) as queries:
+            CacheClient.get_places("Rome", "museums")
+            CacheClient.set_places("Rome", "food", {"attractions": []})
+        assert not [q for q in queries.captured_queries if "cache_ns" in q["sql"]]
+
+    def test_bump_invalidates_only_that_source(self):
+        CacheClient.set_places("Rome", "museums", {"attractions": [{"name": "Vatican"}]})
+        CacheClient.set_travel_time("A", "B", 15)
+
+        CacheClient.bump_namespace("places")
+
+        assert CacheClient.get_places("Rome", "museums") is None
+        assert CacheClient.get_travel_time("A", "B") == 15
+
+    def test_bump_visible_when_shared_cache_is_cold(self):
+        before = CacheClient.namespace_version("currency")
+        CacheClient.bump_namespace("currency")
+        django_cache.clear()
+        assert CacheClient.namespace_version("currency") == before + 1
+
+    def test_sweeper_removes_orphaned_generations(self):
+        from trip_planner.core.sweeper import run_sweep
+
+        CacheClient.set_places("Rome", "museums", {"attractions": []})
+        CacheClient.set_travel_time("A", "B", 15)
+        CacheClient.bump_namespace("places")
+
+        reclaimed = run_sweep(max_rows=0)
+        assert reclaimed["places"]["rows"] == 1
+        assert "travel" not in reclaimed
+        assert ExternalCache.objects.filter(source="travel").count() == 1
+
+    def test_sweep_phases_share_one_deadline(self):
+        from trip_planner.core import sweeper
+
+        deadlines = []
+
+        def record(name):
+            def phase(*args, deadline=None, **kwargs):
+                deadlines.append((name, deadline))
+                return {}
+            return phase
+
+        with patch.object(ExternalCache, "sweep_expired", side_effect=record("expired")), \
+                patch.object(ExternalCache, "sweep_stale_generations", side_effect=record("stale")), \
+                patch.object(ExternalCache, "evict_lru", side_effect=record("lru")), \
+                patch("trip_planner.core.sweeper.time") as mock_time:
+            mock_time.monotonic.return_value = 100.0
+            sweeper.run_sweep(max_seconds=10, max_rows=5)
+
+        assert deadlines == [("expired", 110.0), ("stale", 110.0), ("lru", 110.0)]
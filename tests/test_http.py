@@ -0,0 +1,138 @@
+"""
+Tests for the shared pooled HTTP client.
+"""
+import asyncio
+import threading
+
+import httpx
+import pytest
+from unittest.mock import patch, MagicMock
+
+from trip_planner.core.http import HttpClient, AsyncHttpClient, async_http_client, http_client, run_blocking
+
+
+def _response(status_code=200):
+    resp = MagicMock()
+    resp.status_code = status_code
+    return resp
+
+
+class TestHttpClient:
+    def test_adapter_uses_configured_pool_sizes(self):
+        client = HttpClient(pool_connections=3, pool_maxsize=7, timeout=5)
+        assert client._adapter._pool_connections == 3
+        assert client._adapter._pool_maxsize == 7
+        assert client._session.get_adapter("https://maps.googleapis.com") is client._adapter
+
+    def test_default_timeout_applied(self):
+        client = HttpClient(timeout=4)
+        with patch.object(client._session, "get", return_value=_response()) as mock_get:
+            client.get("https://api.example.com/v1/items", params={"q": "x"})
+        assert mock_get.call_args.kwargs["timeout"] == 4
+
+    def test_latency_recorded_per_endpoint(self):
+        client = HttpClient()
+        with patch.object(client._session, "get", side_effect=[_response(), _response(500)]):
+            client.get("https://api.example.com/v1/items?page=1")
+            client.get("https://api.example.com/v1/items", endpoint=None)
+
+        stats = client.metrics()["endpoints"]["api.example.com/v1/items"]
+        assert stats["count"] == 2
+        assert stats["errors"] == 1
+        assert stats["avg_ms"] >= 0
+
+    def test_exceptions_counted_and_reraised(self):
+        client = HttpClient()
+        with patch.object(client._session, "get", side_effect=ConnectionError("down")):
+            with pytest.raises(ConnectionError):
+                client.get("https://router.example.org/route/1,2;3,4", endpoint="osrm/route")
+        assert client.metrics()["endpoints"]["osrm/route"]["errors"] == 1
+
+    def test_pool_reuse_reported(self):
+        client = HttpClient()
+        pool = client._adapter.poolmanager.connection_from_url("https://maps.googleapis.com")
+        pool.num_connections, pool.num_requests = 1, 5
+        pools = client.metrics()["pools"]
+        assert pools["https://maps.googleapis.com"]["reused"] == 4
+
+
+class TestAsyncHttpClient:
+    def test_records_into_shared_metrics(self):
+        metrics = HttpClient()
+        client = AsyncHttpClient(metrics, transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+        try:
+            response = asyncio.run(client.get("https://api.example.com/v1/items", endpoint="items"))
+        finally:
+            client.close()
+
+        assert isinstance(response, httpx.Response) and response.status_code == 503
+        assert metrics.metrics()["endpoints"]["items"]["errors"] == 1
+
+    def test_gathered_requests_fan_out_on_one_thread(self):
+        threads = []
+
+        def handler(request):
+            threads.append(threading.current_thread().name)
+            return httpx.Response(200)
+
+        client = AsyncHttpClient(HttpClient(), transport=httpx.MockTransport(handler))
+
+        async def fetch_all():
+            urls = [f"https://api.example.com/v1/{i}" for i in range(3)]
+            return await asyncio.gather(*(client.get(url) for url in urls))
+
+        try:
+            assert [r.status_code for r in asyncio.run(fetch_all())] == [200] * 3
+        finally:
+            client.close()
+        assert threads == ["http-loop"] * 3
+
+    def test_run_blocking_calls_share_one_client(self):
+        async def fetch(url):
+            response = await async_http_client.get(url, endpoint="items")
+            return response.status_code
+
+        with patch.object(httpx.AsyncClient, "get", autospec=True, return_value=httpx.Response(200)) as mock_get:
+            assert run_blocking(fetch, "https://api.example.com/v1/a") == 200
+            assert run_blocking(fetch, "https://api.example.com/v1/b") == 200
+
+        assert mock_get.call_count == 2
+        assert [c.args[1] for c in mock_get.call_args_list] == [
+            "https://api.example.com/v1/a", "https://api.example.com/v1/b",
+        ]
+        first, second = (c.args[0] for c in mock_get.call_args_list)
+        assert first is second and not first.is_closed
+
+    def test_transport_errors_are_httpx_errors(self):
+        def handler(request):
+            raise httpx.ConnectError("down", request=request)
+
+        client = AsyncHttpClient(HttpClient(), transport=httpx.MockTransport(handler))
+        try:
+            with pytest.raises(httpx.ConnectError):
+                asyncio.run(client.get("https://api.example.com/v1/items"))
+        finally:
+            client.close()
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    def test_metrics_exposes_http_and_cache(self, admin_client):
+        resp = admin_client.get("/metrics")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert "endpoints" in data["http"]
+        assert "encoding" in data["cache"]
+        assert "hit_ratio" in data["autocomplete"]
+
+    def test_anonymous_request_is_refused(self, client):
+        assert client.get("/metrics").status_code == 403
+
+    def test_bearer_token(self, client, settings):
+        settings.METRICS_TOKEN = "scrape"
+        assert client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape").status_code == 200
+        assert client.get("/metrics", HTTP_AUTHORIZATION="Bearer guess").status_code == 403
+
+    def test_empty_token_setting_accepts_no_bearer(self, client, settings):
+        settings.METRICS_TOKEN = ""
+        assert client.get("/metrics", HTTP_AUTHORIZATION="Bearer ").status_code == 403
@@ -0,0 +1,63 @@
+"""
+Tests for JSON Merge Patch and JSON Patch application.
+"""
+import pytest
+
+from trip_planner.core.exceptions import PatchError
+from trip_planner.core.jsonpatch import apply_patch, merge_patch, parse_pointer
+
+
+class TestMergePatch:
+    def test_rfc7396_example(self):
+        target = {"title": "Goodbye!", "author": {"givenName": "John", "familyName": "Doe"},
+                  "tags": ["example", "sample"], "content": "This will be unchanged"}
+        patch = {"title": "Hello!", "phoneNumber": "+01-555-1234",
+                 "author": {"familyName": None}, "tags": ["example"]}
+        assert merge_patch(target, patch) == {
+            "title": "Hello!", "author": {"givenName": "John"}, "tags": ["example"],
+            "content": "This will be unchanged", "phoneNumber": "+01-555-1234",
+        }
+        assert target["title"] == "Goodbye!"
+
+    def test_non_object_replaces(self):
+        assert merge_patch({"a": 1}, ["b"]) == ["b"]
+        assert merge_patch(None, {"a": {"b": None, "c": 1}}) == {"a": {"c": 1}}
+
+
+class TestJSONPatch:
+    def test_operations(self):
+        doc = {"days": [{"title": "A"}, {"title": "B"}], "notes": "x"}
+        result = apply_patch(doc, [
+            {"op": "test", "path": "/days/0/title", "value": "A"},
+            {"op": "replace", "path": "/days/0/title", "value": "A2"},
+            {"op": "add", "path": "/days/-", "value": {"title": "C"}},
+            {"op": "remove", "path": "/notes"},
+            {"op": "copy", "from": "/days/1", "path": "/extra"},
+            {"op": "move", "from": "/extra", "path": "/days/0"},
+        ])
+        assert result == {"days": [{"title": "B"}, {"title": "A2"}, {"title": "B"}, {"title": "C"}]}
+        assert doc["days"][0]["title"] == "A"
+
+    def test_pointer_escaping(self):
+        assert parse_pointer("/a~1b/m~0n") == ["a/b", "m~n"]
+        assert apply_patch({"a/b": 1}, [{"op": "replace", "path": "/a~1b", "value": 2}]) == {"a/b": 2}
+
+    @pytest.mark.parametrize("operation", [
+        {"op": "replace", "path": "/missing", "value": 1},
+        {"op": "remove", "path": "/days/5"},
+        {"op": "add", "path": "/days/01", "value": 1},
+        {"op": "test", "path": "/days/0", "value": "nope"},
+        {"op": "move", "from": "/days", "path": "/days/0"},
+        {"op": "frobnicate", "path": "/days"},
+        {"op": "add", "path": "/days"},
+    ])
+    def test_failures(self, operation):
+        with pytest.raises(PatchError):
+            apply_patch({"days": [1]}, [operation])
+
+    def test_atomic(self):
+        doc = {"a": 1}
+        with pytest.raises(PatchError):
+            apply_patch(doc, [{"op": "replace", "path": "/a", "value": 2},
+                              {"op": "remove", "path": "/b"}])
+        assert doc == {"a": 1}
@@ -0,0 +1,97 @@
+"""
+Tests for request-scoped memoization.
+"""
+import asyncio
+
+import pytest
+from unittest.mock import patch
+
+from trip_planner.core.memo import memo_scope, memoized
+
+
+calls = []
+
+
+@memoized
+def lookup(name, tags=None):
+    calls.append(name)
+    return {"name": name, "tags": tags or []}
+
+
+@memoized
+async def alookup(name):
+    calls.append(name)
+    return {"name": name}
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+class TestMemoized:
+    def test_no_scope_is_passthrough(self):
+        lookup("a")
+        lookup("a")
+        assert calls == ["a", "a"]
+
+    def test_repeats_served_within_scope(self):
+        with memo_scope() as memo:
+            lookup("a", tags=["x"])
+            lookup("a", tags=["x"])
+            lookup("b")
+        assert calls == ["a", "b"]
+        assert memo.stats()["calls_saved"] == 1
+        assert memo.stats()["by_function"]["test_memo.lookup"] == {"saved": 1, "made": 2}
+
+    def test_results_are_isolated_copies(self):
+        with memo_scope():
+            lookup("a")["tags"].append("mutated")
+            assert lookup("a")["tags"] == []
+
+    def test_scope_ends_with_block(self):
+        with memo_scope():
+            lookup("a")
+        lookup("a")
+        assert calls == ["a", "a"]
+
+    def test_nested_scope_reuses_outer(self):
+        with memo_scope() as outer:
+            lookup("a")
+            with memo_scope() as inner:
+                lookup("a")
+        assert inner is outer
+        assert calls == ["a"]
+
+    def test_unhashable_arguments_bypass(self):
+        with memo_scope() as memo:
+            lookup(object.__new__(type("Unhashable", (), {"__hash__": None})))
+        assert memo.stats()["calls_made"] == 0
+
+    def test_async_functions(self):
+        async def run():
+            with memo_scope() as memo:
+                await alookup("x")
+                await alookup("x")
+                return memo.stats()["calls_saved"]
+        assert asyncio.run(run()) == 1
+        assert calls == ["x"]
+
+
+@pytest.mark.django_db
+class TestServiceMemoization:
+    @patch("trip_planner.services.places.settings")
+    @patch("trip_planner.services.places.cache_client")
+    def test_hotel_tiers_share_one_lodging_read(self, mock_cache, mock_settings):
+        from trip_planner.services.places import get_hotels
+
+        mock_settings.GOOGLE_PLACES_API_KEY = ""
+        mock_cache.get_places.return_value = None
+
+        with memo_scope() as memo:
+            get_hotels("Paris", "midrange")
+            get_hotels("Paris", "budget")
+            get_hotels("Paris", "midrange")
+
+        assert mock_cache.get_places.call_count == 1
+        assert memo.stats()["calls_saved"] == 2
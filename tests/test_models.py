@@ -1,6 +1,9 @@
 """
 Tests for database models: Itinerary, AgentTrace, ExternalCache.
 """
+import json
+import time
+
 import pytest
 from datetime import timedelta
 from django.utils import timezone
@@ -50,6 +53,16 @@ class TestItinerary:
         itinerary.refresh_from_db()
         assert itinerary.status == ItineraryStatus.COMPLETED
         assert itinerary.result_json == result
+        assert json.loads(bytes(itinerary.result_bytes)) == result
+        assert itinerary.ics_text.startswith("BEGIN:VCALENDAR")
+
+    def test_refresh_artifacts_skips_newer_edit(self, sample_trip):
+        itinerary = Itinerary.objects.create(request_json=sample_trip, result_json={"days": []})
+        stale = Itinerary.objects.get(id=itinerary.id)
+        itinerary.save(update_fields=["updated_at"])
+        assert stale.refresh_artifacts()
+        stale.refresh_from_db()
+        assert stale.result_bytes is None
 
     def test_mark_failed(self, sample_trip):
         itinerary = Itinerary.objects.create(
@@ -160,3 +173,48 @@ class TestExternalCache:
         ExternalCache.set_cache("str_test_key", "weather", {}, ttl_seconds=3600)
         entry = ExternalCache.objects.get(cache_key="str_test_key")
         assert "weather" in str(entry)
+
+    def _expire(self, key):
+        ExternalCache.objects.filter(cache_key=key).update(
+            expires_at=timezone.now() - timedelta(seconds=10))
+
+    def test_sweep_expired_in_batches(self):
+        for i in range(5):
+            ExternalCache.set_cache(f"old_{i}", "weather", {"i": i}, ttl_seconds=60)
+            self._expire(f"old_{i}")
+        ExternalCache.set_cache("fresh", "places", {}, ttl_seconds=3600)
+
+        reclaimed = ExternalCache.sweep_expired(batch_size=2)
+        assert reclaimed["weather"]["rows"] == 5
+        assert reclaimed["weather"]["bytes"] > 0
+        assert list(ExternalCache.objects.values_list("cache_key", flat=True)) == ["fresh"]
+
+    def test_sweep_respects_max_seconds(self):
+        ExternalCache.set_cache("stale", "weather", {}, ttl_seconds=60)
+        self._expire("stale")
+        assert ExternalCache.sweep_expired(max_seconds=0) == {}
+        assert ExternalCache.objects.filter(cache_key="stale").exists()
+
+    def test_passed_deadline_overrides_max_seconds(self):
+        ExternalCache.set_cache("stale", "weather", {}, ttl_seconds=60)
+        self._expire("stale")
+        assert ExternalCache.sweep_expired(max_seconds=60, deadline=time.monotonic()) == {}
+        assert ExternalCache.objects.filter(cache_key="stale").exists()
+
+    def test_evict_lru_keeps_recently_accessed(self):
+        for i in range(4):
+            ExternalCache.set_cache(f"lru_{i}", "places", {"i": i}, ttl_seconds=3600)
+            ExternalCache.objects.filter(cache_key=f"lru_{i}").update(
+                accessed_at=timezone.now() - timedelta(hours=4 - i))
+
+        reclaimed = ExternalCache.evict_lru(max_rows=2, batch_size=1)
+        assert reclaimed["places"]["rows"] == 2
+        remaining = set(ExternalCache.objects.values_list("cache_key", flat=True))
+        assert remaining == {"lru_2", "lru_3"}
+
+    def test_get_valid_refreshes_stale_access_time(self):
+        ExternalCache.set_cache("touch", "weather", {}, ttl_seconds=3600)
+        old = timezone.now() - timedelta(hours=1)
+        ExternalCache.objects.filter(cache_key="touch").update(accessed_at=old)
+        ExternalCache.get_valid("touch")
+        assert ExternalCache.objects.get(cache_key="touch").accessed_at > old
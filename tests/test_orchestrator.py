@@ -63,6 +63,8 @@ class TestOrchestratorFullPipeline:
              patch("trip_planner.agents.research.get_travel_time_minutes") as mock_travel, \
              patch("trip_planner.agents.weather.get_weather") as mock_weather, \
              patch("trip_planner.agents.attractions.get_attractions") as mock_attractions, \
+             patch("trip_planner.agents.validator.get_travel_times",
+                   side_effect=lambda pairs: {pair: 0 for pair in pairs}), \
              patch("trip_planner.services.gemini.generate_validated") as mock_gen_validated:
 
             mock_hotels.return_value = {"hotels": [{"name": "Test Hotel", "rating": 4.0}]}
@@ -108,6 +110,8 @@ class TestOrchestratorFullPipeline:
             assert "planner" in agent_names
             assert "weather" in agent_names
             assert "validator" in agent_names
+            memo_trace = traces.get(agent_name="orchestrator", step_name="memo")
+            assert "calls_saved" in memo_trace.output_json
 
     @patch("trip_planner.services.orchestrator.gemini_client")
     def test_pipeline_with_unknown_location(self, mock_global_client, unknown_location_trip, mock_gemini_client):
@@ -118,6 +122,8 @@ class TestOrchestratorFullPipeline:
              patch("trip_planner.agents.research.get_travel_time_minutes") as mock_travel, \
              patch("trip_planner.agents.weather.get_weather") as mock_weather, \
              patch("trip_planner.agents.attractions.get_attractions") as mock_attractions, \
+             patch("trip_planner.agents.validator.get_travel_times",
+                   side_effect=lambda pairs: {pair: 0 for pair in pairs}), \
              patch("trip_planner.services.gemini.generate_validated") as mock_gen_validated:
 
             mock_hotels.return_value = {"hotels": []}
@@ -0,0 +1,98 @@
+"""
+Tests for Gemini quota tracking and generation admission control.
+"""
+import pytest
+
+from trip_planner.services.admission import AdmissionController
+from trip_planner.services.gemini import QuotaTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limits(settings):
+    settings.GEMINI_REQUESTS_PER_MINUTE = 10
+    settings.GEMINI_QUOTA_COOLDOWN_SECONDS = 30
+    settings.GENERATION_GEMINI_CALLS = 4
+    settings.GENERATION_EXPECTED_SECONDS = 20
+    settings.GENERATION_SLO_SECONDS = 60
+    settings.GENERATION_MAX_CONCURRENT = 2
+    return settings
+
+
+class TestQuotaTracker:
+    def test_window_headroom(self, clock, limits):
+        quota = QuotaTracker(clock=clock)
+        for _ in range(8):
+            quota.record_call()
+        assert quota.headroom() == 2
+        assert quota.seconds_until(2) == 0
+
+        clock.now += 20
+        # Two more calls need the two oldest to leave the window
+        assert quota.seconds_until(4) == pytest.approx(40)
+        clock.now += 40
+        assert quota.headroom() == 10
+
+    def test_cooldown_after_exhaustion(self, clock, limits):
+        quota = QuotaTracker(clock=clock)
+        quota.record_exhausted()
+        assert quota.headroom() == 0
+        assert quota.seconds_until(1) == pytest.approx(30)
+        clock.now += 30
+        assert quota.headroom() == 10
+        assert quota.metrics()["exhausted"] == 1
+
+    def test_more_calls_than_one_window(self, clock, limits):
+        quota = QuotaTracker(clock=clock)
+        assert quota.seconds_until(25) == pytest.approx(90)
+
+
+@pytest.mark.django_db
+class TestAdmissionController:
+    def test_admits_and_tracks_duration(self, clock, limits):
+        controller = AdmissionController(quota=QuotaTracker(clock=clock), clock=clock)
+        with controller.generation() as ticket:
+            assert ticket.admitted
+            assert controller.metrics()["in_flight"] == 1
+            clock.now += 30
+        metrics = controller.metrics()
+        assert metrics["in_flight"] == 0
+        assert metrics["admitted"] == 1
+        assert metrics["average_seconds"] == 30
+
+    def test_sheds_when_quota_wait_breaks_slo(self, clock, limits):
+        limits.GENERATION_SLO_SECONDS = 45
+        quota = QuotaTracker(clock=clock)
+        controller = AdmissionController(quota=quota, clock=clock)
+        quota.record_exhausted()
+        with controller.generation() as ticket:
+            assert not ticket.admitted
+            assert ticket.reason == "quota"
+            assert ticket.retry_after == 30
+
+        # A short cooldown still fits the SLO
+        clock.now += 25
+        with controller.generation() as ticket:
+            assert ticket.admitted
+        assert controller.metrics()["rejected_quota"] == 1
+
+    def test_sheds_when_busy(self, clock, limits):
+        controller = AdmissionController(quota=QuotaTracker(clock=clock), clock=clock)
+        with controller.generation() as first, controller.generation() as second:
+            assert first.admitted and second.admitted
+            with controller.generation() as third:
+                assert (third.admitted, third.reason) == (False, "busy")
+                assert third.retry_after == 10
+        assert controller.metrics()["rejected_busy"] == 1
@@ -0,0 +1,130 @@
+"""
+Tests for the autocomplete prefix index.
+"""
+import pytest
+from unittest.mock import patch, MagicMock
+
+from trip_planner.services import autocomplete as ac
+from trip_planner.services.autocomplete import PrefixIndex, autocomplete
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    ac.clear_index()
+    yield
+    ac.clear_index()
+
+
+def _predictions_response(descriptions):
+    response = MagicMock()
+    response.raise_for_status.return_value = None
+    response.json.return_value = {
+        "predictions": [{"description": d, "place_id": f"id-{i}"} for i, d in enumerate(descriptions)]
+    }
+    return response
+
+
+class TestPrefixIndex:
+    def test_longest_prefix(self):
+        index = PrefixIndex()
+        index.put("ba", {"predictions": [1]})
+        index.put("barc", {"predictions": [2]})
+        assert index.longest("barcelona")[0] == "barc"
+        assert index.longest("bo") is None
+
+    def test_lru_eviction_prunes_trie(self):
+        index = PrefixIndex(max_prefixes=2)
+        index.put("ab", {"predictions": []})
+        index.put("cd", {"predictions": []})
+        index.put("ef", {"predictions": []})
+        assert len(index) == 2
+        assert index.longest("abc") is None
+        assert "a" not in index._root.children
+
+
+    @patch("trip_planner.services.autocomplete.time")
+    def test_expired_entries_are_skipped_and_dropped(self, mock_time):
+        index = PrefixIndex()
+        mock_time.time.return_value = 1000.0
+        index.put("ba", {"predictions": [1]}, ttl=600)
+        index.put("barc", {"predictions": [2]}, ttl=60)
+
+        mock_time.time.return_value = 1100.0
+        assert index.longest("barcelona") == ("ba", {"predictions": [1]})
+        assert len(index) == 1
+        assert "r" not in index._root.children["b"].children["a"].children
+
+        mock_time.time.return_value = 1600.0
+        assert index.longest("barcelona") is None
+        assert len(index) == 0
+
+
+class TestAutocomplete:
+    @patch("trip_planner.services.autocomplete.http_client")
+    @patch("trip_planner.services.autocomplete.settings")
+    def test_longer_prefix_filtered_locally(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_settings.CACHE_TTL_AUTOCOMPLETE = 86400
+        mock_http.get.return_value = _predictions_response(["Barcelona, Spain", "Bari, Italy"])
+
+        assert len(autocomplete("Ba")) == 2
+        for typed in ["Bar", "Barc", "Barce", "Barcelona"]:
+            result = autocomplete(typed)
+        assert [p["description"] for p in result] == ["Barcelona, Spain"]
+        assert mock_http.get.call_count == 1
+        assert ac.metrics()["local_prefix"] == 4
+
+    @patch("trip_planner.services.autocomplete.http_client")
+    @patch("trip_planner.services.autocomplete.settings")
+    def test_full_result_set_goes_upstream_when_filter_is_short(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_settings.CACHE_TTL_AUTOCOMPLETE = 86400
+        mock_http.get.side_effect = [
+            _predictions_response(["Sa A", "Sa B", "Sa C", "Sa D", "Sa E"]),
+            _predictions_response(["Santiago, Chile"]),
+        ]
+
+        autocomplete("Sa")
+        assert autocomplete("San") == [{"description": "Santiago, Chile", "place_id": "id-0"}]
+        assert mock_http.get.call_count == 2
+
+    @patch("trip_planner.services.autocomplete.http_client")
+    @patch("trip_planner.services.autocomplete.settings")
+    def test_shared_cache_survives_local_reset(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_settings.CACHE_TTL_AUTOCOMPLETE = 86400
+        mock_http.get.return_value = _predictions_response(["Lisbon, Portugal"])
+
+        autocomplete("Lis")
+        ac.clear_index()
+        assert autocomplete("Lisb")[0]["description"] == "Lisbon, Portugal"
+        assert mock_http.get.call_count == 1
+        assert ac.metrics()["shared"] == 1
+
+    @patch("trip_planner.services.autocomplete.http_client")
+    @patch("trip_planner.services.autocomplete.settings")
+    def test_namespace_bump_clears_trie(self, mock_settings, mock_http):
+        from trip_planner.core.cache import cache_client
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_settings.CACHE_TTL_AUTOCOMPLETE = 86400
+        mock_http.get.return_value = _predictions_response(["Lisbon, Portugal"])
+
+        autocomplete("Lis")
+        cache_client.bump_namespace("places")
+        autocomplete("Lisb")
+        assert mock_http.get.call_count == 2
+
+    @patch("trip_planner.services.autocomplete.http_client")
+    @patch("trip_planner.services.autocomplete.settings")
+    def test_upstream_error_raises_and_is_counted(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_settings.CACHE_TTL_AUTOCOMPLETE = 86400
+        mock_http.get.side_effect = Exception("quota")
+
+        with pytest.raises(Exception):
+            autocomplete("Oslo")
+        assert ac.metrics()["errors"] == 1
+        assert ac.metrics()["hit_ratio"] == 0.0
@@ -2,14 +2,31 @@
 Tests for the currency exchange service.
 """
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
-from trip_planner.services.currency import get_currency_rate, convert_amount
+from trip_planner.services import currency
+from trip_planner.services.currency import (
+    RateTable, get_currency_rate, convert_amount, convert_amounts,
+)
 
 
 pytestmark = pytest.mark.django_db
 
 
+@pytest.fixture(autouse=True)
+def fresh_table():
+    currency.clear_rates()
+    yield
+    currency.clear_rates()
+
+
+def _rates_response(rates):
+    response = MagicMock()
+    response.raise_for_status.return_value = None
+    response.json.return_value = {"base": "USD", "rates": rates}
+    return response
+
+
 class TestSameCurrency:
     def test_same_currency_returns_one(self):
         result = get_currency_rate("USD", "USD")
@@ -20,52 +37,93 @@ class TestSameCurrency:
         assert result == {"rate": 1.0}
 
 
+class TestRateTable:
+    def test_cross_rate_derived_from_reference(self):
+        table = RateTable("USD", {"EUR": 0.9, "GBP": 0.75}, expires_at=0)
+        rate = table.cross_rates(["EUR"], "GBP")[0]
+        assert rate == pytest.approx(0.75 / 0.9)
+
+    def test_unknown_currency_rate_is_one(self):
+        table = RateTable("USD", {"EUR": 0.9}, expires_at=0)
+        assert list(table.cross_rates(["XYZ", "USD"], "EUR")) == [1.0, 0.9]
+
+
 class TestCurrencyCache:
     @patch("trip_planner.services.currency.cache_client")
-    def test_cached_rate_returned(self, mock_cache):
-        mock_cache.get_currency_rate.return_value = 0.85
+    def test_cached_table_returned(self, mock_cache):
+        mock_cache.get_rate_table.return_value = {"base": "USD", "rates": {"EUR": 0.85}, "fetched_at": 4e9}
         result = get_currency_rate("USD", "EUR")
         assert result == {"rate": 0.85}
 
 
+class TestNamespaceBump:
+    def test_bump_reloads_process_table(self, settings):
+        from trip_planner.core.cache import cache_client
+        settings.CURRENCY_API_KEY = ""
+        version = cache_client.current_version("currency")
+        currency._table = RateTable("USD", {"EUR": 0.5}, expires_at=4e9, version=version)
+        assert get_currency_rate("USD", "EUR") == {"rate": 0.5}
+
+        cache_client.bump_namespace("currency")
+        assert currency.get_rate_table().version == version + 1
+        assert convert_amount(10, "USD", "EUR") == 10
+
+
 class TestCurrencyNoAPIKey:
     @patch("trip_planner.services.currency.settings")
     @patch("trip_planner.services.currency.cache_client")
     def test_no_api_key_returns_one(self, mock_cache, mock_settings):
-        mock_cache.get_currency_rate.return_value = None
+        mock_cache.get_rate_table.return_value = None
         mock_settings.CURRENCY_API_KEY = ""
+        mock_settings.CURRENCY_REFERENCE = "USD"
+        mock_settings.CACHE_TTL_CURRENCY = 43200
 
         result = get_currency_rate("USD", "EUR")
         assert result == {"rate": 1.0}
 
 
 class TestCurrencyAPICall:
-    @patch("trip_planner.services.currency.requests")
+    @patch("trip_planner.services.currency.async_http_client", new_callable=AsyncMock)
     @patch("trip_planner.services.currency.settings")
     @patch("trip_planner.services.currency.cache_client")
-    def test_api_success(self, mock_cache, mock_settings, mock_requests):
-        mock_cache.get_currency_rate.return_value = None
+    def test_api_success(self, mock_cache, mock_settings, mock_http):
+        mock_cache.get_rate_table.return_value = None
         mock_settings.CURRENCY_API_KEY = "fake-key"
-
-        response = MagicMock()
-        response.raise_for_status.return_value = None
-        response.json.return_value = {"rates": {"EUR": 0.92}}
-        mock_requests.get.return_value = response
+        mock_settings.CURRENCY_REFERENCE = "USD"
+        mock_settings.CACHE_TTL_CURRENCY = 43200
+        mock_http.get.return_value = _rates_response({"EUR": 0.92, "JPY": 150.0})
 
         result = get_currency_rate("USD", "EUR")
         assert result == {"rate": 0.92}
-        mock_cache.set_currency_rate.assert_called_once()
+        mock_cache.set_rate_table.assert_called_once()
 
-    @patch("trip_planner.services.currency.requests")
+    @patch("trip_planner.services.currency.async_http_client", new_callable=AsyncMock)
     @patch("trip_planner.services.currency.settings")
     @patch("trip_planner.services.currency.cache_client")
-    def test_api_error_returns_one(self, mock_cache, mock_settings, mock_requests):
-        mock_cache.get_currency_rate.return_value = None
+    def test_one_fetch_serves_all_pairs(self, mock_cache, mock_settings, mock_http):
+        mock_cache.get_rate_table.return_value = None
         mock_settings.CURRENCY_API_KEY = "fake-key"
-        mock_requests.get.side_effect = Exception("Timeout")
+        mock_settings.CURRENCY_REFERENCE = "USD"
+        mock_settings.CACHE_TTL_CURRENCY = 43200
+        mock_http.get.return_value = _rates_response({"EUR": 0.8, "JPY": 160.0})
+
+        assert get_currency_rate("EUR", "JPY")["rate"] == pytest.approx(200.0)
+        assert get_currency_rate("JPY", "USD")["rate"] == pytest.approx(1 / 160)
+        assert mock_http.get.call_count == 1
+
+    @patch("trip_planner.services.currency.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.currency.settings")
+    @patch("trip_planner.services.currency.cache_client")
+    def test_api_error_returns_one(self, mock_cache, mock_settings, mock_http):
+        mock_cache.get_rate_table.return_value = None
+        mock_settings.CURRENCY_API_KEY = "fake-key"
+        mock_settings.CURRENCY_REFERENCE = "USD"
+        mock_settings.CACHE_TTL_ERROR = 60
+        mock_http.get.side_effect = Exception("Timeout")
 
         result = get_currency_rate("USD", "JPY")
         assert result == {"rate": 1.0}
+        mock_cache.set_rate_table.assert_not_called()
 
 
 class TestConvertAmount:
@@ -83,3 +141,23 @@ class TestConvertAmount:
         mock_rate.return_value = {"rate": 0.333}
         result = convert_amount(100.0, "USD", "XYZ")
         assert result == 33.3
+
+
+class TestConvertAmounts:
+    @patch("trip_planner.services.currency.get_rate_table")
+    def test_mixed_currencies(self, mock_table):
+        mock_table.return_value = RateTable("USD", {"EUR": 0.8, "GBP": 0.5}, expires_at=0)
+        result = convert_amounts([10, 10, 10], ["USD", "EUR", "GBP"], "EUR")
+        assert result == [8.0, 10.0, 16.0]
+
+    @patch("trip_planner.services.currency.get_rate_table")
+    def test_single_source_currency(self, mock_table):
+        mock_table.return_value = RateTable("USD", {"EUR": 0.8}, expires_at=0)
+        assert convert_amounts([1.0, 2.5], "USD", "EUR") == [0.8, 2.0]
+
+    def test_length_mismatch_rejected(self):
+        with pytest.raises(ValueError):
+            convert_amounts([1.0, 2.0], ["USD"], "EUR")
+
+    def test_empty(self):
+        assert convert_amounts([], "USD", "EUR") == []
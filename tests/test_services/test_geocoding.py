@@ -0,0 +1,164 @@
+"""
+Tests for the shared geocoding index.
+"""
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from trip_planner.models import GeocodeEntry
+from trip_planner.services import geocoding
+from trip_planner.services.geocoding import (
+    normalize_name, parse_coords, lookup, geocode, remember, remember_many, import_gazetteer,
+    set_timezone, utc_offset_name,
+)
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def empty_index():
+    geocoding.clear_index()
+    yield
+    geocoding.clear_index()
+
+
+class TestParseCoords:
+    def test_valid_coords(self):
+        assert parse_coords("33.4484, -112.0740") == (33.4484, -112.0740)
+
+    def test_no_comma(self):
+        assert parse_coords("invalid") is None
+
+    def test_non_numeric(self):
+        assert parse_coords("abc, def") is None
+
+    def test_empty_string(self):
+        assert parse_coords("") is None
+
+
+class TestNormalizeName:
+    def test_case_accents_and_spacing(self):
+        assert normalize_name("  Zürich ,Switzerland ") == "zurich, switzerland"
+
+    def test_non_latin_kept(self):
+        assert normalize_name("東京") == "東京"
+
+
+class TestLookup:
+    def test_coordinates_resolve_without_index(self):
+        assert lookup("48.85,2.35")["lat"] == 48.85
+
+    def test_miss_returns_none(self):
+        assert lookup("Atlantis") is None
+
+    def test_table_hit_fills_memory_index(self):
+        remember("Paris, France", 48.8566, 2.3522, country="FR")
+        geocoding.clear_index()
+        assert lookup("paris,  FRANCE")["country"] == "FR"
+        GeocodeEntry.objects.all().delete()
+        assert lookup("Paris, France")["lat"] == 48.8566
+
+    def test_namespace_bump_drops_memory_index(self):
+        from trip_planner.core.cache import cache_client
+        remember("Paris, France", 48.8566, 2.3522)
+        GeocodeEntry.objects.all().delete()
+        cache_client.bump_namespace("geocode")
+        assert lookup("Paris, France") is None
+
+
+class TestGeocodeProviders:
+    @patch("trip_planner.services.geocoding.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.geocoding.settings")
+    def test_first_provider_answer_is_persisted(self, mock_settings, mock_http):
+        mock_settings.OPENWEATHER_API_KEY = "fake-key"
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        resp = MagicMock()
+        resp.raise_for_status.return_value = None
+        resp.json.return_value = [{"lat": 41.39, "lon": 2.17, "country": "ES"}]
+        mock_http.get.return_value = resp
+
+        assert geocode("Barcelona")["country"] == "ES"
+        assert geocode("barcelona")["lat"] == 41.39
+        assert mock_http.get.call_count == 1
+        assert GeocodeEntry.objects.get(normalized_name="barcelona").source == "openweather"
+
+    @patch("trip_planner.services.geocoding.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.geocoding.settings")
+    def test_falls_through_to_google(self, mock_settings, mock_http):
+        mock_settings.OPENWEATHER_API_KEY = "fake-key"
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        owm = MagicMock()
+        owm.raise_for_status.return_value = None
+        owm.json.return_value = []
+        google = MagicMock()
+        google.raise_for_status.return_value = None
+        google.json.return_value = {"results": [{
+            "geometry": {"location": {"lat": 62.01, "lng": -6.77}},
+            "address_components": [{"short_name": "FO", "types": ["country", "political"]}],
+        }]}
+        timezone = MagicMock()
+        timezone.raise_for_status.return_value = None
+        timezone.json.return_value = {"status": "OK", "timeZoneId": "Atlantic/Faroe"}
+        mock_http.get.side_effect = [owm, google, timezone]
+
+        result = geocode("Tórshavn")
+        assert (result["lat"], result["country"], result["timezone"]) == (62.01, "FO", "Atlantic/Faroe")
+        assert mock_http.get.call_args[1]["params"]["location"] == "62.01,-6.77"
+        assert GeocodeEntry.objects.get(normalized_name="torshavn").timezone == "Atlantic/Faroe"
+
+    @patch("trip_planner.services.geocoding.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.geocoding.settings")
+    def test_unknown_name_negatively_cached(self, mock_settings, mock_http):
+        mock_settings.OPENWEATHER_API_KEY = "fake-key"
+        mock_settings.GOOGLE_PLACES_API_KEY = ""
+        mock_settings.CACHE_TTL_ERROR = 60
+        resp = MagicMock()
+        resp.raise_for_status.return_value = None
+        resp.json.return_value = []
+        mock_http.get.return_value = resp
+
+        assert geocode("Xyzzyville") is None
+        assert geocode("Xyzzyville") is None
+        assert mock_http.get.call_count == 1
+
+
+class TestTimezones:
+    def test_offset_name(self):
+        assert utc_offset_name(19800) == "UTC+05:30"
+        assert utc_offset_name(-10800) == "UTC-03:00"
+
+    def test_set_timezone_fills_only_blank_entries(self):
+        remember("Lisbon", 38.72, -9.14)
+        remember("Kyoto", 35.01, 135.77, timezone="Asia/Tokyo")
+        set_timezone("lisbon", "UTC+00:00")
+        set_timezone("Kyoto", "UTC+09:00")
+
+        assert lookup("Lisbon")["timezone"] == "UTC+00:00"
+        geocoding.clear_index()
+        assert lookup("Lisbon")["timezone"] == "UTC+00:00"
+        assert lookup("Kyoto")["timezone"] == "Asia/Tokyo"
+
+
+class TestBulkLoading:
+    def test_remember_many_keeps_existing(self):
+        remember("Louvre Museum", 48.8606, 2.3376, source="gazetteer")
+        added = remember_many([
+            {"name": "Louvre Museum", "lat": 0.0, "lon": 0.0},
+            {"name": "Musée d'Orsay", "lat": 48.86, "lon": 2.3266},
+        ], source="places")
+        assert added == 2
+        assert GeocodeEntry.objects.get(normalized_name="louvre museum").lat == 48.8606
+        assert lookup("Musee d'Orsay") is not None
+
+    def test_import_gazetteer(self, tmp_path):
+        path = tmp_path / "gazetteer.csv"
+        path.write_text(
+            "name,lat,lon,country,timezone\n"
+            "Kyoto,35.0116,135.7681,JP,Asia/Tokyo\n"
+            "Bad Row,not-a-number,0,,\n"
+            "Reykjavík,64.1466,-21.9426,IS,Atlantic/Reykjavik\n",
+            encoding="utf-8",
+        )
+        assert import_gazetteer(str(path), batch_size=1) == 2
+        assert lookup("reykjavik")["timezone"] == "Atlantic/Reykjavik"
+        assert GeocodeEntry.objects.count() == 2
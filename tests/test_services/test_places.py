@@ -1,15 +1,28 @@
 """
 Tests for the Google Places service.
 """
+import asyncio
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
-from trip_planner.services.places import get_attractions, get_hotels
+from trip_planner.services.geocoding import remember
+from trip_planner.services.places import (
+    DETAILS_FIELDS, get_attractions, get_hotels, get_lodging, get_place_details,
+    aget_attractions, aget_place_details,
+)
 
 
 pytestmark = pytest.mark.django_db
 
 
+@pytest.fixture
+def no_details(monkeypatch):
+    async def none(place_ids):
+        return {}
+    monkeypatch.setattr("trip_planner.services.places.aget_place_details", none)
+
+
 class TestAttractionsStub:
     """When no API key is set, stub attractions are returned."""
 
@@ -81,25 +94,301 @@ class TestHotelsStub:
         assert len(result["hotels"]) > 0
 
 
+@pytest.mark.usefixtures("no_details")
 class TestPlacesCache:
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
     @patch("trip_planner.services.places.cache_client")
-    def test_cached_attractions_returned(self, mock_cache):
-        cached = {"attractions": [{"name": "Cached Place", "rating": 4.5}]}
-        mock_cache.get_places.return_value = cached
+    def test_cached_interests_skip_search(self, mock_cache, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_cache.get_places_many.return_value = {
+            "interest:history": {"results": [{"place_id": "p1", "name": "Cached Place", "rating": 4.5,
+                                              "user_ratings_total": 10, "types": [], "address": None}]}
+        }
 
         result = get_attractions("Paris", ["history"])
-        assert result == cached
+        assert [a["name"] for a in result["attractions"]] == ["Cached Place"]
+        mock_http.get.assert_not_called()
 
 
 class TestPlacesAPIError:
-    @patch("trip_planner.services.places.requests")
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
     @patch("trip_planner.services.places.settings")
     @patch("trip_planner.services.places.cache_client")
-    def test_api_error_falls_back_to_stub(self, mock_cache, mock_settings, mock_requests):
+    def test_api_error_falls_back_to_stub(self, mock_cache, mock_settings, mock_http):
         mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
         mock_cache.get_places.return_value = None
-        mock_requests.get.side_effect = Exception("API Error")
+        mock_http.get.side_effect = Exception("API Error")
 
         result = get_attractions("Paris", ["history"])
         assert "attractions" in result
         assert isinstance(result["attractions"], list)
+
+
+def _search_response(results, next_page_token=None):
+    response = MagicMock()
+    response.raise_for_status.return_value = None
+    response.json.return_value = {"results": results, **({"next_page_token": next_page_token} if next_page_token else {})}
+    return response
+
+
+HOTEL_RESULTS = [
+    {"name": "Hostel One", "rating": 4.2, "price_level": 1},
+    {"name": "Hostel Two", "rating": 3.9, "price_level": 0},
+    {"name": "Midway Inn", "rating": 4.1, "price_level": 2},
+    {"name": "Ritz", "rating": 4.8, "price_level": 4},
+    {"name": "Unpriced Gem", "rating": 4.9},
+]
+
+
+class TestLodging:
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    def test_one_search_serves_every_tier(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_http.get.return_value = _search_response(HOTEL_RESULTS)
+
+        budget = get_hotels("Lisbon", "budget")["hotels"]
+        midrange = get_hotels("Lisbon", "midrange")["hotels"]
+        luxury = get_hotels("Lisbon", "luxury")["hotels"]
+
+        assert [h["name"] for h in budget] == ["Hostel One", "Hostel Two"]
+        assert [h["name"] for h in midrange] == ["Midway Inn"]
+        assert [h["name"] for h in luxury] == ["Unpriced Gem", "Ritz"]
+        assert mock_http.get.call_count == 1
+
+    @patch("trip_planner.services.places.NEXT_PAGE_DELAY", 0)
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    def test_follows_next_page_token(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_http.get.side_effect = [
+            _search_response(HOTEL_RESULTS[:2], next_page_token="page-2"),
+            _search_response(HOTEL_RESULTS[2:], next_page_token="page-3"),
+        ]
+
+        lodging = get_lodging("Porto")["lodging"]
+
+        assert len(lodging) == len(HOTEL_RESULTS)
+        assert mock_http.get.call_count == 2
+        assert mock_http.get.call_args[1]["params"]["pagetoken"] == "page-2"
+
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    def test_missing_tier_uses_nearest(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_http.get.return_value = _search_response([{"name": "Midway Inn", "rating": 4.1, "price_level": 2}])
+
+        assert get_hotels("Faro", "luxury")["hotels"][0]["name"] == "Midway Inn"
+
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    def test_error_is_cached_briefly(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_settings.CACHE_TTL_ERROR = 60
+        mock_http.get.side_effect = Exception("API Error")
+
+        first = get_hotels("Braga", "midrange")
+        second = get_hotels("Braga", "budget")
+
+        assert first["hotels"] == [] and "error" in first
+        assert "error" in second
+        assert mock_http.get.call_count == 1
+
+    @patch("trip_planner.services.places.settings")
+    @patch("trip_planner.services.places.cache_client")
+    def test_stub_is_cached(self, mock_cache, mock_settings):
+        mock_settings.GOOGLE_PLACES_API_KEY = ""
+        mock_cache.get_places.return_value = None
+
+        get_hotels("Tokyo", "midrange")
+
+        mock_cache.set_places.assert_called_once()
+        assert mock_cache.set_places.call_args[0][1] == "lodging"
+
+
+def _attraction(place_id, name, rating=4.5, reviews=500, types=("museum",)):
+    return {"place_id": place_id, "name": name, "rating": rating,
+            "user_ratings_total": reviews, "types": list(types)}
+
+
+@pytest.mark.usefixtures("no_details")
+class TestMultiInterestSearch:
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    def test_one_query_per_interest_deduplicated(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        by_query = {
+            "museums in Vienna": [_attraction("a", "Albertina"), _attraction("b", "Belvedere")],
+            "history in Vienna": [_attraction("b", "Belvedere"), _attraction("c", "Hofburg")],
+        }
+        mock_http.get.side_effect = lambda url, params, **kw: _search_response(by_query[params["query"]])
+
+        result = get_attractions("Vienna", ["museums", "history"])
+
+        names = [a["name"] for a in result["attractions"]]
+        assert sorted(names) == ["Albertina", "Belvedere", "Hofburg"]
+        assert names[0] == "Belvedere"  # matched both interests
+        assert mock_http.get.call_count == 2
+
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    def test_adding_interest_costs_one_query(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_http.get.side_effect = lambda url, params, **kw: _search_response(
+            [_attraction(params["query"], params["query"])])
+
+        get_attractions("Graz", ["museums", "history"])
+        mock_http.get.reset_mock()
+        get_attractions("Graz", ["museums", "history", "food"])
+
+        assert mock_http.get.call_count == 1
+        assert mock_http.get.call_args[1]["params"]["query"] == "food in Graz"
+
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    def test_ranking_weights_review_count(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_http.get.return_value = _search_response([
+            _attraction("few", "Five Stars Once", rating=5.0, reviews=2),
+            _attraction("many", "Crowd Favourite", rating=4.6, reviews=20000),
+        ])
+
+        result = get_attractions("Linz", ["sights"])
+        assert result["attractions"][0]["name"] == "Crowd Favourite"
+
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    def test_partial_failure_keeps_other_interests(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_settings.CACHE_TTL_ERROR = 60
+
+        def respond(url, params, **kw):
+            if params["query"].startswith("food"):
+                raise Exception("API Error")
+            return _search_response([_attraction("m", "Museum")])
+        mock_http.get.side_effect = respond
+
+        result = get_attractions("Salzburg", ["museums", "food"])
+        assert [a["name"] for a in result["attractions"]] == ["Museum"]
+
+
+@pytest.mark.usefixtures("no_details")
+class TestAsyncAttractions:
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    @patch("trip_planner.services.places.cache_client")
+    def test_interest_searches_overlap(self, mock_cache, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_cache.get_places_many.return_value = {}
+        in_flight, peak = 0, 0
+
+        async def respond(url, params, **kw):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return _search_response([_attraction(params["query"], params["query"])])
+        mock_http.get.side_effect = respond
+
+        with patch("trip_planner.services.places._index_locations"):
+            result = asyncio.run(aget_attractions("Bern", ["museums", "food", "parks"]))
+
+        assert len(result["attractions"]) == 3
+        assert peak == 3
+
+
+def _details_response(lat=48.2, lng=16.37, hours=("Monday: 9:00 AM – 6:00 PM",)):
+    response = MagicMock()
+    response.raise_for_status.return_value = None
+    response.json.return_value = {"status": "OK", "result": {
+        "geometry": {"location": {"lat": lat, "lng": lng}},
+        "opening_hours": {"weekday_text": list(hours)},
+        "website": "https://example.org",
+    }}
+    return response
+
+
+class TestPlaceDetails:
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    def test_details_cached_per_place(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_http.get.return_value = _details_response()
+
+        first = get_place_details(["pd-1", "pd-2"])
+        second = get_place_details(["pd-2", "pd-3"])
+
+        assert set(first) == {"pd-1", "pd-2"}
+        assert second["pd-2"]["opening_hours"] == ["Monday: 9:00 AM – 6:00 PM"]
+        assert mock_http.get.call_count == 3
+        assert mock_http.get.call_args[1]["params"]["fields"] == DETAILS_FIELDS
+
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    def test_failures_are_not_cached(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_http.get.side_effect = [Exception("timeout"), _details_response()]
+
+        assert get_place_details(["pd-flaky"]) == {}
+        assert "pd-flaky" in get_place_details(["pd-flaky"])
+
+    @patch("trip_planner.services.places.DETAILS_CONCURRENCY", 2)
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    @patch("trip_planner.services.places.cache_client")
+    def test_concurrency_is_bounded(self, mock_cache, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        mock_cache.get_place_details_many.return_value = {}
+        in_flight, peak = 0, 0
+
+        async def respond(url, params, **kw):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return _details_response()
+        mock_http.get.side_effect = respond
+
+        result = asyncio.run(aget_place_details([f"pd-{i}" for i in range(6)]))
+        assert len(result) == 6
+        assert peak == 2
+
+    @patch("trip_planner.services.places.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.places.settings")
+    def test_attractions_get_hours_and_real_distance(self, mock_settings, mock_http):
+        mock_settings.GOOGLE_PLACES_API_KEY = "fake-key"
+        remember("Vienna Center", 48.2082, 16.3738)
+
+        def respond(url, params, **kw):
+            if "details" in url:
+                return _details_response(lat=48.2167, lng=16.3958)
+            return _search_response([_attraction("schoenbrunn-id", "Belvedere")])
+        mock_http.get.side_effect = respond
+
+        attraction = get_attractions("Vienna Center", ["palaces"])["attractions"][0]
+
+        assert attraction["opening_hours"] == ["Monday: 9:00 AM – 6:00 PM"]
+        assert attraction["website"] == "https://example.org"
+        assert 1.0 < attraction["distance_km"] < 2.5
+
+
+class TestLocationIndexing:
+    def test_names_qualified_by_destination(self):
+        from trip_planner.services.geocoding import clear_index, lookup
+        from trip_planner.services.places import _index_locations
+
+        def hilton(lat, lng, address):
+            return {"name": "Hilton", "formatted_address": address,
+                    "geometry": {"location": {"lat": lat, "lng": lng}}}
+
+        _index_locations([hilton(48.87, 2.33, "1 Rue de Rivoli, Paris")], "Paris, France")
+        _index_locations([hilton(41.90, 12.49, "Via Veneto 1, Rome")], "Rome, Italy")
+        clear_index()
+
+        assert lookup("Hilton") is None
+        assert lookup("Hilton, Paris, France")["lat"] == 48.87
+        assert lookup("Hilton, Rome, Italy")["lat"] == 41.90
+        assert lookup("Via Veneto 1, Rome")["lon"] == 12.49
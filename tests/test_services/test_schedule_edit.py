@@ -0,0 +1,99 @@
+"""
+Tests for the local block edit engine.
+"""
+from datetime import time
+
+import pytest
+
+from trip_planner.services.schedule_edit import edit_locally, parse_instruction
+
+
+def _day():
+    return [
+        {"start_time": "09:00", "end_time": "10:00", "title": "Louvre"},
+        {"start_time": "10:30", "end_time": "12:00", "title": "Orsay"},
+        {"start_time": "12:00", "end_time": "13:00", "title": "Lunch"},
+    ]
+
+
+def _times(blocks):
+    return [(b["title"], str(b["start_time"])[:5], str(b["end_time"])[:5]) for b in blocks]
+
+
+class TestParseInstruction:
+    @pytest.mark.parametrize("text, expected", [
+        ("Delete", {"op": "delete"}),
+        ("remove this activity", {"op": "delete"}),
+        ("swap with next", {"op": "swap", "offset": 1}),
+        ("Swap it with the previous one.", {"op": "swap", "offset": -1}),
+        ("move to 3pm", {"op": "move", "start": 15 * 60}),
+        ("start at 9:30", {"op": "move", "start": 9 * 60 + 30}),
+        ("move it to noon", {"op": "move", "start": 12 * 60}),
+        ("make it 30 minutes longer", {"op": "resize", "delta": 30}),
+        ("an hour shorter", {"op": "resize", "delta": -60}),
+        ("extend by half an hour", {"op": "resize", "delta": 30}),
+        ("shift by 1 hour", {"op": "shift", "delta": 60}),
+        ("push it back 45 min", {"op": "shift", "delta": 45}),
+        ("move it 2 hours earlier", {"op": "shift", "delta": -120}),
+        ("delay by 1.5 hours", {"op": "shift", "delta": 90}),
+    ])
+    def test_mechanical(self, text, expected):
+        assert parse_instruction(text) == expected
+
+    @pytest.mark.parametrize("text", ["make it more romantic", "move to 25:00", "somewhere with a view"])
+    def test_creative_falls_through(self, text):
+        assert parse_instruction(text) is None
+
+
+class TestEditLocally:
+    def test_longer_cascades(self):
+        edited = edit_locally("make it 1 hour longer", _day(), 0)
+        assert _times(edited["blocks"]) == [
+            ("Louvre", "09:00", "11:00"), ("Orsay", "11:00", "12:30"), ("Lunch", "12:30", "13:30"),
+        ]
+        assert edited["block"]["end_time"] == time(11, 0)
+
+    def test_shift_earlier_leaves_others(self):
+        edited = edit_locally("move it 30 minutes earlier", _day(), 1)
+        assert _times(edited["blocks"])[1] == ("Orsay", "10:00", "11:30")
+        assert _times(edited["blocks"])[::2] == _times(_day())[::2]
+
+    def test_move_reorders_and_keeps_requested_time(self):
+        edited = edit_locally("move to 10:00", _day(), 2)
+        assert [b["title"] for b in edited["blocks"]] == ["Louvre", "Lunch", "Orsay"]
+        assert edited["block"]["start_time"] == time(10, 0)
+        assert _times(edited["blocks"])[2] == ("Orsay", "11:00", "12:30")
+
+    def test_unchanged_fields_are_kept(self):
+        day = _day()
+        day[0]["alternatives"] = [{"name": "Musée Rodin"}]
+        day[1]["alternatives"] = [{"name": "Orangerie"}]
+        for text in ("make it 1 hour longer", "swap with next"):
+            edited = edit_locally(text, day, 0)
+            by_title = {b["title"]: b for b in edited["blocks"]}
+            assert by_title["Louvre"]["alternatives"] == [{"name": "Musée Rodin"}]
+            assert by_title["Orsay"]["alternatives"] == [{"name": "Orangerie"}]
+
+    def test_swap_keeps_gap(self):
+        edited = edit_locally("swap with next", _day(), 0)
+        assert _times(edited["blocks"]) == [
+            ("Orsay", "09:00", "10:30"), ("Louvre", "11:00", "12:00"), ("Lunch", "12:00", "13:00"),
+        ]
+        assert edited["block"]["title"] == "Louvre"
+
+    def test_delete(self):
+        edited = edit_locally("delete", _day(), 1)
+        assert edited["deleted"] and edited["block"] is None
+        assert [b["title"] for b in edited["blocks"]] == ["Louvre", "Lunch"]
+
+    @pytest.mark.parametrize("text, index", [
+        ("swap with previous", 0),
+        ("move to 11pm", 1),
+        ("make it 2 hours shorter", 0),
+        ("make it more fun", 0),
+        # Would overlap the block before it, which the engine never moves
+        ("move it 30 minutes earlier", 2),
+        ("move to 9:30", 2),
+    ])
+    def test_not_applicable(self, text, index):
+        assert edit_locally(text, _day(), index) is None
@@ -0,0 +1,103 @@
+"""
+Tests for the offline travel-time estimator.
+"""
+import numpy as np
+import pytest
+
+from trip_planner.services import travel_estimate
+from trip_planner.services.travel_estimate import (
+    haversine_km, estimate_matrix, estimate_minutes, record_observation, calibration_factor,
+)
+from trip_planner.services.geocoding import remember
+
+
+LOUVRE = (48.8606, 2.3376)
+EIFFEL = (48.8584, 2.2945)
+
+
+@pytest.fixture(autouse=True)
+def clean_calibration():
+    travel_estimate.reset_calibration()
+    yield
+    travel_estimate.reset_calibration()
+
+
+class TestHaversine:
+    def test_known_distance(self):
+        # London → Paris is about 344 km
+        km = haversine_km([51.5074], [-0.1278], [48.8566], [2.3522])
+        assert km.shape == (1, 1)
+        assert 340 < km[0, 0] < 348
+
+    def test_pairwise_shape_and_symmetry(self):
+        lats, lons = [48.86, 48.85, 48.87], [2.33, 2.29, 2.35]
+        km = haversine_km(lats, lons, lats, lons)
+        assert km.shape == (3, 3)
+        assert np.allclose(km, km.T)
+        assert np.allclose(np.diag(km), 0)
+
+
+class TestEstimateMatrix:
+    def test_modes_are_ordered_by_speed(self):
+        walk = estimate_matrix([LOUVRE, EIFFEL], "walk")[0, 1]
+        transit = estimate_matrix([LOUVRE, EIFFEL], "transit")[0, 1]
+        drive = estimate_matrix([LOUVRE, EIFFEL], "drive")[0, 1]
+        assert walk > transit > drive > 0
+
+    def test_unknown_coords_are_nan(self):
+        minutes = estimate_matrix([LOUVRE, None])
+        assert np.isnan(minutes[0, 1])
+        assert minutes[0, 0] == 0
+
+    def test_unknown_mode_rejected(self):
+        with pytest.raises(ValueError):
+            estimate_matrix([LOUVRE, EIFFEL], "teleport")
+
+
+class TestCalibration:
+    def test_uncalibrated_until_enough_samples(self):
+        record_observation(LOUVRE, EIFFEL, 30)
+        assert calibration_factor() == 1.0
+
+    def test_real_results_scale_estimates(self):
+        before = estimate_matrix([LOUVRE, EIFFEL])[0, 1]
+        for _ in range(travel_estimate.CALIBRATION_MIN_SAMPLES):
+            record_observation(LOUVRE, EIFFEL, before * 2)
+        assert calibration_factor() == pytest.approx(2.0)
+        assert estimate_matrix([LOUVRE, EIFFEL])[0, 1] == pytest.approx(before * 2)
+        assert calibration_factor("walk") == 1.0
+
+
+@pytest.mark.django_db
+class TestCalibrationSeeding:
+    def test_seeded_from_cached_real_results(self):
+        from trip_planner.core.cache import cache_client
+        remember("Louvre", *LOUVRE)
+        remember("Eiffel Tower", *EIFFEL)
+        modelled = estimate_matrix([LOUVRE, EIFFEL])[0, 1]
+        travel_estimate.reset_calibration()
+        cache_client.set_travel_times({("Louvre", "Eiffel Tower"): round(modelled * 2)})
+        cache_client.set_travel_times({("Eiffel Tower", "Louvre"): 500}, estimated=True)
+        cache_client.set_travel_times({("Louvre", "Nowhere Special"): 500})
+
+        samples = travel_estimate.CALIBRATION_MIN_SAMPLES
+        travel_estimate._samples["drive"].extend([2.0] * (samples - 1))
+        assert calibration_factor() == pytest.approx(2.0, rel=0.05)
+        assert len(travel_estimate._samples["drive"]) == samples
+
+    def test_estimated_entries_are_not_real_results(self):
+        from trip_planner.core.cache import cache_client
+        cache_client.set_travel_times({("A", "B"): 12})
+        cache_client.set_travel_times({("C", "D"): 30}, ttl=60, estimated=True)
+        assert cache_client.recent_travel_times(10) == [("A", "B", 12)]
+
+
+@pytest.mark.django_db
+class TestEstimateMinutes:
+    def test_named_locations_from_index(self):
+        remember("Louvre", *LOUVRE)
+        remember("Eiffel Tower", *EIFFEL)
+        assert estimate_minutes("Louvre", "Eiffel Tower", "walk") > 30
+
+    def test_unindexed_location_returns_none(self):
+        assert estimate_minutes("Louvre", "Nowhere Special") is None
@@ -2,28 +2,16 @@
 Tests for the travel time calculation service.
 """
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
-from trip_planner.services.travel_time import get_travel_time_minutes, _parse_coords
+from trip_planner.core.cache import cache_client
+from trip_planner.services.travel_time import get_travel_time_minutes, get_travel_time_matrix, get_travel_times
+from trip_planner.services.geocoding import remember
 
 
 pytestmark = pytest.mark.django_db
 
 
-class TestParseCoords:
-    def test_valid_coords(self):
-        assert _parse_coords("33.4484, -112.0740") == (33.4484, -112.0740)
-
-    def test_no_comma(self):
-        assert _parse_coords("invalid") is None
-
-    def test_non_numeric(self):
-        assert _parse_coords("abc, def") is None
-
-    def test_empty_string(self):
-        assert _parse_coords("") is None
-
-
 class TestTravelTimeCache:
     @patch("trip_planner.services.travel_time.cache_client")
     def test_cached_result_returned(self, mock_cache):
@@ -33,10 +21,10 @@ class TestTravelTimeCache:
 
 
 class TestTravelTimeGoogleAPI:
-    @patch("trip_planner.services.travel_time.requests")
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
     @patch("trip_planner.services.travel_time.settings")
     @patch("trip_planner.services.travel_time.cache_client")
-    def test_google_api_success(self, mock_cache, mock_settings, mock_requests):
+    def test_google_api_success(self, mock_cache, mock_settings, mock_http):
         mock_cache.get_travel_time.return_value = None
         mock_settings.DISTANCE_MATRIX_API_KEY = "fake-key"
 
@@ -50,19 +38,19 @@ class TestTravelTimeGoogleAPI:
                 }]
             }]
         }
-        mock_requests.get.return_value = response
+        mock_http.get.return_value = response
 
         result = get_travel_time_minutes("Phoenix, AZ", "Tucson, AZ")
         assert result == {"travel_time_minutes": 90}
         mock_cache.set_travel_time.assert_called_once()
 
-    @patch("trip_planner.services.travel_time.requests")
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
     @patch("trip_planner.services.travel_time.settings")
     @patch("trip_planner.services.travel_time.cache_client")
-    def test_google_api_error_falls_back(self, mock_cache, mock_settings, mock_requests):
+    def test_google_api_error_falls_back(self, mock_cache, mock_settings, mock_http):
         mock_cache.get_travel_time.return_value = None
         mock_settings.DISTANCE_MATRIX_API_KEY = "fake-key"
-        mock_requests.get.side_effect = Exception("Network error")
+        mock_http.get.side_effect = Exception("Network error")
 
         # No coords, so no OSRM fallback either → default
         result = get_travel_time_minutes("City A", "City B")
@@ -78,14 +66,28 @@ class TestTravelTimeDefaultFallback:
 
         result = get_travel_time_minutes("Unknown A", "Unknown B")
         assert result == {"travel_time_minutes": 20}
-        mock_cache.set_travel_time.assert_called_once_with("Unknown A", "Unknown B", 20)
+        mock_cache.set_travel_time.assert_not_called()
+
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.travel_time.settings")
+    @patch("trip_planner.services.travel_time.cache_client")
+    def test_indexed_locations_use_offline_estimate(self, mock_cache, mock_settings, mock_http):
+        mock_cache.get_travel_time.return_value = None
+        mock_settings.DISTANCE_MATRIX_API_KEY = ""
+        mock_http.get.side_effect = Exception("Network error")
+        remember("Louvre", 48.8606, 2.3376)
+        remember("Eiffel Tower", 48.8584, 2.2945)
+
+        result = get_travel_time_minutes("Louvre", "Eiffel Tower")
+        assert 5 < result["travel_time_minutes"] < 15
+        mock_cache.set_travel_time.assert_not_called()
 
 
 class TestTravelTimeOSRM:
-    @patch("trip_planner.services.travel_time.requests")
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
     @patch("trip_planner.services.travel_time.settings")
     @patch("trip_planner.services.travel_time.cache_client")
-    def test_osrm_fallback_with_coords(self, mock_cache, mock_settings, mock_requests):
+    def test_osrm_fallback_with_coords(self, mock_cache, mock_settings, mock_http):
         mock_cache.get_travel_time.return_value = None
         mock_settings.DISTANCE_MATRIX_API_KEY = ""
 
@@ -94,7 +96,148 @@ class TestTravelTimeOSRM:
         response.json.return_value = {
             "routes": [{"duration": 3600}]  # 60 minutes
         }
-        mock_requests.get.return_value = response
+        mock_http.get.return_value = response
 
         result = get_travel_time_minutes("33.4484, -112.0740", "32.2226, -110.9747")
         assert result == {"travel_time_minutes": 60}
+
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.travel_time.settings")
+    @patch("trip_planner.services.travel_time.cache_client")
+    def test_osrm_uses_geocoding_index_for_names(self, mock_cache, mock_settings, mock_http):
+        mock_cache.get_travel_time.return_value = None
+        mock_settings.DISTANCE_MATRIX_API_KEY = ""
+        remember("Phoenix, AZ", 33.4484, -112.0740)
+        remember("Tucson, AZ", 32.2226, -110.9747)
+
+        response = MagicMock()
+        response.raise_for_status.return_value = None
+        response.json.return_value = {"routes": [{"duration": 6600}]}
+        mock_http.get.return_value = response
+
+        result = get_travel_time_minutes("Phoenix, AZ", "Tucson, AZ")
+        assert result == {"travel_time_minutes": 110}
+        assert "-112.074,33.4484" in mock_http.get.call_args[0][0]
+
+
+def _matrix_response(origins, destinations, minutes=30):
+    response = MagicMock()
+    response.raise_for_status.return_value = None
+    response.json.return_value = {
+        "rows": [{"elements": [{"status": "OK", "duration": {"value": minutes * 60}}
+                               for _ in destinations]} for _ in origins]
+    }
+    return response
+
+
+def _requested_elements(mock_http) -> list:
+    """Every (origin, destination) element sent to Distance Matrix."""
+    elements = []
+    for call in mock_http.get.call_args_list:
+        params = call[1]["params"]
+        elements += [(o, d) for o in params["origins"].split("|") for d in params["destinations"].split("|")]
+    return elements
+
+
+class TestTravelTimeMatrix:
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.travel_time.settings")
+    def test_builds_matrix_without_diagonal_elements(self, mock_settings, mock_http):
+        mock_settings.DISTANCE_MATRIX_API_KEY = "fake-key"
+        mock_http.get.side_effect = lambda url, params, **kw: _matrix_response(
+            params["origins"].split("|"), params["destinations"].split("|"), minutes=15)
+
+        matrix = get_travel_time_matrix(["A", "B", "C"])
+
+        assert matrix == [[0, 15, 15], [15, 0, 15], [15, 15, 0]]
+        assert sorted(_requested_elements(mock_http)) == sorted(
+            (o, d) for o in "ABC" for d in "ABC" if o != d)
+
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.travel_time.settings")
+    def test_only_missing_pairs_are_requested(self, mock_settings, mock_http):
+        mock_settings.DISTANCE_MATRIX_API_KEY = "fake-key"
+        cache_client.set_travel_times({("A", "B"): 5, ("B", "A"): 6})
+        # Only A→C, B→C, C→A, C→B are missing
+        mock_http.get.side_effect = lambda url, params, **kw: _matrix_response(
+            params["origins"].split("|"), params["destinations"].split("|"), minutes=9)
+        matrix = get_travel_time_matrix(["A", "B", "C"])
+
+        assert matrix[0][1] == 5
+        assert matrix[1][0] == 6
+        assert matrix[0][2] == matrix[2][1] == 9
+        assert cache_client.get_travel_time("C", "A") == 9
+        # Cached pairs and A→A diagonals are never billed
+        assert sorted(_requested_elements(mock_http)) == [("A", "C"), ("B", "C"), ("C", "A"), ("C", "B")]
+
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.travel_time.settings")
+    def test_fully_cached_matrix_makes_no_requests(self, mock_settings, mock_http):
+        mock_settings.DISTANCE_MATRIX_API_KEY = "fake-key"
+        cache_client.set_travel_times({("X", "Y"): 11, ("Y", "X"): 12})
+
+        assert get_travel_time_matrix(["X", "Y"]) == [[0, 11], [12, 0]]
+        mock_http.get.assert_not_called()
+
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.travel_time.settings")
+    def test_large_matrix_respects_element_limit(self, mock_settings, mock_http):
+        mock_settings.DISTANCE_MATRIX_API_KEY = "fake-key"
+        mock_http.get.side_effect = lambda url, params, **kw: _matrix_response(
+            params["origins"].split("|"), params["destinations"].split("|"))
+        locations = [f"Stop {i}" for i in range(12)]
+
+        matrix = get_travel_time_matrix(locations)
+
+        assert len(matrix) == 12 and all(len(row) == 12 for row in matrix)
+        for call in mock_http.get.call_args_list:
+            params = call[1]["params"]
+            assert len(params["origins"].split("|")) * len(params["destinations"].split("|")) <= 100
+        assert len(_requested_elements(mock_http)) == 12 * 11
+
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.travel_time.settings")
+    def test_estimated_pairs_cached_with_error_ttl(self, mock_settings, mock_http):
+        mock_settings.DISTANCE_MATRIX_API_KEY = "fake-key"
+        mock_settings.CACHE_TTL_ERROR = 60
+        mock_http.get.side_effect = Exception("Network error")
+
+        with patch("trip_planner.services.travel_time.cache_client") as mock_cache:
+            mock_cache.get_travel_times.return_value = {}
+            assert get_travel_time_matrix(["P", "Q"]) == [[0, 20], [20, 0]]
+
+        mock_cache.set_travel_times.assert_called_once_with({("P", "Q"): 20, ("Q", "P"): 20}, ttl=60, estimated=True)
+
+
+class TestTravelTimePairs:
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.travel_time.settings")
+    def test_only_requested_pairs_are_fetched(self, mock_settings, mock_http):
+        mock_settings.DISTANCE_MATRIX_API_KEY = "fake-key"
+        mock_http.get.side_effect = lambda url, params, **kw: _matrix_response(
+            params["origins"].split("|"), params["destinations"].split("|"), minutes=7)
+        legs = [("A", "B"), ("B", "C"), ("C", "D")]
+
+        assert get_travel_times(legs) == {leg: 7 for leg in legs}
+
+        assert sorted(_requested_elements(mock_http)) == legs
+
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.travel_time.settings")
+    def test_origins_sharing_destinations_share_a_request(self, mock_settings, mock_http):
+        mock_settings.DISTANCE_MATRIX_API_KEY = "fake-key"
+        mock_http.get.side_effect = lambda url, params, **kw: _matrix_response(
+            params["origins"].split("|"), params["destinations"].split("|"))
+
+        get_travel_times([("A", "Z"), ("B", "Z")])
+
+        assert mock_http.get.call_count == 1
+        assert mock_http.get.call_args[1]["params"]["origins"] == "A|B"
+
+    @patch("trip_planner.services.travel_time.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.travel_time.settings")
+    def test_same_location_needs_no_lookup(self, mock_settings, mock_http):
+        mock_settings.DISTANCE_MATRIX_API_KEY = "fake-key"
+
+        assert get_travel_times([("A", "A")]) == {("A", "A"): 0}
+        mock_http.get.assert_not_called()
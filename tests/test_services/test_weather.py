@@ -2,19 +2,40 @@
 Tests for the weather service (OpenWeather API wrapper).
 """
 import pytest
-from datetime import date, timedelta
-from unittest.mock import patch, MagicMock
+from datetime import date, datetime, time, timedelta, timezone
+from unittest.mock import patch, MagicMock, AsyncMock
 
-from trip_planner.services.weather import get_weather
+from trip_planner.services.weather import get_weather, _aggregate_days
 
 
 pytestmark = pytest.mark.django_db
 
 
+PARIS = {"name": "Paris", "lat": 48.8566, "lon": 2.3522, "country": "FR", "timezone": ""}
+
+
 def _future(days=30):
     return date.today() + timedelta(days=days)
 
 
+def _forecast_for(days: list) -> dict:
+    """Raw OpenWeather forecast with two entries per day."""
+    entries = []
+    for day in days:
+        for hour, temp in ((9, 14.0), (15, 21.0)):
+            ts = datetime.combine(day, time(hour), tzinfo=timezone.utc).timestamp()
+            entries.append({"dt": int(ts), "main": {"temp": temp}, "pop": 0.3,
+                            "weather": [{"description": "light rain"}]})
+    return {"list": entries}
+
+
+def _response(payload):
+    resp = MagicMock()
+    resp.raise_for_status.return_value = None
+    resp.json.return_value = payload
+    return resp
+
+
 class TestWeatherServiceStub:
     """When no API key is set, the service should return stub data."""
 
@@ -22,7 +43,6 @@ class TestWeatherServiceStub:
     @patch("trip_planner.services.weather.cache_client")
     def test_stub_returned_when_no_api_key(self, mock_cache, mock_settings):
         mock_settings.OPENWEATHER_API_KEY = ""
-        mock_cache.get_weather.return_value = None
 
         result = get_weather("Unknown Island", _future(30), _future(32))
 
@@ -34,7 +54,6 @@ class TestWeatherServiceStub:
     @patch("trip_planner.services.weather.cache_client")
     def test_stub_contains_correct_date_count(self, mock_cache, mock_settings):
         mock_settings.OPENWEATHER_API_KEY = ""
-        mock_cache.get_weather.return_value = None
 
         start = _future(30)
         end = _future(32)
@@ -47,25 +66,97 @@ class TestWeatherServiceStub:
 class TestWeatherServiceCache:
     """Cached weather data should be returned without hitting the API."""
 
+    @patch("trip_planner.services.weather.ageocode")
+    @patch("trip_planner.services.weather.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.weather.settings")
     @patch("trip_planner.services.weather.cache_client")
-    def test_cached_data_returned(self, mock_cache):
-        cached = {"daily": [{"date": "2026-04-01", "temp_high": 22}], "forecast_source": "cached"}
-        mock_cache.get_weather.return_value = cached
+    def test_cached_days_returned(self, mock_cache, mock_settings, mock_http, mock_geocode):
+        mock_settings.OPENWEATHER_API_KEY = "fake-key"
+        mock_geocode.return_value = PARIS
+        start, end = _future(30), _future(31)
+        cached = {d.isoformat(): {"date": d.isoformat(), "high_c": 22} for d in (start, end)}
+        mock_cache.get_weather_days.return_value = cached
 
-        result = get_weather("Paris", _future(30), _future(32))
-        assert result == cached
+        result = get_weather("Paris", start, end)
+        assert result["daily"] == [cached[start.isoformat()], cached[end.isoformat()]]
+        mock_http.get.assert_not_called()
+        mock_cache.get_forecast.assert_not_called()
+
+    @patch("trip_planner.services.weather.ageocode")
+    @patch("trip_planner.services.weather.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.weather.settings")
+    def test_overlapping_ranges_share_one_forecast(self, mock_settings, mock_http, mock_geocode):
+        mock_settings.OPENWEATHER_API_KEY = "fake-key"
+        mock_settings.CACHE_TTL_WEATHER = 3600
+        mock_settings.CACHE_TTL_ERROR = 60
+        today = date.today()
+        days = [today + timedelta(days=i) for i in range(5)]
+        mock_geocode.return_value = PARIS
+        mock_http.get.return_value = _response(_forecast_for(days))
+
+        first = get_weather("Paris", days[0], days[4])
+        second = get_weather("Paris, France", days[1], days[3])
+
+        assert mock_http.get.call_count == 1
+        assert [d["date"] for d in second["daily"]] == [d.isoformat() for d in days[1:4]]
+        assert second["daily"] == first["daily"][1:4]
+
+    @patch("trip_planner.services.weather.ageocode")
+    @patch("trip_planner.services.weather.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.weather.settings")
+    def test_days_outside_forecast_use_cached_raw_forecast(self, mock_settings, mock_http, mock_geocode):
+        mock_settings.OPENWEATHER_API_KEY = "fake-key"
+        mock_settings.CACHE_TTL_WEATHER = 3600
+        mock_settings.CACHE_TTL_ERROR = 60
+        today = date.today()
+        mock_geocode.return_value = {"lat": 38.72, "lon": -9.14}
+        mock_http.get.return_value = _response(_forecast_for([today]))
+
+        get_weather("Lisbon", today, today)
+        result = get_weather("Lisbon", today, today + timedelta(days=10))
+
+        assert mock_http.get.call_count == 1
+        assert result["daily"][-1]["summary"] == "Seasonal average"
+
+
+    @patch("trip_planner.services.weather.async_http_client", new_callable=AsyncMock)
+    @patch("trip_planner.services.weather.settings")
+    def test_forecast_offset_fills_missing_timezone(self, mock_settings, mock_http):
+        from trip_planner.services.geocoding import lookup, remember
+        mock_settings.OPENWEATHER_API_KEY = "fake-key"
+        mock_settings.CACHE_TTL_WEATHER = 3600
+        mock_settings.CACHE_TTL_ERROR = 60
+        today = date.today()
+        remember("Lisbon", 38.72, -9.14, country="PT")
+        mock_http.get.return_value = _response({**_forecast_for([today]), "city": {"timezone": 3600}})
+
+        get_weather("Lisbon", today, today)
+
+        assert lookup("Lisbon")["timezone"] == "UTC+01:00"
+
+
+class TestAggregateDays:
+    def test_daily_high_low_and_precip(self):
+        day = date(2026, 4, 1)
+        aggregated = _aggregate_days(_forecast_for([day]))
+        assert aggregated["2026-04-01"]["high_c"] == 21.0
+        assert aggregated["2026-04-01"]["low_c"] == 14.0
+        assert aggregated["2026-04-01"]["summary"] == "Light Rain"
 
 
 class TestWeatherServiceAPI:
     """Test API call path with mocked requests."""
 
-    @patch("trip_planner.services.weather.requests")
+    @patch("trip_planner.services.weather.ageocode")
+    @patch("trip_planner.services.weather.async_http_client", new_callable=AsyncMock)
     @patch("trip_planner.services.weather.settings")
     @patch("trip_planner.services.weather.cache_client")
-    def test_api_error_falls_back_to_stub(self, mock_cache, mock_settings, mock_requests):
+    def test_api_error_falls_back_to_stub(self, mock_cache, mock_settings, mock_http, mock_geocode):
         mock_settings.OPENWEATHER_API_KEY = "fake-key"
-        mock_cache.get_weather.return_value = None
-        mock_requests.get.side_effect = Exception("Network error")
+        mock_geocode.return_value = PARIS
+        mock_cache.get_weather_days.return_value = {}
+        mock_cache.get_forecast.return_value = None
+        mock_http.get.side_effect = Exception("Network error")
 
         result = get_weather("Paris", _future(30), _future(32))
 
@@ -73,17 +164,16 @@ class TestWeatherServiceAPI:
         assert "daily" in result
         assert isinstance(result["daily"], list)
 
-    @patch("trip_planner.services.weather.requests")
+    @patch("trip_planner.services.weather.ageocode")
+    @patch("trip_planner.services.weather.async_http_client", new_callable=AsyncMock)
     @patch("trip_planner.services.weather.settings")
     @patch("trip_planner.services.weather.cache_client")
-    def test_unknown_location_returns_stub(self, mock_cache, mock_settings, mock_requests):
+    def test_unknown_location_returns_stub(self, mock_cache, mock_settings, mock_http, mock_geocode):
         mock_settings.OPENWEATHER_API_KEY = "fake-key"
-        mock_cache.get_weather.return_value = None
-        # Simulate geocode returning empty results
-        geo_resp = MagicMock()
-        geo_resp.raise_for_status.return_value = None
-        geo_resp.json.return_value = []
-        mock_requests.get.return_value = geo_resp
+        # Simulate geocoding finding nothing
+        mock_geocode.return_value = None
 
         result = get_weather("Xyzzyville Nowhere", _future(30), _future(32))
         assert "daily" in result
+        assert result["forecast_source"] == "stub"
+        mock_http.get.assert_not_called()
@@ -2,7 +2,7 @@
 Django Admin configuration.
 """
 from django.contrib import admin
-from .models import Itinerary, AgentTrace, ExternalCache
+from .models import Itinerary, AgentTrace, ExternalCache, CacheNamespace, GeocodeEntry
 
 
 @admin.register(Itinerary)
@@ -11,6 +11,14 @@ class ItineraryAdmin(admin.ModelAdmin):
     list_filter = ["status", "created_at"]
     search_fields = ["id"]
     readonly_fields = ["id", "created_at", "updated_at"]
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # The changelist never shows the result; the change form reloads it
+        if request.resolver_match and request.resolver_match.url_name.endswith("changelist"):
+            queryset = queryset.defer("result_json", "result_bytes", "ics_text")
+        return queryset
 
 
 @admin.register(AgentTrace)
@@ -22,10 +30,23 @@ class AgentTraceAdmin(admin.ModelAdmin):
 
 @admin.register(ExternalCache)
 class ExternalCacheAdmin(admin.ModelAdmin):
-    list_display = ["cache_key", "source", "expires_at", "is_expired"]
+    list_display = ["cache_key", "source", "generation", "expires_at", "is_expired"]
     list_filter = ["source"]
     search_fields = ["cache_key"]
     
     def is_expired(self, obj):
         return obj.is_expired
     is_expired.boolean = True
+
+
+@admin.register(CacheNamespace)
+class CacheNamespaceAdmin(admin.ModelAdmin):
+    list_display = ["source", "version", "updated_at"]
+    readonly_fields = ["updated_at"]
+
+
+@admin.register(GeocodeEntry)
+class GeocodeEntryAdmin(admin.ModelAdmin):
+    list_display = ["name", "lat", "lon", "country", "timezone", "source"]
+    list_filter = ["source", "country"]
+    search_fields = ["name", "normalized_name"]
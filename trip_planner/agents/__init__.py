@@ -10,9 +10,10 @@ from .scheduler import SchedulerAgent
 from .food import FoodAgent
 from .budget import BudgetAgent
 from .validator import ValidatorAgent
+from .alternatives import AlternativesAgent
 
 __all__ = [
     "BaseAgent", "AgentResult",
     "PlannerAgent", "ResearchAgent", "WeatherAgent", "AttractionsAgent",
-    "SchedulerAgent", "FoodAgent", "BudgetAgent", "ValidatorAgent",
+    "SchedulerAgent", "FoodAgent", "BudgetAgent", "ValidatorAgent", "AlternativesAgent",
 ]
@@ -0,0 +1,169 @@
+"""
+Alternatives Agent - Precomputes ranked swap candidates for activity slots.
+"""
+import logging
+from .base import BaseAgent, AgentResult
+from trip_planner.services.gemini import generate_validated
+
+logger = logging.getLogger(__name__)
+
+ALTERNATIVES_PER_SLOT = 3
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "slots": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "slot": {"type": "string", "description": "Slot id as given, e.g. '0:2'"},
+                    "alternatives": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "name": {"type": "string", "description": "Exact candidate name"},
+                                "reason": {"type": "string"}
+                            },
+                            "required": ["name"]
+                        }
+                    }
+                },
+                "required": ["slot", "alternatives"]
+            }
+        }
+    }
+}
+
+
+def slot_id(day_index: int, block_index: int) -> str:
+    return f"{day_index}:{block_index}"
+
+
+def _words(text) -> set:
+    return {word for word in str(text or "").lower().replace(",", " ").split() if len(word) > 3}
+
+
+class AlternativesAgent(BaseAgent):
+    """
+    Ranks unscheduled attractions as alternatives for each activity block.
+    Candidates come only from the attractions already fetched; the model
+    (one call for all slots) just orders them, so the local ranking is the
+    fallback and fills any gaps.
+    """
+    name = "alternatives"
+
+    def run(self, trip: dict, scheduler_output: dict, attractions_output: dict) -> AgentResult:
+        slots = self._activity_slots(scheduler_output)
+        pool = self._candidates(attractions_output, scheduler_output)
+        if not slots or not pool:
+            return AgentResult(data={"alternatives": {}})
+
+        ranked = {sid: self._rank_locally(block, pool) for sid, block in slots.items()}
+        if not self.has_ai:
+            return self._stub_result({"alternatives": self._build(ranked, {})})
+
+        system = """Pick the best alternatives for each scheduled activity slot.
+        Only use candidate names exactly as listed. Prefer alternatives that suit the same time of day
+        and a similar mood, and explain each choice in one short sentence.
+        """
+        slot_lines = "\n".join(
+            f"- {sid}: {block.get('start_time')}-{block.get('end_time')} {block.get('title')} ({block.get('location', '')})"
+            for sid, block in slots.items()
+        )
+        candidate_lines = "\n".join(f"- {c['name']}: {c.get('description') or ''}" for c in pool)
+        user = (
+            f"Destination: {trip.get('destination', '')}\n"
+            f"Interests: {trip.get('activity_preferences', {}).get('interests', [])}\n"
+            f"Up to {ALTERNATIVES_PER_SLOT} alternatives per slot.\n"
+            f"Slots:\n{slot_lines}\n"
+            f"Candidates:\n{candidate_lines}\n"
+        )
+
+        try:
+            data, drafts, issues = generate_validated(self.gemini_client, system, user, SCHEMA)
+        except Exception as e:
+            logger.error(f"AlternativesAgent failed: {e}")
+            return self._stub_result({"alternatives": self._build(ranked, {})}, issue=str(e))
+
+        by_name = {c["name"].lower(): c for c in pool}
+        reasons = {}
+        for entry in data.get("slots", []) if isinstance(data, dict) else []:
+            sid = str(entry.get("slot", ""))
+            if sid not in ranked:
+                continue
+            picked = []
+            for alt in entry.get("alternatives", []):
+                candidate = by_name.get(str(alt.get("name", "")).lower())
+                if candidate and candidate not in picked:
+                    picked.append(candidate)
+                    reasons[(sid, candidate["name"])] = alt.get("reason")
+            # Model picks first, then the local ranking
+            ranked[sid] = (picked + [c for c in ranked[sid] if c not in picked])[:ALTERNATIVES_PER_SLOT]
+
+        return AgentResult(data={"alternatives": self._build(ranked, reasons)}, drafts=drafts, issues=issues)
+
+    @staticmethod
+    def _activity_slots(scheduler_output: dict) -> dict:
+        return {
+            slot_id(d, b): block
+            for d, day in enumerate(scheduler_output.get("days", []))
+            for b, block in enumerate(day.get("schedule", []))
+            if block.get("block_type", "activity") == "activity"
+        }
+
+    @staticmethod
+    def _candidates(attractions_output: dict, scheduler_output: dict) -> list:
+        """Attractions not already in the schedule, best first."""
+        scheduled = " ".join(
+            f"{block.get('title', '')} {block.get('location', '')}".lower()
+            for day in scheduler_output.get("days", [])
+            for block in day.get("schedule", [])
+        )
+        pool, seen = [], set()
+        for attraction in attractions_output.get("attractions", []):
+            name = (attraction.get("name") or "").strip()
+            if not name or name.lower() in seen or name.lower() in scheduled:
+                continue
+            seen.add(name.lower())
+            score = attraction.get("score")
+            if score is None:
+                score = (attraction.get("rating") or 0) / 5
+            pool.append({
+                "name": name,
+                "description": attraction.get("description") or attraction.get("reason") or "",
+                "location": attraction.get("address") or name,
+                "website": attraction.get("website") or attraction.get("maps_url"),
+                "categories": attraction.get("categories") or attraction.get("types") or [],
+                "score": float(score),
+            })
+        return sorted(pool, key=lambda c: -c["score"])
+
+    @staticmethod
+    def _rank_locally(block: dict, pool: list) -> list:
+        """Candidates sharing words with the block first, then by score."""
+        words = _words(block.get("title")) | _words(block.get("description"))
+
+        def key(candidate):
+            overlap = len(words & (_words(candidate["description"]) | _words(" ".join(candidate["categories"]))))
+            return (-overlap, -candidate["score"])
+
+        return sorted(pool, key=key)[:ALTERNATIVES_PER_SLOT]
+
+    @staticmethod
+    def _build(ranked: dict, reasons: dict) -> dict:
+        return {
+            sid: [
+                {
+                    "title": c["name"],
+                    "location": c["location"],
+                    "description": c["description"] or c["name"],
+                    "block_type": "activity",
+                    "website": c["website"],
+                    "reason": reasons.get((sid, c["name"])),
+                }
+                for c in candidates
+            ]
+            for sid, candidates in ranked.items()
+        }
@@ -4,15 +4,20 @@ Validator Agent - Validates schedule consistency.
 import logging
 from datetime import time
 from .base import BaseAgent, AgentResult
+from trip_planner.services.travel_estimate import estimate_travel_matrix
+from trip_planner.services.travel_time import get_travel_times
 
 logger = logging.getLogger(__name__)
 
+# Gaps at least this many times the offline estimate are not checked against real travel times
+TRAVEL_PREFILTER_MARGIN = 2.0
+
 
 class ValidatorAgent(BaseAgent):
     """Rule-based schedule validation (no AI needed)."""
     name = "validator"
     
-    def run(self, trip: dict, scheduler_output: dict) -> AgentResult:
+    def run(self, trip: dict, scheduler_output: dict, check_travel: bool = False) -> AgentResult:
         validations = []
         warnings = []
         
@@ -60,6 +65,9 @@ class ValidatorAgent(BaseAgent):
                     })
                 
                 last_end = end
+            
+            if check_travel:
+                validations.extend(self._check_travel(day))
         
         if not validations:
             validations.append({
@@ -72,3 +80,55 @@ class ValidatorAgent(BaseAgent):
                 warnings.append(f"Found {len(failures)} timing issues.")
         
         return AgentResult(data={"validation": validations, "warnings": warnings}, drafts=[], issues=[])
+    
+    def _check_travel(self, day: dict) -> list:
+        """Warn where the gap between consecutive blocks is shorter than the trip between them."""
+        blocks = [b for b in day.get("schedule", []) if b.get("location")]
+        gaps = []
+        for prev, block in zip(blocks, blocks[1:]):
+            try:
+                prev_end = time.fromisoformat(prev["end_time"]) if isinstance(prev["end_time"], str) else prev["end_time"]
+                start = time.fromisoformat(block["start_time"]) if isinstance(block["start_time"], str) else block["start_time"]
+            except (KeyError, TypeError, ValueError):
+                gaps.append(None)
+                continue
+            gaps.append((start.hour * 60 + start.minute) - (prev_end.hour * 60 + prev_end.minute))
+        if not any(gap is not None for gap in gaps):
+            return []
+        
+        locations = [b["location"] for b in blocks]
+        
+        # Pre-filter offline: only ask for real times if some gap is close to the estimate
+        # (pairs without coordinates estimate to NaN and are always checked)
+        try:
+            estimates = estimate_travel_matrix(locations)
+            suspect = [
+                gap is not None and not (estimates[i, i + 1] * TRAVEL_PREFILTER_MARGIN <= gap)
+                for i, gap in enumerate(gaps)
+            ]
+        except Exception as e:
+            logger.warning(f"Travel time estimate failed: {e}")
+            suspect = [gap is not None for gap in gaps]
+        if not any(suspect):
+            return []
+        
+        # Only the consecutive legs still in doubt are looked up
+        legs = [(locations[i], locations[i + 1]) for i, flag in enumerate(suspect) if flag]
+        try:
+            minutes = get_travel_times(legs)
+        except Exception as e:
+            logger.warning(f"Travel time check skipped: {e}")
+            return []
+        
+        checks = []
+        for i, gap in enumerate(gaps):
+            if not suspect[i]:
+                continue
+            needed = minutes[(locations[i], locations[i + 1])]
+            if gap < needed:
+                checks.append({
+                    "check": "travel_time", "status": "warn",
+                    "details": f"{day.get('date')}: {gap} min before '{blocks[i + 1].get('title', 'Untitled')}' "
+                               f"but travel takes ~{needed} min."
+                })
+        return checks
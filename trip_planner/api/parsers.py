@@ -0,0 +1,14 @@
+"""
+Request parsers for partial itinerary updates.
+"""
+from rest_framework.parsers import JSONParser
+
+
+class MergePatchParser(JSONParser):
+    """RFC 7396 JSON Merge Patch bodies."""
+    media_type = "application/merge-patch+json"
+
+
+class JSONPatchParser(JSONParser):
+    """RFC 6902 JSON Patch bodies."""
+    media_type = "application/json-patch+json"
@@ -0,0 +1,159 @@
+"""
+Lightweight reads for the itinerary API.
+
+`?fields=status,result.days` selects top-level fields and individual keys of
+the result. On PostgreSQL result keys and single days are extracted in SQL,
+so the rest of result_json never leaves the database; on other backends the
+columns that were not asked for are deferred and the result is sliced after
+loading. Listing returns keyset-paginated summaries read straight from the
+indexed columns and a few request keys.
+"""
+import base64
+import binascii
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from django.db import connection
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+
+from trip_planner.models import Itinerary
+
+# API field → model column
+FIELD_COLUMNS = {
+    "id": "id",
+    "status": "status",
+    "request": "request_json",
+    "result": "result_json",
+    "error_message": "error_message",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+
+_HAS_RESULT = ExpressionWrapper(Q(result_json__isnull=False), output_field=BooleanField())
+
+
+def supports_json_pushdown() -> bool:
+    """True if JSON keys can be extracted and updated in SQL."""
+    return connection.vendor == "postgresql"
+
+
+def parse_fields(raw: Optional[str]) -> Optional[dict]:
+    """
+    {field: None | [result keys]} from a ?fields= value; None selects everything.
+    Raises ValueError naming the first unknown field.
+    """
+    if not raw:
+        return None
+    selected = {}
+    for item in (part.strip() for part in raw.split(",")):
+        if not item:
+            continue
+        name, _, key = item.partition(".")
+        if name not in FIELD_COLUMNS or (key and name != "result"):
+            raise ValueError(item)
+        if not key:
+            selected[name] = None
+        elif name not in selected or selected[name] is not None:
+            selected.setdefault(name, []).append(key)
+    return selected or None
+
+
+def get_projected(itinerary_id, fields: dict) -> Optional[Itinerary]:
+    """
+    The itinerary with only the selected columns loaded, or None if it does not
+    exist. With result keys selected, `result_json` holds just those keys.
+    """
+    keys = fields.get("result")
+    queryset = Itinerary.objects.filter(id=itinerary_id)
+    columns = [FIELD_COLUMNS[name] for name in fields if not (name == "result" and keys)]
+
+    if keys and supports_json_pushdown():
+        extracted = {f"_result_{i}": KeyTransform(key, "result_json") for i, key in enumerate(keys)}
+        itinerary = queryset.only(*columns).annotate(_has_result=_HAS_RESULT, **extracted).first()
+        if itinerary is not None:
+            itinerary.result_json = (
+                {key: getattr(itinerary, f"_result_{i}") for i, key in enumerate(keys)}
+                if itinerary._has_result else None
+            )
+        return itinerary
+
+    if keys:
+        columns.append("result_json")
+    itinerary = queryset.only(*columns).first()
+    if itinerary is not None and keys and itinerary.result_json is not None:
+        itinerary.result_json = {key: itinerary.result_json.get(key) for key in keys}
+    return itinerary
+
+
+def get_day(itinerary_id, day: int) -> tuple:
+    """
+    (exists, has_result, day entry or None) for a 1-based day number, reading
+    only that element of result.days where the database can extract it.
+    """
+    queryset = Itinerary.objects.filter(id=itinerary_id)
+    if supports_json_pushdown():
+        row = queryset.annotate(
+            _has_result=_HAS_RESULT,
+            _day=KeyTransform(str(day - 1), KeyTransform("days", "result_json")),
+        ).values("_has_result", "_day").first()
+        if row is None:
+            return False, False, None
+        return True, row["_has_result"], row["_day"] if day >= 1 else None
+
+    row = queryset.values("result_json").first()
+    if row is None:
+        return False, False, None
+    result = row["result_json"]
+    days = (result or {}).get("days") or []
+    return True, result is not None, days[day - 1] if 1 <= day <= len(days) else None
+
+
+def encode_cursor(created_at: datetime, itinerary_id) -> str:
+    raw = f"{created_at.isoformat()}|{itinerary_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(created_at, id) from a cursor; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, itinerary_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(itinerary_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def list_summaries(status: Optional[str] = None, destination: Optional[str] = None,
+                   after: Optional[str] = None, limit: int = 20) -> tuple:
+    """
+    (summaries, next cursor or None), newest first.
+
+    Pages are keyset-paginated on (created_at, id), so each one is an index
+    range scan regardless of depth; neither JSON column is loaded.
+    """
+    queryset = Itinerary.objects.all()
+    if status:
+        queryset = queryset.filter(status=status)
+    if destination:
+        queryset = queryset.filter(request_json__destination__icontains=destination)
+    if after:
+        created_at, itinerary_id = decode_cursor(after)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=itinerary_id)
+        )
+
+    rows = list(
+        queryset.order_by("-created_at", "-id").values(
+            "id", "status", "created_at",
+            destination=KeyTextTransform("destination", "request_json"),
+            start_date=KeyTextTransform("start_date", "request_json"),
+            end_date=KeyTextTransform("end_date", "request_json"),
+        )[:limit + 1]
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
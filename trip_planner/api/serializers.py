@@ -3,7 +3,7 @@ API Serializers for request/response handling.
 """
 from rest_framework import serializers
 from datetime import date, time
-from trip_planner.models import Itinerary
+from trip_planner.models import Itinerary, ItineraryStatus
 
 
 # === Request Serializers ===
@@ -69,6 +69,28 @@ class ItinerarySerializer(serializers.ModelSerializer):
         model = Itinerary
         fields = ["id", "status", "request", "result", "error_message", "created_at", "updated_at"]
         read_only_fields = ["id", "created_at", "updated_at"]
+    
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ItinerarySummarySerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    destination = serializers.CharField(allow_null=True)
+    status = serializers.CharField()
+    start_date = serializers.CharField(allow_null=True)
+    end_date = serializers.CharField(allow_null=True)
+    created_at = serializers.DateTimeField()
+
+
+class ItineraryListSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=ItineraryStatus.choices, required=False)
+    destination = serializers.CharField(max_length=500, required=False)
+    after = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
 
 
 # === Other Serializers ===
@@ -91,6 +113,53 @@ class EditBlockRequestSerializer(serializers.Serializer):
     instruction = serializers.CharField(max_length=1000)
     current_block = ScheduleBlockSerializer()
     destination = serializers.CharField(max_length=500)
+    # The whole day, so local edits can move the blocks after this one
+    day_blocks = ScheduleBlockSerializer(many=True, required=False)
+    daily_start_time = serializers.TimeField(required=False)
+    daily_end_time = serializers.TimeField(required=False)
+    
+    def validate(self, data):
+        if "day_blocks" in data and data["block_index"] >= len(data["day_blocks"]):
+            raise serializers.ValidationError({"block_index": "Not a block of day_blocks"})
+        return data
+
+
+class BlockEditSerializer(serializers.Serializer):
+    day_index = serializers.IntegerField(min_value=0)
+    block_index = serializers.IntegerField(min_value=0)
+    instruction = serializers.CharField(max_length=1000, required=False)
+    current_block = ScheduleBlockSerializer()
+
+
+class EditBlocksRequestSerializer(serializers.Serializer):
+    """Either explicit `edits`, or `day_index` + `day_blocks` edited by one instruction."""
+    edits = BlockEditSerializer(many=True, required=False)
+    day_index = serializers.IntegerField(min_value=0, required=False)
+    day_blocks = ScheduleBlockSerializer(many=True, required=False)
+    instruction = serializers.CharField(max_length=1000, required=False)
+    destination = serializers.CharField(max_length=500)
+    
+    MAX_EDITS = 40
+    
+    def validate(self, data):
+        if "edits" in data:
+            edits = data["edits"]
+        elif "day_index" in data and "day_blocks" in data:
+            edits = [
+                {"day_index": data["day_index"], "block_index": i, "current_block": block}
+                for i, block in enumerate(data["day_blocks"])
+            ]
+        else:
+            raise serializers.ValidationError("Provide edits, or day_index with day_blocks")
+        
+        if not edits:
+            raise serializers.ValidationError({"edits": "Nothing to edit"})
+        if len(edits) > self.MAX_EDITS:
+            raise serializers.ValidationError({"edits": f"At most {self.MAX_EDITS} blocks per request"})
+        if not data.get("instruction") and any(not edit.get("instruction") for edit in edits):
+            raise serializers.ValidationError({"instruction": "Each edit needs an instruction, or give one for all"})
+        data["edits"] = edits
+        return data
 
 
 class ImageAnalysisResponseSerializer(serializers.Serializer):
@@ -0,0 +1,157 @@
+"""
+Partial writes to itinerary results.
+
+Merge patches (RFC 7396) and JSON patches (RFC 6902) address the itinerary
+representation, and only its `result` member may change. They run on a row
+locked by `lock_itinerary`. On PostgreSQL a JSON patch that only replaces
+existing values is written with jsonb_set, so result_json is never read or
+rewritten as a whole. Every other patch is applied in Python and saved.
+Either way the stored JSON bytes and ICS text are cleared.
+"""
+import copy
+import json
+from typing import Optional
+
+from django.db.models import F, Func, JSONField, TextField, Value
+from django.utils import timezone
+
+from trip_planner.api.projection import supports_json_pushdown
+from trip_planner.core.exceptions import PatchError
+from trip_planner.core.jsonpatch import apply_patch, merge_patch, parse_pointer
+from trip_planner.models import Itinerary
+
+RESULT_POINTER = "/result"
+
+# Block content exchanged by a swap; timing, travel and buffer stay with the slot
+SWAP_FIELDS = (
+    "title", "location", "description", "block_type", "website", "reason",
+    "micro_activities", "is_unique", "is_limited_time",
+)
+
+
+def lock_itinerary(itinerary_id) -> Optional[Itinerary]:
+    """The row locked for update, with only the columns needed for the ETag loaded."""
+    return (
+        Itinerary.objects.select_for_update()
+        .only("id", "status", "updated_at")
+        .filter(id=itinerary_id)
+        .first()
+    )
+
+
+def _relative(pointer) -> str:
+    if not isinstance(pointer, str) or not (pointer == RESULT_POINTER or pointer.startswith(RESULT_POINTER + "/")):
+        raise PatchError(f"Only {RESULT_POINTER} can be patched, got {pointer!r}")
+    return pointer[len(RESULT_POINTER):]
+
+
+def _result_operations(operations) -> list:
+    """JSON patch operations rewritten relative to the result."""
+    if not isinstance(operations, list):
+        raise PatchError("A JSON Patch must be an array of operations")
+    rewritten = []
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise PatchError(f"Invalid operation: {operation!r}")
+        operation = dict(operation)
+        for key in ("path", "from"):
+            if key in operation:
+                operation[key] = _relative(operation[key])
+        rewritten.append(operation)
+    return rewritten
+
+
+def _text_array(tokens: list) -> Func:
+    quoted = ('"' + token.replace("\\", "\\\\").replace('"', '\\"') + '"' for token in tokens)
+    return Func(Value("{" + ",".join(quoted) + "}"), template="%(expressions)s::text[]",
+                output_field=TextField())
+
+
+def _jsonb(value) -> Func:
+    return Func(Value(json.dumps(value)), template="%(expressions)s::jsonb", output_field=JSONField())
+
+
+def _replace_in_place(itinerary: Itinerary, operations: list) -> bool:
+    """
+    Write replace-only patches with nested jsonb_set calls. Returns False
+    if the patch or backend does not allow it.
+    """
+    if not supports_json_pushdown() or not operations:
+        return False
+    if any(op.get("op") != "replace" or not op.get("path") or "value" not in op for op in operations):
+        return False
+
+    paths = [parse_pointer(op["path"]) for op in operations]
+    targets = {
+        f"_target_{i}": Func(F("result_json"), _text_array(tokens), arg_joiner=" #> ",
+                             template="(%(expressions)s)", output_field=JSONField())
+        for i, tokens in enumerate(paths)
+    }
+    queryset = Itinerary.objects.filter(id=itinerary.id)
+    present = queryset.annotate(**targets).filter(**{f"{name}__isnull": False for name in targets})
+    if not present.exists():
+        raise PatchError("Path not found for replace")
+
+    expression = F("result_json")
+    for tokens, operation in zip(paths, operations):
+        expression = Func(expression, _text_array(tokens), _jsonb(operation["value"]), Value(False),
+                          function="jsonb_set", output_field=JSONField())
+    itinerary.updated_at = timezone.now()
+    queryset.update(result_json=expression, result_bytes=None, ics_text=None, updated_at=itinerary.updated_at)
+    return True
+
+
+def save_result(itinerary: Itinerary, result) -> None:
+    """Store a new result; its rendered artifacts are rebuilt on the next read."""
+    itinerary.result_json = result
+    itinerary.result_bytes = itinerary.ics_text = None
+    itinerary.save(update_fields=["result_json", "result_bytes", "ics_text", "updated_at"])
+
+
+def json_patch_result(itinerary: Itinerary, operations) -> None:
+    """Apply an RFC 6902 patch whose paths are rooted at /result."""
+    operations = _result_operations(operations)
+    if _replace_in_place(itinerary, operations):
+        return
+    save_result(itinerary, apply_patch(itinerary.result_json, operations))
+
+
+def merge_patch_result(itinerary: Itinerary, patch) -> None:
+    """Apply an RFC 7396 merge patch to the itinerary representation."""
+    if not isinstance(patch, dict):
+        raise PatchError("A merge patch must be a JSON object")
+    read_only = set(patch) - {"result"}
+    if read_only:
+        raise PatchError(f"Read-only fields: {', '.join(sorted(read_only))}")
+    if "result" in patch:
+        save_result(itinerary, merge_patch(itinerary.result_json, patch["result"]))
+
+
+def swap_block(itinerary: Itinerary, day: int, block: int, choice: int) -> Optional[dict]:
+    """
+    Replace a block (1-based day and block) with one of its precomputed
+    alternatives and return it, or None if there is no such block. The
+    replaced content takes the alternative's place, so swapping the same
+    choice again undoes it.
+    """
+    result = copy.deepcopy(itinerary.result_json) if isinstance(itinerary.result_json, dict) else None
+    days = (result or {}).get("days") or []
+    schedule = (days[day - 1].get("schedule") or []) if 1 <= day <= len(days) else []
+    if not 1 <= block <= len(schedule):
+        return None
+
+    current = schedule[block - 1]
+    alternatives = list(current.get("alternatives") or [])
+    if not 0 <= choice < len(alternatives):
+        raise PatchError(f"Block has {len(alternatives)} alternatives, not #{choice}")
+
+    chosen = alternatives[choice]
+    alternatives[choice] = {key: current[key] for key in SWAP_FIELDS if key in current}
+    swapped = {key: value for key, value in current.items() if key not in SWAP_FIELDS}
+    swapped.update({key: value for key, value in chosen.items() if key in SWAP_FIELDS and value is not None})
+    swapped.setdefault("micro_activities", [])
+    swapped["alternatives"] = alternatives
+
+    schedule[block - 1] = swapped
+    save_result(itinerary, result)
+    return swapped
@@ -3,8 +3,9 @@ API URL configuration.
 """
 from django.urls import path
 from .views import (
-    ItineraryCreateView, ItineraryGenerateView, ItineraryDetailView, ItineraryICSView,
-    ImageAnalysisView, EditBlockView
+    ItineraryCreateView, ItineraryGenerateView, ItineraryDetailView, ItineraryDayView,
+    ItinerarySwapView, ItineraryICSView,
+    ImageAnalysisView, EditBlockView, EditBlocksView
 )
 from .views.places import PlacesAutocompleteView
 
@@ -13,6 +14,9 @@ urlpatterns = [
     path("itineraries/", ItineraryCreateView.as_view(), name="itinerary-create"),
     path("itineraries/generate", ItineraryGenerateView.as_view(), name="itinerary-generate"),
     path("itineraries/<uuid:itinerary_id>/", ItineraryDetailView.as_view(), name="itinerary-detail"),
+    path("itineraries/<uuid:itinerary_id>/days/<int:day>", ItineraryDayView.as_view(), name="itinerary-day"),
+    path("itineraries/<uuid:itinerary_id>/days/<int:day>/blocks/<int:block>/swap", ItinerarySwapView.as_view(),
+         name="itinerary-swap"),
     path("itineraries/<uuid:itinerary_id>/ics", ItineraryICSView.as_view(), name="itinerary-ics"),
     
     # Analysis
@@ -20,6 +24,7 @@ urlpatterns = [
     
     # Edit
     path("edit/block", EditBlockView.as_view(), name="edit-block"),
+    path("edit/blocks", EditBlocksView.as_view(), name="edit-blocks"),
     
     # Places
     path("places/autocomplete", PlacesAutocompleteView.as_view(), name="places-autocomplete"),
@@ -1,11 +1,15 @@
 """
 API Views.
 """
-from .itineraries import ItineraryCreateView, ItineraryGenerateView, ItineraryDetailView, ItineraryICSView
+from .itineraries import (
+    ItineraryCreateView, ItineraryGenerateView, ItineraryDetailView, ItineraryDayView,
+    ItinerarySwapView, ItineraryICSView
+)
 from .analysis import ImageAnalysisView
-from .edit import EditBlockView
+from .edit import EditBlockView, EditBlocksView
 
 __all__ = [
-    "ItineraryCreateView", "ItineraryGenerateView", "ItineraryDetailView", "ItineraryICSView",
-    "ImageAnalysisView", "EditBlockView"
+    "ItineraryCreateView", "ItineraryGenerateView", "ItineraryDetailView", "ItineraryDayView",
+    "ItinerarySwapView", "ItineraryICSView",
+    "ImageAnalysisView", "EditBlockView", "EditBlocksView"
 ]
@@ -9,6 +9,7 @@ from rest_framework.parsers import MultiPartParser, FormParser
 
 from trip_planner.services.gemini import gemini_client
 from trip_planner.api.serializers import ImageAnalysisResponseSerializer
+from trip_planner.core.idempotency import idempotent
 from trip_planner.core.utils import best_effort_json
 
 logger = logging.getLogger(__name__)
@@ -18,6 +19,7 @@ class ImageAnalysisView(APIView):
     """POST /api/analysis/image - Analyze travel image."""
     parser_classes = [MultiPartParser, FormParser]
     
+    @idempotent("analysis_image")
     def post(self, request):
         if "image" not in request.FILES:
             return Response({"error": "No image provided"}, status=status.HTTP_400_BAD_REQUEST)
@@ -6,28 +6,44 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from trip_planner.agents.validator import ValidatorAgent
+from trip_planner.services import schedule_edit
 from trip_planner.services.gemini import gemini_client
-from trip_planner.api.serializers import EditBlockRequestSerializer, ScheduleBlockSerializer
+from trip_planner.api.serializers import (
+    EditBlockRequestSerializer, EditBlocksRequestSerializer, ScheduleBlockSerializer
+)
+from trip_planner.core.idempotency import idempotent
 from trip_planner.core.utils import best_effort_json
 
 logger = logging.getLogger(__name__)
 
 
 class EditBlockView(APIView):
-    """POST /api/edit/block - Edit schedule block with AI."""
+    """
+    POST /api/edit/block - Edit schedule block.
     
+    Mechanical instructions ("move to 3pm", "30 minutes longer", "delete",
+    "swap with next") are applied locally; the rest go to Gemini.
+    """
+    
+    @idempotent("edit_block")
     def post(self, request):
         serializer = EditBlockRequestSerializer(data=request.data)
         if not serializer.is_valid():
             return Response({"error": "validation_error", "details": serializer.errors},
                           status=status.HTTP_400_BAD_REQUEST)
         
-        if not gemini_client.is_available:
-            return Response({"error": "AI not available"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-        
         data = serializer.validated_data
         block = data["current_block"]
         
+        local = self._edit_locally(data, request.data)
+        if local is not None:
+            return Response(local)
+        
+        if not gemini_client.is_available:
+            return Response({"error": "AI not available"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        schedule_edit.record("llm")
+        
         prompt = f"""
 Edit this schedule block based on the instruction.
 
@@ -51,10 +67,127 @@ Return updated block as JSON:
             
             block_serializer = ScheduleBlockSerializer(data=edited)
             if not block_serializer.is_valid():
-                return Response({"block": block, "warning": "AI response invalid"})
+                return Response({"block": block, "warning": "AI response invalid", "source": "llm"})
             
-            return Response({"block": block_serializer.validated_data, "original": block})
+            return Response({"block": block_serializer.validated_data, "original": block, "source": "llm"})
             
         except Exception as e:
             logger.exception(f"Edit failed: {e}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @staticmethod
+    def _edit_locally(data: dict, raw: dict):
+        """Response body for a mechanical instruction applied without the model, or None."""
+        current = _with_extras(raw.get("current_block"), data["current_block"])
+        day_blocks = [_with_extras(raw_block, block)
+                      for raw_block, block in zip(raw.get("day_blocks") or [], data.get("day_blocks") or [])]
+        index = data["block_index"] if day_blocks else 0
+        if day_blocks:
+            day_blocks[index] = current
+        else:
+            day_blocks = [current]
+        
+        edited = schedule_edit.edit_locally(data["instruction"], day_blocks, index)
+        if edited is None:
+            return None
+        schedule_edit.record("local")
+        
+        trip = {key: data[key] for key in ("daily_start_time", "daily_end_time") if key in data}
+        day = {"date": f"Day {data['day_index'] + 1}", "schedule": edited["blocks"]}
+        validation = ValidatorAgent().run(trip, {"days": [day]}).data["validation"]
+        
+        body = {
+            "block": edited["block"],
+            "original": current,
+            "deleted": edited["deleted"],
+            "source": "local",
+            "operation": edited["op"],
+            "validation": validation,
+        }
+        if data.get("day_blocks"):
+            body["day_blocks"] = edited["blocks"]
+        return body
+
+
+def _with_extras(raw, block: dict) -> dict:
+    """Validated block over the client's copy, keeping fields the serializer drops (e.g. alternatives)."""
+    return {**raw, **block} if isinstance(raw, dict) else dict(block)
+
+
+def _describe_block(block: dict) -> str:
+    return (
+        f"{block['start_time']:%H:%M} - {block['end_time']:%H:%M} | {block.get('title')} | "
+        f"{block.get('location')} | {block.get('block_type')} | {block.get('description')}"
+    )
+
+
+class EditBlocksView(APIView):
+    """POST /api/edit/blocks - Edit many schedule blocks with one AI call."""
+    
+    def post(self, request):
+        serializer = EditBlocksRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({"error": "validation_error", "details": serializer.errors},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        if not gemini_client.is_available:
+            return Response({"error": "AI not available"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        data = serializer.validated_data
+        edits = data["edits"]
+        
+        lines = []
+        for i, edit in enumerate(edits):
+            lines.append(f"[{i}] Day {edit['day_index'] + 1}, block {edit['block_index'] + 1}: "
+                         f"{_describe_block(edit['current_block'])}")
+            if edit.get("instruction"):
+                lines.append(f"    Instruction: {edit['instruction']}")
+        overall = f"Instruction for all blocks: {data['instruction']}\n" if data.get("instruction") else ""
+        blocks_text = "\n".join(lines)
+        
+        prompt = f"""
+Edit these schedule blocks based on the instructions. Keep blocks of the same day
+consistent with each other (no overlaps, times in order).
+
+Destination: {data['destination']}
+{overall}
+Blocks (time | title | location | type | description):
+{blocks_text}
+
+Return every block, in the same order and with its id, as JSON:
+{{"blocks": [{{"id": 0, "start_time": "HH:MM", "end_time": "HH:MM", "title": "", "location": "", "description": "", "block_type": "", "travel_time_mins": 0, "buffer_mins": 0, "micro_activities": []}}]}}
+"""
+        
+        schedule_edit.record("llm")
+        try:
+            raw = gemini_client.generate_content(prompt)
+        except Exception as e:
+            logger.exception(f"Batch edit failed: {e}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        # Malformed output keeps every original block with a warning
+        try:
+            parsed = best_effort_json(raw or "")
+        except ValueError:
+            logger.warning("Batch edit returned non-JSON output")
+            parsed = None
+        returned = parsed.get("blocks") if isinstance(parsed, dict) else parsed
+        if not isinstance(returned, list):
+            returned = []
+        returned = [block for block in returned if isinstance(block, dict)]
+        by_id = {block["id"]: block for block in returned if isinstance(block.get("id"), int)}
+        
+        results = []
+        for i, edit in enumerate(edits):
+            original = edit["current_block"]
+            edited = by_id.get(i, returned[i] if not by_id and i < len(returned) else None)
+            entry = {"day_index": edit["day_index"], "block_index": edit["block_index"], "original": original}
+            block_serializer = ScheduleBlockSerializer(data=edited) if edited is not None else None
+            if block_serializer is not None and block_serializer.is_valid():
+                entry["block"] = block_serializer.validated_data
+            else:
+                entry["block"] = original
+                entry["warning"] = "AI response invalid"
+            results.append(entry)
+        
+        return Response({"edits": results})
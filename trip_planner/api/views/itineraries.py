@@ -1,23 +1,101 @@
 """
 Itinerary API views.
 """
+import hashlib
 import logging
+import math
+from django.db import transaction
 from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.http import condition
 from rest_framework import status
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from trip_planner.models import Itinerary, ItineraryStatus
-from trip_planner.api.serializers import TripRequestSerializer, ItinerarySerializer
+from trip_planner.api.serializers import (
+    TripRequestSerializer, ItinerarySerializer, ItineraryListSerializer, ItinerarySummarySerializer
+)
+from trip_planner.api.parsers import JSONPatchParser, MergePatchParser
+from trip_planner.api.projection import get_day, get_projected, list_summaries, parse_fields
+from trip_planner.api.updates import (
+    json_patch_result, lock_itinerary, merge_patch_result, save_result, swap_block
+)
+from trip_planner.services.admission import admission
+from trip_planner.services.gemini import gemini_quota
 from trip_planner.services.orchestrator import generate_itinerary
+from trip_planner.core.idempotency import idempotent
 from trip_planner.core.utils import build_ics
-from trip_planner.core.exceptions import GeminiError, GeminiQuotaError
+from trip_planner.core.exceptions import GeminiError, GeminiQuotaError, PatchError
 
 logger = logging.getLogger(__name__)
 
+# Detail fields encoded per request; the result is served from stored bytes
+METADATA_FIELDS = ["id", "status", "request", "error_message", "created_at", "updated_at"]
+
+
+def _etag(itinerary_id, updated_at, itinerary_status: str, variant: str) -> str:
+    raw = f"{itinerary_id}:{updated_at.isoformat()}:{itinerary_status}:{variant}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _itinerary_etag(itinerary_id, variant: str):
+    """
+    Strong ETag from id, updated_at and status, read without loading the JSON
+    columns. `variant` keeps the JSON and ICS representations distinct.
+    """
+    row = Itinerary.objects.filter(id=itinerary_id).values("updated_at", "status").first()
+    if row is None:
+        return None
+    return _etag(itinerary_id, row["updated_at"], row["status"], variant)
+
+
+def _if_match(request, current_etag: str) -> bool:
+    """True if the request has no If-Match or it names the current representation."""
+    header = request.headers.get("If-Match")
+    if not header:
+        return True
+    etags = parse_etags(header)
+    return "*" in etags or quote_etag(current_etag) in etags
+
+
+class ConditionalGetMixin:
+    """Make GET responses (including 304s) revalidate on every poll."""
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ("GET", "HEAD") and response.status_code in (200, 304):
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
 
 class ItineraryCreateView(APIView):
-    """POST /api/itineraries/ - Queue async generation."""
+    """
+    GET /api/itineraries/ - List summaries (?status=&destination=&after=<cursor>&limit=).
+    POST /api/itineraries/ - Queue async generation.
+    """
+    
+    def get(self, request):
+        params = ItineraryListSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({"error": "validation_error", "details": params.errors},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            rows, next_cursor = list_summaries(**params.validated_data)
+        except ValueError as e:
+            return Response({"error": "invalid_cursor", "message": str(e)},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            "results": ItinerarySummarySerializer(rows, many=True).data,
+            "next": next_cursor,
+        })
     
     def post(self, request):
         serializer = TripRequestSerializer(data=request.data)
@@ -47,8 +125,15 @@ class ItineraryCreateView(APIView):
 
 
 class ItineraryGenerateView(APIView):
-    """POST /api/itineraries/generate - Synchronous generation."""
+    """
+    POST /api/itineraries/generate - Synchronous generation.
+    
+    When the admission controller expects the generation to miss its SLO
+    the request is shed: 429 (quota) or 503 (busy) with Retry-After, or,
+    with "Prefer: respond-async", queued and answered with 202.
+    """
     
+    @idempotent("generate")
     def post(self, request):
         serializer = TripRequestSerializer(data=request.data)
         if not serializer.is_valid():
@@ -57,6 +142,34 @@ class ItineraryGenerateView(APIView):
         
         trip_data = self._serialize_trip(serializer.validated_data)
         
+        with admission.generation() as ticket:
+            if not ticket.admitted:
+                return self._shed(request, trip_data, ticket)
+            return self._generate(trip_data)
+    
+    @staticmethod
+    def _shed(request, trip_data: dict, ticket):
+        if "respond-async" in request.headers.get("Prefer", ""):
+            itinerary = Itinerary.objects.create(status=ItineraryStatus.QUEUED, request_json=trip_data)
+            admission.record_queued()
+            response = Response(ItinerarySerializer(itinerary).data, status=status.HTTP_202_ACCEPTED)
+            response["Location"] = reverse("itinerary-detail", args=[itinerary.id])
+            response["Preference-Applied"] = "respond-async"
+            return response
+        
+        if ticket.reason == "quota":
+            body = {"error": "quota_exhausted", "code": "gemini_quota_saturated",
+                    "message": "The AI quota is saturated. Please try again later."}
+            status_code = status.HTTP_429_TOO_MANY_REQUESTS
+        else:
+            body = {"error": "overloaded", "code": "generation_capacity",
+                    "message": "Too many itineraries are being generated. Please try again shortly."}
+            status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        response = Response({**body, "retry_after": ticket.retry_after}, status=status_code)
+        response["Retry-After"] = str(ticket.retry_after)
+        return response
+    
+    def _generate(self, trip_data: dict):
         itinerary = Itinerary.objects.create(
             status=ItineraryStatus.PROCESSING,
             request_json=trip_data
@@ -65,14 +178,16 @@ class ItineraryGenerateView(APIView):
         try:
             result = generate_itinerary(trip_data, itinerary)
             itinerary.mark_completed(result)
-            return Response(result)
+            return HttpResponse(itinerary.result_bytes, content_type="application/json")
         except GeminiQuotaError as e:
             logger.error(f"Gemini Quota Exhausted: {e}")
             itinerary.mark_failed("Quota Exhausted")
-            return Response(
+            response = Response(
                 {"error": "quota_exhausted", "message": "The AI is currently overloaded (Quota Exhausted). Please try again in a few moments.", "code": "gemini_quota_exhausted"},
                 status=status.HTTP_429_TOO_MANY_REQUESTS
             )
+            response["Retry-After"] = str(max(1, math.ceil(gemini_quota.seconds_until(1))))
+            return response
         except GeminiError as e:
             logger.error(f"Gemini API error: {e}")
             itinerary.mark_failed(str(e))
@@ -98,43 +213,146 @@ class ItineraryGenerateView(APIView):
         return result
 
 
-class ItineraryDetailView(APIView):
-    """GET/PATCH /api/itineraries/<id>/"""
+def _detail_etag(request, itinerary_id):
+    return _itinerary_etag(itinerary_id, f"json:{request.GET.get('fields', '')}")
+
+
+class ItineraryDetailView(ConditionalGetMixin, APIView):
+    """GET/PATCH /api/itineraries/<id>/ (GET accepts ?fields=status,result.days,...)"""
+    
+    parser_classes = [JSONParser, MergePatchParser, JSONPatchParser]
     
+    @method_decorator(condition(etag_func=_detail_etag))
     def get(self, request, itinerary_id):
         try:
-            itinerary = Itinerary.objects.get(id=itinerary_id)
-        except Itinerary.DoesNotExist:
+            fields = parse_fields(request.GET.get("fields"))
+        except ValueError as e:
+            return Response({"error": "invalid_fields", "message": f"Unknown field: {e}"},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        if fields is not None:
+            itinerary = get_projected(itinerary_id, fields)
+            if itinerary is None:
+                return Response({"error": "not_found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(ItinerarySerializer(itinerary, fields=fields).data)
+        
+        itinerary = Itinerary.objects.defer("result_json", "ics_text").filter(id=itinerary_id).first()
+        if itinerary is None:
             return Response({"error": "not_found"}, status=status.HTTP_404_NOT_FOUND)
+        if itinerary.result_bytes is None and not itinerary.refresh_artifacts():
+            return Response(ItinerarySerializer(itinerary).data)
         
-        return Response(ItinerarySerializer(itinerary).data)
+        # Splice the stored result bytes into the encoded metadata
+        head = JSONRenderer().render(ItinerarySerializer(itinerary, fields=METADATA_FIELDS).data)
+        body = head[:-1] + b',"result":' + bytes(itinerary.result_bytes) + b"}"
+        return HttpResponse(body, content_type="application/json")
     
     def patch(self, request, itinerary_id):
-        try:
-            itinerary = Itinerary.objects.get(id=itinerary_id)
-        except Itinerary.DoesNotExist:
+        """
+        `application/json` with {"result": ...} replaces the result;
+        `application/merge-patch+json` and `application/json-patch+json` apply a
+        partial update and answer 204. All honour If-Match.
+        """
+        media_type = request.content_type.split(";")[0].strip().lower()
+        with transaction.atomic():
+            itinerary = lock_itinerary(itinerary_id)
+            if itinerary is None:
+                return Response({"error": "not_found"}, status=status.HTTP_404_NOT_FOUND)
+            
+            current = _etag(itinerary.id, itinerary.updated_at, itinerary.status, "json:")
+            if not _if_match(request, current):
+                return Response({"error": "precondition_failed",
+                               "message": "Itinerary changed since it was read"},
+                              status=status.HTTP_412_PRECONDITION_FAILED)
+            
+            try:
+                if media_type == JSONPatchParser.media_type:
+                    json_patch_result(itinerary, request.data)
+                elif media_type == MergePatchParser.media_type:
+                    merge_patch_result(itinerary, request.data)
+                else:
+                    if "result" in request.data:
+                        save_result(itinerary, request.data["result"])
+                    response = Response(ItinerarySerializer(itinerary).data)
+                    response["ETag"] = quote_etag(_etag(itinerary.id, itinerary.updated_at, itinerary.status, "json:"))
+                    return response
+            except PatchError as e:
+                return Response({"error": e.code, "message": e.message},
+                              status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        
+        response = Response(status=status.HTTP_204_NO_CONTENT)
+        response["ETag"] = quote_etag(_etag(itinerary.id, itinerary.updated_at, itinerary.status, "json:"))
+        return response
+
+
+class ItineraryDayView(ConditionalGetMixin, APIView):
+    """GET /api/itineraries/<id>/days/<n> - One day of the schedule (1-based)."""
+    
+    @method_decorator(condition(etag_func=lambda request, itinerary_id, day: _itinerary_etag(itinerary_id, f"day:{day}")))
+    def get(self, request, itinerary_id, day):
+        exists, has_result, entry = get_day(itinerary_id, day)
+        if not exists:
             return Response({"error": "not_found"}, status=status.HTTP_404_NOT_FOUND)
+        if not has_result:
+            return Response({"error": "no_result"}, status=status.HTTP_400_BAD_REQUEST)
+        if entry is None:
+            return Response({"error": "day_not_found"}, status=status.HTTP_404_NOT_FOUND)
         
-        if "result" in request.data:
-            itinerary.result_json = request.data["result"]
-            itinerary.save(update_fields=["result_json", "updated_at"])
+        return Response(entry)
+
+
+class ItinerarySwapView(APIView):
+    """
+    POST /api/itineraries/<id>/days/<n>/blocks/<m>/swap - Replace a block with
+    one of its precomputed alternatives ({"alternative": 0}); no model call.
+    """
+    
+    def post(self, request, itinerary_id, day, block):
+        choice = request.data.get("alternative", 0)
+        if not isinstance(choice, int) or isinstance(choice, bool):
+            return Response({"error": "validation_error", "details": {"alternative": "Must be an integer"}},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            itinerary = lock_itinerary(itinerary_id)
+            if itinerary is None:
+                return Response({"error": "not_found"}, status=status.HTTP_404_NOT_FOUND)
+            
+            current = _etag(itinerary.id, itinerary.updated_at, itinerary.status, "json:")
+            if not _if_match(request, current):
+                return Response({"error": "precondition_failed",
+                               "message": "Itinerary changed since it was read"},
+                              status=status.HTTP_412_PRECONDITION_FAILED)
+            
+            try:
+                swapped = swap_block(itinerary, day, block, choice)
+            except PatchError as e:
+                return Response({"error": e.code, "message": e.message},
+                              status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if swapped is None:
+                return Response({"error": "block_not_found"}, status=status.HTTP_404_NOT_FOUND)
         
-        return Response(ItinerarySerializer(itinerary).data)
+        response = Response({"block": swapped})
+        response["ETag"] = quote_etag(_etag(itinerary.id, itinerary.updated_at, itinerary.status, "json:"))
+        return response
 
 
-class ItineraryICSView(APIView):
+class ItineraryICSView(ConditionalGetMixin, APIView):
     """GET /api/itineraries/<id>/ics - Download ICS calendar."""
     
+    @method_decorator(condition(etag_func=lambda request, itinerary_id: _itinerary_etag(itinerary_id, "ics")))
     def get(self, request, itinerary_id):
         try:
-            itinerary = Itinerary.objects.get(id=itinerary_id)
+            itinerary = Itinerary.objects.only("request_json", "ics_text", "updated_at").get(id=itinerary_id)
         except Itinerary.DoesNotExist:
             return Response({"error": "not_found"}, status=status.HTTP_404_NOT_FOUND)
         
-        if not itinerary.result_json:
-            return Response({"error": "no_result"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        ics_content = build_ics(itinerary.result_json)
+        ics_content = itinerary.ics_text
+        if ics_content is None:
+            if not itinerary.result_json:
+                return Response({"error": "no_result"}, status=status.HTTP_400_BAD_REQUEST)
+            itinerary.refresh_artifacts()
+            ics_content = itinerary.ics_text if itinerary.ics_text is not None else build_ics(itinerary.result_json)
         dest = itinerary.request_json.get("destination", "trip").replace(" ", "_")
         
         response = HttpResponse(ics_content, content_type="text/calendar")
@@ -1,15 +1,16 @@
 """
 Places Autocomplete API proxy.
 """
-import requests
 from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
+from trip_planner.services.autocomplete import autocomplete
+
 
 class PlacesAutocompleteView(APIView):
-    """Proxy for Google Places Autocomplete API."""
+    """Proxy for Google Places Autocomplete API, served from the prefix index when possible."""
     
     def get(self, request):
         query = request.query_params.get('q', '')
@@ -28,28 +29,7 @@ class PlacesAutocompleteView(APIView):
             })
         
         try:
-            resp = requests.get(
-                'https://maps.googleapis.com/maps/api/place/autocomplete/json',
-                params={
-                    'input': query,
-                    'types': '(cities)',
-                    'key': api_key,
-                },
-                timeout=10
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            
-            predictions = [
-                {
-                    'description': p.get('description'),
-                    'place_id': p.get('place_id'),
-                }
-                for p in data.get('predictions', [])[:5]
-            ]
-            
-            return Response({'predictions': predictions})
-            
+            return Response({'predictions': autocomplete(query)})
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -0,0 +1,13 @@
+"""
+App configuration for Trip Planner.
+"""
+from django.apps import AppConfig
+
+
+class TripPlannerConfig(AppConfig):
+    name = "trip_planner"
+    default_auto_field = "django.db.models.BigAutoField"
+
+    def ready(self):
+        from trip_planner.core.sweeper import start_periodic_sweeper
+        start_periodic_sweeper()
@@ -1,11 +1,26 @@
 """
 Caching utilities with dual-layer support (Redis + Database).
+
+Values are stored in the compact binary form from ``core.codec`` in both
+layers; entries written as plain JSON before that are still readable.
+
+Keys carry a per-source namespace version ("places:v3:..."). Bumping a
+source's version invalidates all of its entries at once; the orphaned rows
+are removed later by the sweeper. In-process tiers built on top (geocoding
+index, currency table, autocomplete trie) compare ``current_version`` and
+drop their entries when it changes.
 """
 import logging
 import hashlib
+import threading
+import time
+from collections import defaultdict
 from typing import Any, Optional
 from django.conf import settings
 from django.core.cache import cache as django_cache
+from django.utils import timezone
+
+from .codec import encode_payload, decode_payload
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +28,11 @@ logger = logging.getLogger(__name__)
 class CacheClient:
     """Dual-layer cache client: Redis (optional) + Database fallback."""
     
+    _stats_lock = threading.Lock()
+    _encoding_stats = defaultdict(lambda: {"entries": 0, "raw_bytes": 0, "stored_bytes": 0})
+    _versions_lock = threading.Lock()
+    _local_versions = {}
+    
     @staticmethod
     def _make_key(prefix: str, *args) -> str:
         """Generate a cache key."""
@@ -23,6 +43,76 @@ class CacheClient:
             return f"{prefix}:{hash_suffix}"
         return raw_key
     
+    @staticmethod
+    def _version_key(source: str) -> str:
+        return f"cache_ns:{source}"
+    
+    @classmethod
+    def namespace_version(cls, source: str) -> int:
+        """Current version of a source namespace (shared cache first, then DB)."""
+        from trip_planner.models import CacheNamespace
+        
+        try:
+            version = django_cache.get(cls._version_key(source))
+            if version is not None:
+                return version
+        except Exception as e:
+            logger.warning(f"Django cache get failed: {e}")
+        
+        try:
+            version = CacheNamespace.current(source)
+        except Exception as e:
+            logger.warning(f"Namespace lookup failed for {source}: {e}")
+            return 1
+        try:
+            django_cache.set(cls._version_key(source), version, timeout=None)
+        except Exception:
+            pass
+        return version
+    
+    @classmethod
+    def current_version(cls, source: str) -> int:
+        """
+        namespace_version re-read at most every CACHE_NAMESPACE_POLL_SECONDS,
+        cheap enough for in-process tiers to check on every read. A bump in
+        another process is seen within that interval.
+        """
+        now = time.monotonic()
+        with cls._versions_lock:
+            known = cls._local_versions.get(source)
+        if known is not None and now - known[1] < settings.CACHE_NAMESPACE_POLL_SECONDS:
+            return known[0]
+        version = cls.namespace_version(source)
+        with cls._versions_lock:
+            cls._local_versions[source] = (version, now)
+        return version
+    
+    @classmethod
+    def forget_versions(cls) -> None:
+        """Drop the polled versions so the next read goes back to the shared cache."""
+        with cls._versions_lock:
+            cls._local_versions.clear()
+    
+    @classmethod
+    def bump_namespace(cls, source: str) -> int:
+        """Invalidate every entry of a source by moving it to a new version."""
+        from trip_planner.models import CacheNamespace
+        
+        version = CacheNamespace.bump(source)
+        with cls._versions_lock:
+            cls._local_versions[source] = (version, time.monotonic())
+        try:
+            django_cache.set(cls._version_key(source), version, timeout=None)
+        except Exception as e:
+            logger.warning(f"Namespace publish failed for {source}: {e}")
+        logger.info(f"Cache namespace {source} bumped to v{version}")
+        return version
+    
+    @classmethod
+    def _namespaced(cls, prefix: str, source: str) -> str:
+        """Key prefix including the source's namespace version (polled, no cache round-trip)."""
+        return f"{prefix}:v{cls.current_version(source)}"
+    
     @classmethod
     def get(cls, key: str, source: str = "general") -> Optional[Any]:
         """Get value from cache (Django cache first, then DB)."""
@@ -33,17 +123,18 @@ class CacheClient:
         try:
             value = django_cache.get(key)
             if value is not None:
-                return value
+                return decode_payload(value)
         except Exception as e:
             logger.warning(f"Django cache get failed: {e}")
         
         # Try database cache
         try:
-            value = ExternalCache.get_valid(key)
-            if value is not None:
+            stored = ExternalCache.get_valid(key)
+            if stored is not None:
+                value = decode_payload(stored)
                 # Populate Django cache
                 try:
-                    django_cache.set(key, value, timeout=3600)
+                    django_cache.set(key, stored, timeout=3600)
                 except Exception:
                     pass
                 return value
@@ -57,70 +148,261 @@ class CacheClient:
         """Set value in both caches."""
         from trip_planner.models import ExternalCache
         
+        try:
+            encoded, raw_size = encode_payload(value, settings.CACHE_COMPRESS_THRESHOLD)
+        except Exception as e:
+            logger.warning(f"Cache encode failed for {key}: {e}")
+            return False
+        cls._record_encoding(source, raw_size, len(encoded))
+        generation = cls.current_version(source)
+        
         success = True
         
         # Django cache
         try:
-            django_cache.set(key, value, timeout=ttl)
+            django_cache.set(key, encoded, timeout=ttl)
         except Exception as e:
             logger.warning(f"Django cache set failed: {e}")
             success = False
         
         # Database cache
         try:
-            payload = value if isinstance(value, dict) else {"value": value}
-            ExternalCache.set_cache(key, source, payload, ttl)
+            ExternalCache.set_cache(key, source, encoded, ttl, generation=generation)
         except Exception as e:
             logger.warning(f"DB cache set failed: {e}")
             success = False
         
         return success
     
+    @classmethod
+    def get_many(cls, keys: list, source: str = "general") -> dict:
+        """Get many values at once; returns only the keys that were found."""
+        from trip_planner.models import ExternalCache
+        
+        found = {}
+        try:
+            for key, value in django_cache.get_many(keys).items():
+                found[key] = decode_payload(value)
+        except Exception as e:
+            logger.warning(f"Django cache get_many failed: {e}")
+        
+        missing = [k for k in keys if k not in found]
+        if not missing:
+            return found
+        
+        try:
+            stored = ExternalCache.get_valid_many(missing)
+            for key, value in stored.items():
+                found[key] = decode_payload(value)
+            if stored:
+                try:
+                    django_cache.set_many(stored, timeout=3600)
+                except Exception:
+                    pass
+        except Exception as e:
+            logger.warning(f"DB cache get_many failed: {e}")
+        
+        return found
+    
+    @classmethod
+    def set_many(cls, values: dict, ttl: int, source: str = "general") -> bool:
+        """Set many values in both caches with one write per layer."""
+        from trip_planner.models import ExternalCache
+        
+        encoded = {}
+        for key, value in values.items():
+            try:
+                encoded[key], raw_size = encode_payload(value, settings.CACHE_COMPRESS_THRESHOLD)
+            except Exception as e:
+                logger.warning(f"Cache encode failed for {key}: {e}")
+                continue
+            cls._record_encoding(source, raw_size, len(encoded[key]))
+        if not encoded:
+            return False
+        
+        success = True
+        try:
+            django_cache.set_many(encoded, timeout=ttl)
+        except Exception as e:
+            logger.warning(f"Django cache set_many failed: {e}")
+            success = False
+        
+        try:
+            ExternalCache.set_cache_many(encoded, source, ttl, generation=cls.current_version(source))
+        except Exception as e:
+            logger.warning(f"DB cache set_many failed: {e}")
+            success = False
+        
+        return success
+    
+    @classmethod
+    def _record_encoding(cls, source: str, raw_size: int, stored_size: int) -> None:
+        with cls._stats_lock:
+            stats = cls._encoding_stats[source]
+            stats["entries"] += 1
+            stats["raw_bytes"] += raw_size
+            stats["stored_bytes"] += stored_size
+    
+    @classmethod
+    def encoding_stats(cls) -> dict:
+        """Per-source bytes written since process start and bytes saved by compression."""
+        with cls._stats_lock:
+            return {
+                source: {**stats, "bytes_saved": stats["raw_bytes"] - stats["stored_bytes"]}
+                for source, stats in cls._encoding_stats.items()
+            }
+    
     # Convenience methods
     @classmethod
-    def get_weather(cls, destination: str, date_range: str) -> Optional[dict]:
-        key = cls._make_key("weather", destination, date_range)
+    def get_weather_days(cls, location: str, days: list) -> dict:
+        """Cached per-day forecasts for a location, keyed by ISO date."""
+        prefix = cls._namespaced("weather_day", "weather")
+        keys = {cls._make_key(prefix, location, day): day for day in days}
+        found = cls.get_many(list(keys), "weather")
+        return {keys[key]: value for key, value in found.items()}
+    
+    @classmethod
+    def set_weather_days(cls, location: str, days: dict, ttl: int = None) -> bool:
+        ttl = ttl or settings.CACHE_TTL_WEATHER
+        prefix = cls._namespaced("weather_day", "weather")
+        values = {cls._make_key(prefix, location, day): data for day, data in days.items()}
+        return cls.set_many(values, ttl, "weather")
+    
+    @classmethod
+    def get_forecast(cls, location: str) -> Optional[dict]:
+        key = cls._make_key(cls._namespaced("forecast", "weather"), location)
         return cls.get(key, "weather")
     
     @classmethod
-    def set_weather(cls, destination: str, date_range: str, data: dict, ttl: int = None) -> bool:
-        key = cls._make_key("weather", destination, date_range)
+    def set_forecast(cls, location: str, data: dict, ttl: int = None) -> bool:
+        key = cls._make_key(cls._namespaced("forecast", "weather"), location)
         ttl = ttl or settings.CACHE_TTL_WEATHER
         return cls.set(key, data, ttl, "weather")
     
     @classmethod
     def get_places(cls, destination: str, query: str) -> Optional[dict]:
-        key = cls._make_key("places", destination, query)
+        key = cls._make_key(cls._namespaced("places", "places"), destination, query)
         return cls.get(key, "places")
     
     @classmethod
     def set_places(cls, destination: str, query: str, data: dict, ttl: int = None) -> bool:
-        key = cls._make_key("places", destination, query)
+        key = cls._make_key(cls._namespaced("places", "places"), destination, query)
         ttl = ttl or settings.CACHE_TTL_PLACES
         return cls.set(key, data, ttl, "places")
     
+    @classmethod
+    def get_places_many(cls, destination: str, queries: list) -> dict:
+        """Cached places results for many queries at once, keyed by query."""
+        prefix = cls._namespaced("places", "places")
+        keys = {cls._make_key(prefix, destination, query): query for query in queries}
+        found = cls.get_many(list(keys), "places")
+        return {keys[key]: value for key, value in found.items()}
+    
+    @classmethod
+    def set_places_many(cls, destination: str, results: dict, ttl: int = None) -> bool:
+        prefix = cls._namespaced("places", "places")
+        values = {cls._make_key(prefix, destination, query): data for query, data in results.items()}
+        return cls.set_many(values, ttl or settings.CACHE_TTL_PLACES, "places")
+    
+    @classmethod
+    def get_place_details_many(cls, place_ids: list) -> dict:
+        """Cached place details keyed by place_id; shared by every query returning the place."""
+        prefix = cls._namespaced("place_details", "places")
+        keys = {cls._make_key(prefix, place_id): place_id for place_id in place_ids}
+        found = cls.get_many(list(keys), "places")
+        return {keys[key]: value for key, value in found.items()}
+    
+    @classmethod
+    def set_place_details_many(cls, details: dict, ttl: int = None) -> bool:
+        prefix = cls._namespaced("place_details", "places")
+        values = {cls._make_key(prefix, place_id): data for place_id, data in details.items()}
+        return cls.set_many(values, ttl or settings.CACHE_TTL_PLACE_DETAILS, "places")
+    
+    @classmethod
+    def get_autocomplete_many(cls, prefixes: list) -> dict:
+        """Cached autocomplete results for many prefixes, keyed by prefix."""
+        prefix = cls._namespaced("autocomplete", "places")
+        keys = {cls._make_key(prefix, p): p for p in prefixes}
+        found = cls.get_many(list(keys), "places")
+        return {keys[key]: value for key, value in found.items()}
+    
+    @classmethod
+    def set_autocomplete(cls, prefix: str, data: dict, ttl: int = None) -> bool:
+        key = cls._make_key(cls._namespaced("autocomplete", "places"), prefix)
+        return cls.set(key, data, ttl or settings.CACHE_TTL_AUTOCOMPLETE, "places")
+    
     @classmethod
     def get_travel_time(cls, origin: str, dest: str) -> Optional[int]:
-        key = cls._make_key("travel", origin, dest)
+        key = cls._make_key(cls._namespaced("travel", "travel"), origin, dest)
         result = cls.get(key, "travel")
         return result.get("minutes") if result else None
     
     @classmethod
     def set_travel_time(cls, origin: str, dest: str, minutes: int, ttl: int = None) -> bool:
-        key = cls._make_key("travel", origin, dest)
+        key = cls._make_key(cls._namespaced("travel", "travel"), origin, dest)
         ttl = ttl or settings.CACHE_TTL_TRAVEL
-        return cls.set(key, {"minutes": minutes}, ttl, "travel")
+        return cls.set(key, {"minutes": minutes, "origin": origin, "dest": dest}, ttl, "travel")
+    
+    @classmethod
+    def get_travel_times(cls, pairs: list) -> dict:
+        """Cached minutes for many (origin, dest) pairs; returns only the pairs found."""
+        prefix = cls._namespaced("travel", "travel")
+        keys = {cls._make_key(prefix, origin, dest): (origin, dest) for origin, dest in pairs}
+        found = cls.get_many(list(keys), "travel")
+        return {keys[key]: value.get("minutes") for key, value in found.items() if value}
+    
+    @classmethod
+    def set_travel_times(cls, minutes: dict, ttl: int = None, estimated: bool = False) -> bool:
+        """
+        Store {(origin, dest): minutes} with one write per cache layer. Entries
+        keep their endpoints for ``recent_travel_times``; `estimated` marks
+        offline fallbacks so they are never mistaken for real results.
+        """
+        ttl = ttl or settings.CACHE_TTL_TRAVEL
+        prefix = cls._namespaced("travel", "travel")
+        flags = {"estimated": True} if estimated else {}
+        values = {cls._make_key(prefix, origin, dest): {"minutes": value, "origin": origin, "dest": dest, **flags}
+                  for (origin, dest), value in minutes.items()}
+        return cls.set_many(values, ttl, "travel")
+    
+    @classmethod
+    def recent_travel_times(cls, limit: int) -> list:
+        """(origin, dest, minutes) for the most recently used real results in the database layer."""
+        from trip_planner.models import ExternalCache
+        
+        rows = (ExternalCache.objects
+                .filter(source="travel", generation=cls.current_version("travel"), expires_at__gt=timezone.now())
+                .order_by("-accessed_at")[:limit])
+        results = []
+        for row in rows:
+            try:
+                value = decode_payload(row.payload)
+            except Exception:
+                continue
+            if (isinstance(value, dict) and not value.get("estimated") and value.get("minutes")
+                    and value.get("origin") and value.get("dest")):
+                results.append((value["origin"], value["dest"], value["minutes"]))
+        return results
+    
+    @classmethod
+    def get_rate_table(cls, reference: str) -> Optional[dict]:
+        key = cls._make_key(cls._namespaced("currency_table", "currency"), reference)
+        return cls.get(key, "currency")
+    
+    @classmethod
+    def set_rate_table(cls, reference: str, table: dict, ttl: int = None) -> bool:
+        key = cls._make_key(cls._namespaced("currency_table", "currency"), reference)
+        return cls.set(key, table, ttl or settings.CACHE_TTL_CURRENCY, "currency")
     
     @classmethod
-    def get_currency_rate(cls, base: str, target: str) -> Optional[float]:
-        key = cls._make_key("currency", base, target)
-        result = cls.get(key, "currency")
-        return result.get("rate") if result else None
+    def is_geocode_miss(cls, name: str) -> bool:
+        key = cls._make_key(cls._namespaced("geocode_miss", "geocode"), name)
+        return bool(cls.get(key, "geocode"))
     
     @classmethod
-    def set_currency_rate(cls, base: str, target: str, rate: float) -> bool:
-        key = cls._make_key("currency", base, target)
-        return cls.set(key, {"rate": rate}, settings.CACHE_TTL_CURRENCY, "currency")
+    def set_geocode_miss(cls, name: str) -> bool:
+        key = cls._make_key(cls._namespaced("geocode_miss", "geocode"), name)
+        return cls.set(key, {"unknown": True}, settings.CACHE_TTL_ERROR, "geocode")
 
 
 cache_client = CacheClient()
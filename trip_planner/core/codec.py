@@ -0,0 +1,58 @@
+"""
+Compact binary encoding for cached payloads.
+
+Encoded values are msgpack, zlib-compressed above a size threshold, behind a
+small versioned header so plain JSON entries written before the encoding
+existed can still be read.
+"""
+import zlib
+from typing import Any
+
+import msgpack
+
+MAGIC = b"VC"
+FORMAT_VERSION = 1
+
+FLAG_RAW = 0
+FLAG_ZLIB = 1
+
+_HEADER_LEN = len(MAGIC) + 2
+
+
+def encode_payload(value: Any, threshold: int = 1024) -> tuple[bytes, int]:
+    """Encode a value, returning (encoded_bytes, uncompressed_size)."""
+    packed = msgpack.packb(value, use_bin_type=True)
+    flag = FLAG_RAW
+    body = packed
+    if len(packed) > threshold:
+        compressed = zlib.compress(packed, 6)
+        if len(compressed) < len(packed):
+            flag = FLAG_ZLIB
+            body = compressed
+    return MAGIC + bytes([FORMAT_VERSION, flag]) + body, len(packed)
+
+
+def is_encoded(data: Any) -> bool:
+    """True if data carries the binary cache header."""
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return isinstance(data, (bytes, bytearray)) and bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def decode_payload(data: Any) -> Any:
+    """Decode an encoded value; legacy (non-binary) values pass through unchanged."""
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    if not is_encoded(data):
+        return data
+
+    version, flag = data[len(MAGIC)], data[len(MAGIC) + 1]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported cache payload version: {version}")
+
+    body = bytes(data[_HEADER_LEN:])
+    if flag == FLAG_ZLIB:
+        body = zlib.decompress(body)
+    elif flag != FLAG_RAW:
+        raise ValueError(f"Unknown cache payload flag: {flag}")
+    return msgpack.unpackb(body, raw=False, strict_map_key=False)
@@ -44,6 +44,12 @@ class ValidationError(TripPlannerError):
         super().__init__(message, "validation_error")
 
 
+class PatchError(TripPlannerError):
+    """Raised when a JSON Patch or Merge Patch document cannot be applied."""
+    def __init__(self, message: str):
+        super().__init__(message, "patch_failed")
+
+
 def custom_exception_handler(exc, context):
     """Custom DRF exception handler."""
     response = exception_handler(exc, context)
@@ -0,0 +1,182 @@
+"""
+Shared HTTP client with pooled keep-alive connections.
+
+All external services go through one ``requests.Session`` whose adapter
+keeps a connection pool per host, so repeat calls to googleapis.com or
+openweathermap.org skip the TCP+TLS handshake. urllib3 pools are
+thread-safe; the client also records per-endpoint latency and how often
+pooled connections were reused.
+
+``AsyncHttpClient`` is the asyncio counterpart used by the ``aget_*``
+service functions, recording into the same per-endpoint metrics. It keeps
+one ``httpx.AsyncClient`` on a long-lived event loop in a background
+thread; requests are submitted there with ``run_coroutine_threadsafe``.
+Sync callers reach the service functions through ``run_blocking``, whose
+event loop is discarded after each call, so keep-alive connections live on
+the background loop instead.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from asgiref.sync import async_to_sync
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """Thread-safe pooled HTTP client with latency metrics."""
+
+    def __init__(self, pool_connections: int = None, pool_maxsize: int = None, timeout: float = None):
+        self.timeout = timeout or settings.HTTP_TIMEOUT
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections or settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or settings.HTTP_POOL_MAXSIZE,
+            max_retries=0,
+        )
+        self._session = requests.Session()
+        self._session.mount("https://", self._adapter)
+        self._session.mount("http://", self._adapter)
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(lambda: {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+
+    @staticmethod
+    def _endpoint(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.netloc}{parts.path}"
+
+    def _record(self, endpoint: str, elapsed_ms: float, failed: bool) -> None:
+        with self._lock:
+            stats = self._endpoints[endpoint]
+            stats["count"] += 1
+            stats["errors"] += int(failed)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def get(self, url: str, params: dict = None, timeout: float = None,
+            endpoint: str = None, **kwargs) -> requests.Response:
+        """GET through the shared pool. `endpoint` overrides the metrics label."""
+        label = endpoint or self._endpoint(url)
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = self._session.get(url, params=params, timeout=timeout or self.timeout, **kwargs)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            self._record(label, (time.perf_counter() - start) * 1000, failed)
+
+    def _pool_stats(self) -> dict:
+        pools = {}
+        manager = self._adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            opened, served = pool.num_connections, pool.num_requests
+            pools[f"{pool.scheme}://{pool.host}"] = {
+                "connections_opened": opened,
+                "requests": served,
+                "reused": max(0, served - opened),
+            }
+        return pools
+
+    def metrics(self) -> dict:
+        """Per-endpoint latency and per-host connection reuse since process start."""
+        with self._lock:
+            endpoints = {
+                name: {
+                    **stats,
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 2) if stats["count"] else 0.0,
+                    "total_ms": round(stats["total_ms"], 2),
+                    "max_ms": round(stats["max_ms"], 2),
+                }
+                for name, stats in self._endpoints.items()
+            }
+        return {"endpoints": endpoints, "pools": self._pool_stats()}
+
+
+class AsyncHttpClient:
+    """
+    Pooled asyncio HTTP client. One httpx.AsyncClient lives on a background
+    event loop thread for the life of the process; coroutines on any other
+    loop submit their requests to it, so gathered requests fan out on that
+    single thread and share one keep-alive pool.
+    """
+
+    def __init__(self, metrics: HttpClient, max_connections: int = None, timeout: float = None,
+                 transport: httpx.AsyncBaseTransport = None):
+        self._metrics = metrics
+        self.timeout = timeout or settings.HTTP_TIMEOUT
+        self._limits = httpx.Limits(
+            max_connections=max_connections or settings.HTTP_POOL_CONNECTIONS * settings.HTTP_POOL_MAXSIZE,
+            max_keepalive_connections=max_connections or settings.HTTP_POOL_MAXSIZE,
+        )
+        self._transport = transport
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._client = None
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="http-loop", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    async def _send(self, url: str, params: dict, timeout: float, kwargs: dict) -> httpx.Response:
+        # Only ever runs on the background loop, so the client needs no lock
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self._limits, timeout=self.timeout, transport=self._transport)
+        return await self._client.get(url, params=params, timeout=timeout, **kwargs)
+
+    async def get(self, url: str, params: dict = None, timeout: float = None,
+                  endpoint: str = None, **kwargs) -> httpx.Response:
+        """GET through the shared background pool. `endpoint` overrides the metrics label."""
+        label = endpoint or self._metrics._endpoint(url)
+        start = time.perf_counter()
+        failed = True
+        try:
+            future = asyncio.run_coroutine_threadsafe(
+                self._send(url, params, timeout or self.timeout, kwargs), self._background_loop()
+            )
+            response = await asyncio.wrap_future(future)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            self._metrics._record(label, (time.perf_counter() - start) * 1000, failed)
+
+    def close(self) -> None:
+        """Close the client and stop the background loop (a later request starts a new one)."""
+        with self._lock:
+            loop, thread, self._loop, self._thread = self._loop, self._thread, None, None
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+            self._client = None
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+http_client = HttpClient()
+async_http_client = AsyncHttpClient(http_client)
+
+
+def run_blocking(afunc, *args, **kwargs):
+    """
+    Call an async service function from sync code via async_to_sync. Its
+    ORM and cache calls stay on the calling thread as usual; its HTTP
+    requests go to the background loop's client, which outlives the call.
+    """
+    return async_to_sync(afunc)(*args, **kwargs)
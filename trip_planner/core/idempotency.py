@@ -0,0 +1,168 @@
+"""
+Idempotency keys for expensive POST endpoints.
+
+A request carrying an ``Idempotency-Key`` header claims the key in the
+shared cache with ``add`` (an in-progress marker holding the request
+fingerprint). When the view returns, the marker is replaced by the final
+response, so a retry with the same key is answered from the cache. A retry
+that arrives while the first request is still running waits for it instead
+of starting another Gemini pipeline. Server errors and 429s release the key
+so the client can try again for real.
+"""
+import functools
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+RETRY_AFTER_SECONDS = 5
+
+_PENDING = "pending"
+_DONE = "done"
+
+_stats_lock = threading.Lock()
+_stats = {"executed": 0, "replayed": 0, "waited": 0, "conflicts": 0}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _cache_key(scope: str, key: str) -> str:
+    return f"idempotency:{scope}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def _fingerprint(request) -> str:
+    """
+    SHA-256 of the method, path and payload. Multipart bodies can exceed
+    DATA_UPLOAD_MAX_MEMORY_SIZE, so they are hashed from the parsed form
+    fields and streamed file chunks rather than the raw body.
+    """
+    digest = hashlib.sha256(f"{request.method}:{request.path}:".encode())
+    if not (request.content_type or "").startswith("multipart/"):
+        digest.update(request.body)
+        return digest.hexdigest()
+
+    for name in sorted(request.POST):
+        digest.update(f"{name}={request.POST.getlist(name)!r};".encode())
+    for name in sorted(request.FILES):
+        for upload in request.FILES.getlist(name):
+            digest.update(f"{name}:{upload.name}:{upload.content_type}:{upload.size};".encode())
+            for chunk in upload.chunks():
+                digest.update(chunk)
+            upload.seek(0)
+    return digest.hexdigest()
+
+
+def _should_store(response) -> bool:
+    """Final outcomes only; a retry after a 5xx or 429 should run again."""
+    return response.status_code < 500 and response.status_code != status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def _snapshot(fingerprint: str, response) -> dict:
+    entry = {"state": _DONE, "fingerprint": fingerprint, "status": response.status_code,
+             "headers": {name: response[name] for name in ("ETag", "Location") if response.has_header(name)}}
+    if isinstance(response, Response):
+        entry["data"] = response.data
+    else:
+        entry["content"] = response.content
+        entry["content_type"] = response["Content-Type"]
+    return entry
+
+
+def _replay(entry: dict):
+    if "data" in entry:
+        response = Response(entry["data"], status=entry["status"])
+    else:
+        response = HttpResponse(entry["content"], content_type=entry["content_type"], status=entry["status"])
+    for name, value in entry["headers"].items():
+        response[name] = value
+    response[REPLAY_HEADER] = "true"
+    return response
+
+
+def _error(code: str, message: str, status_code: int, retry_after: int = None) -> Response:
+    response = Response({"error": code, "message": message}, status=status_code)
+    if retry_after is not None:
+        response["Retry-After"] = str(retry_after)
+    return response
+
+
+def idempotent(scope: str):
+    """
+    Decorate an APIView handler so requests with an Idempotency-Key run at
+    most once per key. Requests without the header are not affected.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return handler(view, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return _error("invalid_idempotency_key", f"{HEADER} is longer than {MAX_KEY_LENGTH} characters",
+                              status.HTTP_400_BAD_REQUEST)
+
+            cache_key = _cache_key(scope, key)
+            fingerprint = _fingerprint(request)
+            deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+            waited = False
+
+            while not django_cache.add(cache_key, {"state": _PENDING, "fingerprint": fingerprint},
+                                       timeout=settings.IDEMPOTENCY_LOCK_TTL):
+                entry = django_cache.get(cache_key)
+                if entry is None:
+                    # Released between add and get; try to claim it again
+                    continue
+                if entry["fingerprint"] != fingerprint:
+                    _count("conflicts")
+                    return _error("idempotency_key_reused",
+                                  f"{HEADER} was already used for a different request",
+                                  status.HTTP_422_UNPROCESSABLE_ENTITY)
+                if entry["state"] == _DONE:
+                    _count("replayed")
+                    return _replay(entry)
+                if time.monotonic() >= deadline:
+                    _count("conflicts")
+                    return _error("request_in_progress",
+                                  f"A request with this {HEADER} is still running",
+                                  status.HTTP_409_CONFLICT, retry_after=RETRY_AFTER_SECONDS)
+                if not waited:
+                    waited = True
+                    _count("waited")
+                time.sleep(settings.IDEMPOTENCY_POLL_SECONDS)
+
+            _count("executed")
+            try:
+                response = handler(view, request, *args, **kwargs)
+            except Exception:
+                django_cache.delete(cache_key)
+                raise
+            if _should_store(response):
+                django_cache.set(cache_key, _snapshot(fingerprint, response), timeout=settings.IDEMPOTENCY_TTL)
+            else:
+                django_cache.delete(cache_key)
+            return response
+        return wrapper
+    return decorator
+
+
+def metrics() -> dict:
+    """Keyed requests executed, replayed from the cache, made to wait, or refused."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_metrics() -> None:
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
@@ -0,0 +1,124 @@
+"""
+JSON Merge Patch (RFC 7396) and JSON Patch (RFC 6902) application.
+"""
+import copy
+from typing import Any
+
+from trip_planner.core.exceptions import PatchError
+
+_MISSING = object()
+
+
+def merge_patch(target: Any, patch: Any) -> Any:
+    """Apply an RFC 7396 merge patch; returns a new document."""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def parse_pointer(pointer: str) -> list:
+    """Reference tokens of an RFC 6901 JSON Pointer."""
+    if pointer == "":
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise PatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _resolve(document: Any, tokens: list) -> Any:
+    for token in tokens:
+        if isinstance(document, dict):
+            if token not in document:
+                raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+            document = document[token]
+        elif isinstance(document, list):
+            document = document[_index(document, token)]
+        else:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+    return document
+
+
+def _add(document: Any, tokens: list, value: Any) -> Any:
+    if not tokens:
+        return value
+    parent, last = _resolve(document, tokens[:-1]), tokens[-1]
+    if isinstance(parent, dict):
+        parent[last] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, last, allow_end=True), value)
+    else:
+        raise PatchError(f"Cannot add to a scalar at /{'/'.join(tokens)}")
+    return document
+
+
+def _remove(document: Any, tokens: list) -> tuple:
+    """(document, removed value)."""
+    if not tokens:
+        raise PatchError("Cannot remove the document root")
+    parent, last = _resolve(document, tokens[:-1]), tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+        return document, parent.pop(last)
+    if isinstance(parent, list):
+        return document, parent.pop(_index(parent, last))
+    raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def apply_patch(document: Any, operations: list) -> Any:
+    """
+    Apply an RFC 6902 patch to a copy of document. The patch is atomic: any
+    failing operation raises PatchError and nothing is returned.
+    """
+    if not isinstance(operations, list):
+        raise PatchError("A JSON Patch must be an array of operations")
+    document = copy.deepcopy(document)
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise PatchError(f"Invalid operation: {operation!r}")
+        op, tokens = operation["op"], parse_pointer(operation["path"])
+        value = operation.get("value", _MISSING)
+        if op in ("add", "replace", "test") and value is _MISSING:
+            raise PatchError(f"'{op}' requires a value")
+
+        if op == "add":
+            document = _add(document, tokens, copy.deepcopy(value))
+        elif op == "remove":
+            document, _ = _remove(document, tokens)
+        elif op == "replace":
+            _resolve(document, tokens)
+            if tokens:
+                document, _ = _remove(document, tokens)
+            document = _add(document, tokens, copy.deepcopy(value))
+        elif op in ("move", "copy"):
+            source = parse_pointer(operation.get("from", ""))
+            if op == "move" and tokens[:len(source)] == source and tokens != source:
+                raise PatchError("Cannot move a value into one of its children")
+            if op == "move":
+                document, moved = _remove(document, source)
+            else:
+                moved = copy.deepcopy(_resolve(document, source))
+            document = _add(document, tokens, moved)
+        elif op == "test":
+            if _resolve(document, tokens) != value:
+                raise PatchError(f"Test failed at {operation['path']}")
+        else:
+            raise PatchError(f"Unknown operation: {op!r}")
+    return document
@@ -0,0 +1,117 @@
+"""
+Request-scoped memoization for service calls.
+
+The orchestrator opens a scope for one generation; service functions
+decorated with ``memoized`` then answer repeated calls with identical
+arguments from a plain dict instead of going back through the cache tiers.
+Outside a scope the decorator is a no-op. The scope lives in a ContextVar,
+so it follows async_to_sync/sync_to_async hops and never leaks between
+requests.
+"""
+import copy
+import functools
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+_MISSING = object()
+
+
+class MemoScope:
+    """Results and hit counts for one generation."""
+
+    def __init__(self):
+        self._results = {}
+        self.hits = {}
+        self.misses = {}
+
+    def get(self, key):
+        return self._results.get(key, _MISSING)
+
+    def put(self, key, value) -> None:
+        self._results[key] = value
+
+    def stats(self) -> dict:
+        names = sorted(set(self.hits) | set(self.misses))
+        return {
+            "calls_saved": sum(self.hits.values()),
+            "calls_made": sum(self.misses.values()),
+            "by_function": {
+                name: {"saved": self.hits.get(name, 0), "made": self.misses.get(name, 0)}
+                for name in names
+            },
+        }
+
+
+_scope: ContextVar[Optional[MemoScope]] = ContextVar("memo_scope", default=None)
+
+
+@contextmanager
+def memo_scope():
+    """Open a memo scope; a nested call reuses the enclosing one."""
+    current = _scope.get()
+    if current is not None:
+        yield current
+        return
+    scope = MemoScope()
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def _freeze(value):
+    """Hashable form of call arguments (lists and dicts become tuples)."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        items = tuple(_freeze(v) for v in value)
+        return tuple(sorted(items, key=repr)) if isinstance(value, set) else items
+    hash(value)
+    return value
+
+
+def _lookup(name: str, args: tuple, kwargs: dict):
+    scope = _scope.get()
+    if scope is None:
+        return None, None, _MISSING
+    try:
+        key = (name, _freeze(args), _freeze(kwargs))
+    except TypeError:
+        return None, None, _MISSING
+    value = scope.get(key)
+    if value is not _MISSING:
+        scope.hits[name] = scope.hits.get(name, 0) + 1
+        return scope, key, copy.deepcopy(value)
+    scope.misses[name] = scope.misses.get(name, 0) + 1
+    return scope, key, _MISSING
+
+
+def memoized(func):
+    """Memoize a sync or async service function within the active memo scope."""
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            scope, key, value = _lookup(name, args, kwargs)
+            if value is not _MISSING:
+                return value
+            result = await func(*args, **kwargs)
+            if scope is not None:
+                scope.put(key, copy.deepcopy(result))
+            return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        scope, key, value = _lookup(name, args, kwargs)
+        if value is not _MISSING:
+            return value
+        result = func(*args, **kwargs)
+        if scope is not None:
+            scope.put(key, copy.deepcopy(result))
+        return result
+    return wrapper
@@ -0,0 +1,75 @@
+"""
+Expiry sweeper for the ExternalCache table.
+
+Runs from ``manage.py cache_sweep`` or, when CACHE_SWEEP_INTERVAL is set,
+periodically on a daemon thread inside each worker process.
+"""
+import logging
+import threading
+import time
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_sweeper_thread = None
+_sweeper_lock = threading.Lock()
+
+
+def _merge(total: dict, part: dict) -> None:
+    for source, stats in part.items():
+        entry = total.setdefault(source, {"rows": 0, "bytes": 0})
+        entry["rows"] += stats["rows"]
+        entry["bytes"] += stats["bytes"]
+
+
+def run_sweep(batch_size: int = None, max_seconds: float = None, max_rows: int = None) -> dict:
+    """
+    Delete expired rows and rows orphaned by a namespace bump, then evict LRU
+    rows above max_rows. All phases share one max_seconds budget. Returns
+    per-source reclaimed rows/bytes.
+    """
+    from trip_planner.models import ExternalCache, CacheNamespace
+
+    batch_size = batch_size or settings.CACHE_SWEEP_BATCH_SIZE
+    max_seconds = max_seconds if max_seconds is not None else settings.CACHE_SWEEP_MAX_SECONDS
+    max_rows = max_rows if max_rows is not None else settings.CACHE_MAX_ROWS
+    deadline = time.monotonic() + max_seconds
+
+    reclaimed = {}
+    _merge(reclaimed, ExternalCache.sweep_expired(batch_size=batch_size, deadline=deadline))
+    _merge(reclaimed, ExternalCache.sweep_stale_generations(
+        CacheNamespace.versions(), batch_size=batch_size, deadline=deadline))
+    if max_rows:
+        _merge(reclaimed, ExternalCache.evict_lru(max_rows, batch_size=batch_size, deadline=deadline))
+
+    if reclaimed:
+        logger.info(f"Cache sweep reclaimed: {reclaimed}")
+    return reclaimed
+
+
+def _sweep_loop(interval: int, stop: threading.Event) -> None:
+    while not stop.wait(interval):
+        try:
+            run_sweep()
+        except Exception as e:
+            logger.warning(f"Periodic cache sweep failed: {e}")
+
+
+def start_periodic_sweeper(interval: int = None) -> threading.Event | None:
+    """Start the in-process sweeper thread once per process. Returns its stop event."""
+    global _sweeper_thread
+    interval = interval if interval is not None else settings.CACHE_SWEEP_INTERVAL
+    if interval <= 0:
+        return None
+
+    with _sweeper_lock:
+        if _sweeper_thread is not None and _sweeper_thread.is_alive():
+            return _sweeper_thread.stop_event
+        stop = threading.Event()
+        thread = threading.Thread(target=_sweep_loop, args=(interval, stop),
+                                  name="cache-sweeper", daemon=True)
+        thread.stop_event = stop
+        thread.start()
+        _sweeper_thread = thread
+        logger.info(f"Cache sweeper started (every {interval}s)")
+        return stop
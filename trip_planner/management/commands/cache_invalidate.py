@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from trip_planner.core.cache import cache_client
+
+
+class Command(BaseCommand):
+    help = 'Invalidate cached entries for one or more sources by bumping their namespace version'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sources',
+            nargs='+',
+            help='Cache sources to invalidate (e.g. weather places travel currency geocode)',
+        )
+
+    def handle(self, *args, **options):
+        for source in options['sources']:
+            version = cache_client.bump_namespace(source)
+            self.stdout.write(self.style.SUCCESS(f'{source}: now v{version}'))
+        self.stdout.write('Orphaned rows are removed by the next cache_sweep.')
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from trip_planner.core.sweeper import run_sweep
+
+
+class Command(BaseCommand):
+    help = 'Delete expired external cache rows in batches and enforce the table size cap'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.CACHE_SWEEP_BATCH_SIZE,
+            help='Rows deleted per statement',
+        )
+        parser.add_argument(
+            '--max-seconds',
+            type=float,
+            default=settings.CACHE_SWEEP_MAX_SECONDS,
+            help='Stop sweeping after this many seconds',
+        )
+        parser.add_argument(
+            '--max-rows',
+            type=int,
+            default=settings.CACHE_MAX_ROWS,
+            help='Evict least recently used rows above this count (0 = no cap)',
+        )
+
+    def handle(self, *args, **options):
+        reclaimed = run_sweep(
+            batch_size=options['batch_size'],
+            max_seconds=options['max_seconds'],
+            max_rows=options['max_rows'],
+        )
+
+        if not reclaimed:
+            self.stdout.write(self.style.SUCCESS('Nothing to reclaim'))
+            return
+
+        total_rows = total_bytes = 0
+        for source, stats in sorted(reclaimed.items()):
+            self.stdout.write(f"  {source}: {stats['rows']} rows, {stats['bytes']} bytes")
+            total_rows += stats['rows']
+            total_bytes += stats['bytes']
+        self.stdout.write(self.style.SUCCESS(f'Reclaimed {total_rows} rows ({total_bytes} bytes)'))
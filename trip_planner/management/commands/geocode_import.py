@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from trip_planner.services.geocoding import import_gazetteer
+
+
+class Command(BaseCommand):
+    help = 'Bulk import a gazetteer CSV (name,lat,lon[,country][,timezone]) into the geocoding index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Path to the gazetteer CSV file')
+        parser.add_argument(
+            '--source',
+            default='gazetteer',
+            help='Source label stored with each entry',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            count = import_gazetteer(options['csv_path'], source=options['source'])
+        except FileNotFoundError:
+            raise CommandError(f"File not found: {options['csv_path']}")
+        self.stdout.write(self.style.SUCCESS(f'Imported {count} geocode entries'))
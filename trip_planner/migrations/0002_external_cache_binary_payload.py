@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trip_planner', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='externalcache',
+            name='payload_blob',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='externalcache',
+            name='size_bytes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='externalcache',
+            name='payload_json',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trip_planner', '0002_external_cache_binary_payload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='externalcache',
+            name='accessed_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trip_planner', '0003_external_cache_accessed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized_name', models.CharField(db_index=True, max_length=255, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('lat', models.FloatField()),
+                ('lon', models.FloatField()),
+                ('country', models.CharField(blank=True, default='', max_length=64)),
+                ('timezone', models.CharField(blank=True, default='', max_length=64)),
+                ('source', models.CharField(db_index=True, max_length=32)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Geocode Entries',
+                'db_table': 'geocode_entries',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trip_planner', '0004_geocode_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheNamespace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=64, unique=True)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'cache_namespaces',
+            },
+        ),
+        migrations.AddField(
+            model_name='externalcache',
+            name='generation',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trip_planner', '0006_itinerary_status_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itinerary',
+            name='ics_text',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='result_bytes',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
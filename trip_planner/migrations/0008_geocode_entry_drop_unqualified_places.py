@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def drop_unqualified_place_names(apps, schema_editor):
+    # Places results used to be indexed under bare names ("Hilton"), which collide across cities
+    apps.get_model("trip_planner", "GeocodeEntry").objects.filter(source="places").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trip_planner', '0007_itinerary_rendered_artifacts'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_unqualified_place_names, migrations.RunPython.noop),
+    ]
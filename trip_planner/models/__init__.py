@@ -3,11 +3,14 @@ Database models for Trip Planner.
 """
 from .itinerary import Itinerary, ItineraryStatus
 from .trace import AgentTrace
-from .cache import ExternalCache
+from .cache import ExternalCache, CacheNamespace
+from .geocode import GeocodeEntry
 
 __all__ = [
     "Itinerary",
     "ItineraryStatus",
     "AgentTrace",
     "ExternalCache",
+    "CacheNamespace",
+    "GeocodeEntry",
 ]
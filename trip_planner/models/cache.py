@@ -1,9 +1,15 @@
 """
 External cache model for API response caching.
 """
+import json
+import time
+from collections import defaultdict
 from django.db import models
 from django.utils import timezone
 
+# Reads refresh accessed_at at most this often, so LRU tracking costs few writes
+ACCESS_TOUCH_INTERVAL = timezone.timedelta(minutes=5)
+
 
 class ExternalCache(models.Model):
     """
@@ -11,9 +17,13 @@ class ExternalCache(models.Model):
     """
     cache_key = models.CharField(max_length=512, unique=True, db_index=True)
     source = models.CharField(max_length=64, db_index=True)
-    payload_json = models.JSONField()
+    payload_json = models.JSONField(null=True, blank=True)
+    payload_blob = models.BinaryField(null=True, blank=True)
+    size_bytes = models.PositiveIntegerField(default=0)
     expires_at = models.DateTimeField(db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    accessed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    generation = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = "external_cache"
@@ -28,25 +38,147 @@ class ExternalCache(models.Model):
 
     @classmethod
     def get_valid(cls, cache_key: str):
-        """Get a non-expired cache entry."""
+        """Get a non-expired cache entry (binary payload if stored, else JSON)."""
         try:
             entry = cls.objects.get(cache_key=cache_key)
             if not entry.is_expired:
-                return entry.payload_json
+                entry._touch()
+                return entry.payload
         except cls.DoesNotExist:
             pass
         return None
 
+    def _touch(self):
+        now = timezone.now()
+        if now - self.accessed_at > ACCESS_TOUCH_INTERVAL:
+            type(self).objects.filter(pk=self.pk).update(accessed_at=now)
+            self.accessed_at = now
+
+    @classmethod
+    def get_valid_many(cls, cache_keys: list) -> dict:
+        """Get non-expired entries for many keys in one query."""
+        entries = cls.objects.filter(cache_key__in=cache_keys, expires_at__gt=timezone.now())
+        return {entry.cache_key: entry.payload for entry in entries}
+
+    @property
+    def payload(self):
+        if self.payload_blob is not None:
+            return bytes(self.payload_blob)
+        return self.payload_json
+
     @classmethod
-    def set_cache(cls, cache_key: str, source: str, payload: dict, ttl_seconds: int):
-        """Set or update a cache entry."""
+    def set_cache(cls, cache_key: str, source: str, payload, ttl_seconds: int, generation: int = 0):
+        """Set or update a cache entry. Bytes payloads are stored in the binary column."""
         expires_at = timezone.now() + timezone.timedelta(seconds=ttl_seconds)
-        cls.objects.update_or_create(
-            cache_key=cache_key,
-            defaults={"source": source, "payload_json": payload, "expires_at": expires_at}
+        if isinstance(payload, (bytes, bytearray, memoryview)):
+            blob = bytes(payload)
+            defaults = {"payload_json": None, "payload_blob": blob, "size_bytes": len(blob)}
+        else:
+            size = len(json.dumps(payload, default=str).encode())
+            defaults = {"payload_json": payload, "payload_blob": None, "size_bytes": size}
+        defaults.update(source=source, expires_at=expires_at, accessed_at=timezone.now(),
+                        generation=generation)
+        cls.objects.update_or_create(cache_key=cache_key, defaults=defaults)
+
+    @classmethod
+    def set_cache_many(cls, payloads: dict, source: str, ttl_seconds: int, generation: int = 0):
+        """Upsert many binary entries with a single statement."""
+        now = timezone.now()
+        expires_at = now + timezone.timedelta(seconds=ttl_seconds)
+        entries = [
+            cls(cache_key=key, source=source, payload_json=None, payload_blob=bytes(blob),
+                size_bytes=len(blob), expires_at=expires_at, accessed_at=now, generation=generation)
+            for key, blob in payloads.items()
+        ]
+        cls.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["cache_key"],
+            update_fields=["source", "payload_json", "payload_blob", "size_bytes", "expires_at",
+                           "accessed_at", "generation"],
         )
 
     @classmethod
     def cleanup_expired(cls):
         """Remove expired entries."""
         return cls.objects.filter(expires_at__lt=timezone.now()).delete()
+
+    @classmethod
+    def _delete_batches(cls, queryset, batch_size: int, deadline: float, limit: int = None) -> dict:
+        """Delete rows from an ordered queryset in batches; returns per-source rows/bytes."""
+        reclaimed = defaultdict(lambda: {"rows": 0, "bytes": 0})
+        remaining = limit
+        while time.monotonic() < deadline and (remaining is None or remaining > 0):
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            batch = list(queryset.values_list("pk", "source", "size_bytes")[:size])
+            if not batch:
+                break
+            cls.objects.filter(pk__in=[pk for pk, _, _ in batch]).delete()
+            for _, source, size_bytes in batch:
+                reclaimed[source]["rows"] += 1
+                reclaimed[source]["bytes"] += size_bytes
+            if remaining is not None:
+                remaining -= len(batch)
+        return dict(reclaimed)
+
+    @classmethod
+    def sweep_expired(cls, batch_size: int = 500, max_seconds: float = 10.0, deadline: float = None) -> dict:
+        """
+        Delete expired entries oldest-first in bounded batches, stopping after
+        max_seconds or at a monotonic deadline shared with other phases.
+        """
+        deadline = deadline if deadline is not None else time.monotonic() + max_seconds
+        expired = cls.objects.filter(expires_at__lt=timezone.now()).order_by("expires_at")
+        return cls._delete_batches(expired, batch_size, deadline)
+
+    @classmethod
+    def sweep_stale_generations(cls, versions: dict, batch_size: int = 500, max_seconds: float = 10.0,
+                                deadline: float = None) -> dict:
+        """Delete entries written under an older namespace version ({source: current_version})."""
+        deadline = deadline if deadline is not None else time.monotonic() + max_seconds
+        reclaimed = {}
+        for source, version in versions.items():
+            stale = cls.objects.filter(source=source, generation__lt=version).order_by("pk")
+            reclaimed.update(cls._delete_batches(stale, batch_size, deadline))
+        return reclaimed
+
+    @classmethod
+    def evict_lru(cls, max_rows: int, batch_size: int = 500, max_seconds: float = 10.0,
+                  deadline: float = None) -> dict:
+        """Evict least recently accessed entries until at most max_rows remain."""
+        deadline = deadline if deadline is not None else time.monotonic() + max_seconds
+        excess = cls.objects.count() - max_rows
+        if max_rows <= 0 or excess <= 0:
+            return {}
+        oldest = cls.objects.order_by("accessed_at")
+        return cls._delete_batches(oldest, batch_size, deadline, limit=excess)
+
+
+class CacheNamespace(models.Model):
+    """
+    Version counter per cache source; the version is part of every cache key.
+    """
+    source = models.CharField(max_length=64, unique=True)
+    version = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "cache_namespaces"
+
+    def __str__(self):
+        return f"{self.source}:v{self.version}"
+
+    @classmethod
+    def current(cls, source: str) -> int:
+        namespace, _ = cls.objects.get_or_create(source=source)
+        return namespace.version
+
+    @classmethod
+    def bump(cls, source: str) -> int:
+        cls.objects.get_or_create(source=source)
+        cls.objects.filter(source=source).update(version=models.F("version") + 1, updated_at=timezone.now())
+        return cls.objects.get(source=source).version
+
+    @classmethod
+    def versions(cls) -> dict:
+        return dict(cls.objects.values_list("source", "version"))
@@ -0,0 +1,36 @@
+"""
+Geocoding index model shared by weather, travel time and places.
+"""
+from django.db import models
+
+
+class GeocodeEntry(models.Model):
+    """
+    Resolved coordinates for a normalized place name.
+    """
+    normalized_name = models.CharField(max_length=255, unique=True, db_index=True)
+    name = models.CharField(max_length=255)
+    lat = models.FloatField()
+    lon = models.FloatField()
+    country = models.CharField(max_length=64, blank=True, default="")
+    # IANA name, or "UTC+01:00" when a provider only reports the offset
+    timezone = models.CharField(max_length=64, blank=True, default="")
+    source = models.CharField(max_length=32, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "geocode_entries"
+        verbose_name_plural = "Geocode Entries"
+
+    def __str__(self):
+        return f"{self.name} ({self.lat:.4f}, {self.lon:.4f})"
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "lat": self.lat,
+            "lon": self.lon,
+            "country": self.country,
+            "timezone": self.timezone,
+        }
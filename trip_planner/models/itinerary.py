@@ -1,9 +1,15 @@
 """
 Itinerary model for storing trip requests and generated results.
 """
+import json
+import logging
 import uuid
 from django.db import models
 
+from trip_planner.core.utils import build_ics
+
+logger = logging.getLogger(__name__)
+
 
 class ItineraryStatus(models.TextChoices):
     """Status choices for itinerary generation."""
@@ -27,6 +33,9 @@ class Itinerary(models.Model):
     )
     request_json = models.JSONField(help_text="Original trip request")
     result_json = models.JSONField(null=True, blank=True, help_text="Generated itinerary")
+    # Rendered once from result_json and served as-is; cleared whenever the result is edited
+    result_bytes = models.BinaryField(null=True, blank=True, editable=False)
+    ics_text = models.TextField(null=True, blank=True, editable=False)
     error_message = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True, db_index=True)
@@ -35,6 +44,10 @@ class Itinerary(models.Model):
         db_table = "itineraries"
         ordering = ["-created_at"]
         verbose_name_plural = "Itineraries"
+        indexes = [
+            # Backs status-filtered keyset pages of the list endpoint
+            models.Index(fields=["status", "-created_at", "-id"], name="itineraries_status_created"),
+        ]
 
     def __str__(self):
         dest = self.request_json.get("destination", "Unknown")
@@ -48,10 +61,37 @@ class Itinerary(models.Model):
         self.status = ItineraryStatus.PROCESSING
         self.save(update_fields=["status", "updated_at"])
 
+    def render_artifacts(self):
+        """Encode result_json as compact JSON bytes and as ICS text."""
+        if self.result_json is None:
+            self.result_bytes = self.ics_text = None
+            return
+        self.result_bytes = json.dumps(self.result_json, ensure_ascii=False, separators=(",", ":")).encode()
+        try:
+            self.ics_text = build_ics(self.result_json)
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.warning(f"ICS render failed for {self.id}: {e}")
+            self.ics_text = None
+
+    def refresh_artifacts(self) -> bool:
+        """
+        Render and store artifacts missing after an edit, without touching
+        updated_at (and so the ETag). Returns False if the result is empty.
+        """
+        self.render_artifacts()
+        if self.result_bytes is None:
+            return False
+        # Skipped if the row was edited again since it was read
+        Itinerary.objects.filter(id=self.id, updated_at=self.updated_at).update(
+            result_bytes=self.result_bytes, ics_text=self.ics_text
+        )
+        return True
+
     def mark_completed(self, result: dict):
         self.status = ItineraryStatus.COMPLETED
         self.result_json = result
-        self.save(update_fields=["status", "result_json", "updated_at"])
+        self.render_artifacts()
+        self.save(update_fields=["status", "result_json", "result_bytes", "ics_text", "updated_at"])
 
     def mark_failed(self, error: str):
         self.status = ItineraryStatus.FAILED
@@ -0,0 +1,125 @@
+"""
+Admission control for synchronous generation.
+
+A generation makes roughly GENERATION_GEMINI_CALLS model calls. Before one
+starts, the controller estimates how long it would take: the time until
+that many calls fit under the Gemini quota (see ``gemini_quota``) plus the
+running average generation time. If that goes over GENERATION_SLO_SECONDS,
+or GENERATION_MAX_CONCURRENT generations already hold worker threads, the
+request is shed with a Retry-After estimate instead of sitting in tenacity
+backoff until the worker timeout kills it. State is per process, like the
+other /metrics counters.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+
+from trip_planner.models import Itinerary, ItineraryStatus
+from trip_planner.services.gemini import gemini_quota
+
+# Weight of the newest generation in the running average duration
+DURATION_SMOOTHING = 0.2
+
+
+@dataclass
+class Admission:
+    """Outcome of an admission check."""
+    admitted: bool
+    reason: Optional[str] = None  # "quota" or "busy" when shed
+    retry_after: int = 0
+    expected_seconds: float = 0.0
+
+
+class AdmissionController:
+    """Tracks in-flight generations and decides whether another one may start."""
+
+    def __init__(self, quota=gemini_quota, clock=time.monotonic):
+        self._quota = quota
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._average_seconds = None
+        self._stats = {"admitted": 0, "rejected_quota": 0, "rejected_busy": 0, "queued": 0}
+
+    @property
+    def average_seconds(self) -> float:
+        if self._average_seconds is None:
+            return float(settings.GENERATION_EXPECTED_SECONDS)
+        return self._average_seconds
+
+    def _decide(self) -> Admission:
+        average = self.average_seconds
+        if self._in_flight >= settings.GENERATION_MAX_CONCURRENT:
+            return Admission(False, "busy", max(1, math.ceil(average / 2)), average)
+
+        # In-flight generations are assumed half done
+        calls = settings.GENERATION_GEMINI_CALLS * (1 + self._in_flight / 2)
+        quota_wait = self._quota.seconds_until(math.ceil(calls))
+        expected = quota_wait + average
+        if expected > settings.GENERATION_SLO_SECONDS:
+            return Admission(False, "quota", max(1, math.ceil(quota_wait)), expected)
+        return Admission(True, expected_seconds=expected)
+
+    @contextmanager
+    def generation(self):
+        """
+        Yield an Admission. If it was admitted, the slot is held until the
+        block exits and its duration feeds the average.
+        """
+        with self._lock:
+            admission = self._decide()
+            if admission.admitted:
+                self._in_flight += 1
+                self._stats["admitted"] += 1
+            else:
+                self._stats[f"rejected_{admission.reason}"] += 1
+        if not admission.admitted:
+            yield admission
+            return
+
+        started = self._clock()
+        try:
+            yield admission
+        finally:
+            elapsed = self._clock() - started
+            with self._lock:
+                self._in_flight -= 1
+                if self._average_seconds is None:
+                    self._average_seconds = elapsed
+                else:
+                    self._average_seconds += DURATION_SMOOTHING * (elapsed - self._average_seconds)
+
+    def record_queued(self) -> None:
+        """Count a shed request that was routed to the async queue instead."""
+        with self._lock:
+            self._stats["queued"] += 1
+
+    def metrics(self) -> dict:
+        """Counters, in-flight generations, queued itineraries and quota state."""
+        with self._lock:
+            stats = dict(self._stats)
+            in_flight = self._in_flight
+        return {
+            **stats,
+            "in_flight": in_flight,
+            "max_concurrent": settings.GENERATION_MAX_CONCURRENT,
+            "queue_depth": Itinerary.objects.filter(status=ItineraryStatus.QUEUED).count(),
+            "average_seconds": round(self.average_seconds, 1),
+            "slo_seconds": settings.GENERATION_SLO_SECONDS,
+            "gemini_quota": self._quota.metrics(),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._in_flight = 0
+            self._average_seconds = None
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+admission = AdmissionController()
@@ -0,0 +1,217 @@
+"""
+Places autocomplete with a local prefix index.
+
+Predictions are kept in an in-process trie keyed by normalized prefix and
+in the shared cache. A longer prefix is answered by filtering a shorter
+prefix's predictions when those were exhaustive (fewer than the upstream
+limit) or still fill the limit; Google is only asked on a real miss. Trie
+entries expire after CACHE_TTL_AUTOCOMPLETE like the shared ones, and the
+trie is cleared when the "places" namespace is bumped.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from django.conf import settings
+from trip_planner.core.cache import cache_client
+from trip_planner.core.http import http_client
+from trip_planner.services.geocoding import normalize_name
+
+logger = logging.getLogger(__name__)
+
+MIN_PREFIX = 2
+PREDICTION_LIMIT = 5
+INDEX_MAX_PREFIXES = 5000
+
+
+def _matches(prediction: dict, prefix: str) -> bool:
+    """True if any term of the description starts with the prefix."""
+    description = normalize_name(prediction.get("description", ""))
+    return description.startswith(prefix) or f" {prefix}" in description
+
+
+class _Node:
+    __slots__ = ("children", "entry", "expires_at")
+
+    def __init__(self):
+        self.children = {}
+        self.entry = None
+        self.expires_at = 0.0
+
+
+class PrefixIndex:
+    """Trie of prefix → {"predictions", "exhaustive"}, bounded by LRU eviction and a TTL."""
+
+    def __init__(self, max_prefixes: int = INDEX_MAX_PREFIXES):
+        self.max_prefixes = max_prefixes
+        self._root = _Node()
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = None
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def put(self, prefix: str, entry: dict, ttl: int = None) -> None:
+        expires_at = time.time() + (ttl or settings.CACHE_TTL_AUTOCOMPLETE)
+        with self._lock:
+            node = self._root
+            for char in prefix:
+                node = node.children.setdefault(char, _Node())
+            node.entry = entry
+            node.expires_at = expires_at
+            self._lru[prefix] = None
+            self._lru.move_to_end(prefix)
+            while len(self._lru) > self.max_prefixes:
+                self._remove(self._lru.popitem(last=False)[0])
+
+    def _remove(self, prefix: str) -> None:
+        path = [self._root]
+        for char in prefix:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].entry = None
+        # Prune branches left without entries
+        for depth in range(len(prefix), 0, -1):
+            node = path[depth]
+            if node.entry is not None or node.children:
+                break
+            del path[depth - 1].children[prefix[depth - 1]]
+
+    def longest(self, query: str) -> Optional[tuple]:
+        """(prefix, entry) for the longest unexpired prefix of query, or None."""
+        now = time.time()
+        with self._lock:
+            node, found, expired = self._root, None, []
+            for i, char in enumerate(query):
+                node = node.children.get(char)
+                if node is None:
+                    break
+                if node.entry is None:
+                    continue
+                if node.expires_at <= now:
+                    expired.append(query[:i + 1])
+                else:
+                    found = (query[:i + 1], node.entry)
+            for prefix in expired:
+                del self._lru[prefix]
+                self._remove(prefix)
+            if found:
+                self._lru.move_to_end(found[0])
+            return found
+
+    def sync_version(self, version: int) -> None:
+        """Drop every entry if they were filled under another namespace version."""
+        with self._lock:
+            if version != self.version:
+                self._root = _Node()
+                self._lru.clear()
+                self.version = version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._root = _Node()
+            self._lru.clear()
+
+
+_index = PrefixIndex()
+_stats_lock = threading.Lock()
+_stats = {"local_exact": 0, "local_prefix": 0, "shared": 0, "upstream": 0, "errors": 0}
+
+
+def _count(outcome: str) -> None:
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def _answer(query: str, prefix: str, entry: dict) -> Optional[list]:
+    """Predictions for query from a cached prefix entry, or None if they might be incomplete."""
+    if prefix == query:
+        return entry["predictions"]
+    filtered = [p for p in entry["predictions"] if _matches(p, query)]
+    if entry.get("exhaustive") or len(filtered) >= PREDICTION_LIMIT:
+        return filtered[:PREDICTION_LIMIT]
+    return None
+
+
+def _fetch(query: str, api_key: str) -> list:
+    resp = http_client.get(
+        'https://maps.googleapis.com/maps/api/place/autocomplete/json',
+        params={
+            'input': query,
+            'types': '(cities)',
+            'key': api_key,
+        },
+        timeout=10
+    )
+    resp.raise_for_status()
+    return [
+        {
+            'description': p.get('description'),
+            'place_id': p.get('place_id'),
+        }
+        for p in resp.json().get('predictions', [])[:PREDICTION_LIMIT]
+    ]
+
+
+def autocomplete(query: str) -> list:
+    """City predictions for a query; raises if Google has to be asked and fails."""
+    key = normalize_name(query)
+    if len(key) < MIN_PREFIX:
+        return []
+
+    _index.sync_version(cache_client.current_version("places"))
+    local = _index.longest(key)
+    if local:
+        predictions = _answer(key, *local)
+        if predictions is not None:
+            _count("local_exact" if local[0] == key else "local_prefix")
+            return predictions
+
+    prefixes = [key[:n] for n in range(MIN_PREFIX, len(key) + 1)]
+    shared = cache_client.get_autocomplete_many(prefixes)
+    for prefix in reversed(prefixes):
+        if prefix in shared:
+            _index.put(prefix, shared[prefix])
+            predictions = _answer(key, prefix, shared[prefix])
+            if predictions is not None:
+                _count("shared")
+                return predictions
+            break
+
+    try:
+        predictions = _fetch(query, settings.GOOGLE_PLACES_API_KEY)
+    except Exception:
+        _count("errors")
+        raise
+    _count("upstream")
+
+    entry = {"predictions": predictions, "exhaustive": len(predictions) < PREDICTION_LIMIT}
+    _index.put(key, entry)
+    cache_client.set_autocomplete(key, entry)
+    return predictions
+
+
+def metrics() -> dict:
+    """Lookup outcomes and hit ratio since process start."""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = sum(stats.values())
+    hits = stats["local_exact"] + stats["local_prefix"] + stats["shared"]
+    return {
+        **stats,
+        "hit_ratio": round(hits / total, 4) if total else 0.0,
+        "indexed_prefixes": len(_index),
+    }
+
+
+def clear_index() -> None:
+    """Drop the in-process index and counters (the shared cache is kept)."""
+    _index.clear()
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
@@ -1,42 +1,137 @@
 """
 Currency exchange rate service.
+
+One rate table (every currency against CURRENCY_REFERENCE) is fetched per
+TTL and shared through the cache; each process keeps it as a NumPy array,
+so any cross rate or batch conversion is computed locally. The process copy
+is reloaded when the "currency" namespace is bumped.
 """
 import logging
-import requests
+import threading
+import time
+from typing import Optional, Union
+
+import numpy as np
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from trip_planner.core.cache import cache_client
+from trip_planner.core.http import async_http_client, run_blocking
+from trip_planner.core.memo import memoized
 
 logger = logging.getLogger(__name__)
 
 
-def get_currency_rate(base: str, target: str) -> dict:
-    """Get exchange rate between currencies."""
-    if base.upper() == target.upper():
-        return {"rate": 1.0}
-    
-    cached = cache_client.get_currency_rate(base, target)
+class RateTable:
+    """Rates against one reference currency, indexed for vectorized lookups."""
+
+    def __init__(self, reference: str, rates: dict, expires_at: float, version: int = None):
+        self.reference = reference.upper()
+        self.version = version
+        rates = {code.upper(): float(rate) for code, rate in rates.items() if rate}
+        rates[self.reference] = 1.0
+        self.codes = list(rates)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.rates = np.array([rates[code] for code in self.codes], dtype=float)
+        self.expires_at = expires_at
+
+    def lookup(self, codes) -> np.ndarray:
+        """Units per reference currency for each code; NaN where unknown."""
+        idx = np.array([self.index.get(str(code).upper(), -1) for code in codes], dtype=int)
+        values = np.append(self.rates, np.nan)
+        return values[idx]
+
+    def cross_rates(self, bases, target: str) -> np.ndarray:
+        """Rate from each base to target; 1.0 where either side is unknown."""
+        rates = self.lookup([target])[0] / self.lookup(bases)
+        return np.where(np.isnan(rates), 1.0, rates)
+
+
+_table: Optional[RateTable] = None
+_table_lock = threading.Lock()
+
+
+async def _fetch_table(reference: str, api_key: str) -> dict:
+    resp = await async_http_client.get(
+        "https://api.exchangerate.host/latest",
+        params={"base": reference, "access_key": api_key},
+        timeout=10
+    )
+    resp.raise_for_status()
+    return resp.json().get("rates", {})
+
+
+async def _load_table(reference: str) -> RateTable:
+    now = time.time()
+    cached = await sync_to_async(cache_client.get_rate_table)(reference)
     if cached is not None:
-        return {"rate": cached}
-    
+        expires_at = cached.get("fetched_at", 0) + settings.CACHE_TTL_CURRENCY
+        return RateTable(reference, cached.get("rates", {}), max(expires_at, now + settings.CACHE_TTL_ERROR))
+
     api_key = settings.CURRENCY_API_KEY
     if not api_key:
-        cache_client.set_currency_rate(base, target, 1.0)
-        return {"rate": 1.0}
-    
+        return RateTable(reference, {}, now + settings.CACHE_TTL_CURRENCY)
+
     try:
-        resp = requests.get(
-            "https://api.exchangerate.host/latest",
-            params={"base": base.upper(), "symbols": target.upper(), "access_key": api_key},
-            timeout=10
-        )
-        resp.raise_for_status()
-        rate = resp.json().get("rates", {}).get(target.upper(), 1.0)
-        cache_client.set_currency_rate(base, target, rate)
-        return {"rate": rate}
+        rates = await _fetch_table(reference, api_key)
     except Exception as e:
         logger.error(f"Currency API failed: {e}")
-        cache_client.set_currency_rate(base, target, 1.0)
+        return RateTable(reference, {}, now + settings.CACHE_TTL_ERROR)
+
+    await sync_to_async(cache_client.set_rate_table)(reference, {"base": reference, "rates": rates, "fetched_at": now})
+    return RateTable(reference, rates, now + settings.CACHE_TTL_CURRENCY)
+
+
+def _current_table(reference: str, version: int) -> Optional[RateTable]:
+    with _table_lock:
+        if (_table is not None and _table.reference == reference and _table.version == version
+                and _table.expires_at > time.time()):
+            return _table
+    return None
+
+
+async def aget_rate_table() -> RateTable:
+    """The current rate table, loaded from cache or the API once it expires."""
+    global _table
+    reference = settings.CURRENCY_REFERENCE.upper()
+    version = await sync_to_async(cache_client.current_version)("currency")
+    table = _current_table(reference, version)
+    if table is None:
+        # Not held across the await; concurrent refreshes just load the same table twice
+        table = await _load_table(reference)
+        table.version = version
+        with _table_lock:
+            _table = table
+    return table
+
+
+def get_rate_table() -> RateTable:
+    """The current rate table without leaving sync code when it is still fresh."""
+    version = cache_client.current_version("currency")
+    return _current_table(settings.CURRENCY_REFERENCE.upper(), version) or run_blocking(aget_rate_table)
+
+
+def clear_rates() -> None:
+    """Drop the in-process table (the shared cache entry is kept)."""
+    global _table
+    with _table_lock:
+        _table = None
+
+
+async def aget_currency_rate(base: str, target: str) -> dict:
+    """Get exchange rate between currencies."""
+    if base.upper() == target.upper():
         return {"rate": 1.0}
+    rate = (await aget_rate_table()).cross_rates([base], target)[0]
+    return {"rate": float(rate)}
+
+
+@memoized
+def get_currency_rate(base: str, target: str) -> dict:
+    """Get exchange rate between currencies (blocking)."""
+    if base.upper() == target.upper():
+        return {"rate": 1.0}
+    rate = get_rate_table().cross_rates([base], target)[0]
+    return {"rate": float(rate)}
 
 
 def convert_amount(amount: float, from_curr: str, to_curr: str) -> float:
@@ -45,3 +140,18 @@ def convert_amount(amount: float, from_curr: str, to_curr: str) -> float:
         return amount
     rate = get_currency_rate(from_curr, to_curr).get("rate", 1.0)
     return round(amount * rate, 2)
+
+
+def convert_amounts(amounts: list, from_curr: Union[str, list], to_curr: str) -> list:
+    """
+    Convert many amounts to one currency in a single vectorized pass.
+    `from_curr` is one code for all amounts or a code per amount.
+    """
+    values = np.asarray(amounts, dtype=float)
+    bases = [from_curr] * len(values) if isinstance(from_curr, str) else list(from_curr)
+    if len(bases) != len(values):
+        raise ValueError("from_curr must be a single code or one code per amount")
+    if not len(values):
+        return []
+    rates = get_rate_table().cross_rates(bases, to_curr)
+    return np.round(values * rates, 2).tolist()
@@ -1,6 +1,9 @@
 
 import json
 import logging
+import threading
+import time
+from collections import deque
 from typing import Any, Optional
 
 from google import genai
@@ -13,6 +16,83 @@ from trip_planner.core.utils import best_effort_json
 
 logger = logging.getLogger(__name__)
 
+QUOTA_WINDOW_SECONDS = 60
+
+
+class QuotaTracker:
+    """
+    Gemini calls made in the last minute against GEMINI_REQUESTS_PER_MINUTE,
+    plus a cooldown after the API reports quota exhaustion. Counts are per
+    process; the admission controller reads them before starting work.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls = deque()
+        self._cooldown_until = 0.0
+        self._exhausted = 0
+
+    def _prune(self, now: float) -> None:
+        while self._calls and self._calls[0] <= now - QUOTA_WINDOW_SECONDS:
+            self._calls.popleft()
+
+    def record_call(self) -> None:
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            self._calls.append(now)
+
+    def record_exhausted(self) -> None:
+        with self._lock:
+            self._exhausted += 1
+            self._cooldown_until = max(self._cooldown_until, self._clock() + settings.GEMINI_QUOTA_COOLDOWN_SECONDS)
+
+    def headroom(self) -> int:
+        """Calls that fit in the current window (0 while cooling down)."""
+        with self._lock:
+            now = self._clock()
+            if now < self._cooldown_until:
+                return 0
+            self._prune(now)
+            return max(0, settings.GEMINI_REQUESTS_PER_MINUTE - len(self._calls))
+
+    def seconds_until(self, calls: int) -> float:
+        """Estimated wait before `calls` more requests fit under the quota."""
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            wait = max(0.0, self._cooldown_until - now)
+            limit = settings.GEMINI_REQUESTS_PER_MINUTE
+            overflow = calls - max(0, limit - len(self._calls))
+            if overflow <= 0:
+                return wait
+            # The oldest calls leave the window first; past that, a full window per `limit` calls
+            expiring = min(overflow, len(self._calls))
+            refill = self._calls[expiring - 1] + QUOTA_WINDOW_SECONDS - now if expiring else 0.0
+            refill += (overflow - expiring) * QUOTA_WINDOW_SECONDS / limit
+            return max(wait, refill)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            return {
+                "calls_last_minute": len(self._calls),
+                "limit_per_minute": settings.GEMINI_REQUESTS_PER_MINUTE,
+                "cooldown_seconds": round(max(0.0, self._cooldown_until - now), 1),
+                "exhausted": self._exhausted,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._calls.clear()
+            self._cooldown_until = 0.0
+            self._exhausted = 0
+
+
+gemini_quota = QuotaTracker()
+
 
 class GeminiClient:
     """Client for Google Gemini AI API."""
@@ -86,6 +166,7 @@ class GeminiClient:
                     response_mime_type="application/json",
                 )
 
+                gemini_quota.record_call()
                 response = self.client.models.generate_content(
                     model=model,
                     contents=prompt,
@@ -108,6 +189,7 @@ class GeminiClient:
                      logger.warning(f"Schema-guided generation failed on {model}, retrying without schema: {e}")
                      try:
                         config = types.GenerateContentConfig(temperature=0.4, response_mime_type="application/json")
+                        gemini_quota.record_call()
                         response = self.client.models.generate_content(
                             model=model,
                             contents=prompt,
@@ -126,6 +208,8 @@ class GeminiClient:
         # If all models failed
         if last_exception:
             if self._is_retryable_error(last_exception):
+                 # Every model is out of quota; hold off new generations while tenacity backs off
+                 gemini_quota.record_exhausted()
                  # Logging already done by loop, raise for tenacity
                  raise last_exception 
             raise GeminiError(str(last_exception))
@@ -141,6 +225,7 @@ class GeminiClient:
         
         try:
             image = PIL.Image.open(io.BytesIO(image_bytes))
+            gemini_quota.record_call()
             response = self.client.models.generate_content(
                 model=self.model_name,
                 contents=[prompt, image]
@@ -0,0 +1,312 @@
+"""
+Geocoding index shared by weather, travel time and places.
+
+Names resolve from an in-process index, then the GeocodeEntry table, then
+whichever provider answers first (OpenWeather, Google Geocoding). Anything
+resolved is persisted, so each place is geocoded over the network at most once.
+Timezones come from the gazetteer, Google's Time Zone API, or later from the
+UTC offset in an OpenWeather forecast (``set_timezone``).
+The in-process index is dropped whenever the "geocode" namespace is bumped.
+"""
+import csv
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from trip_planner.core.cache import cache_client
+from trip_planner.core.http import async_http_client, run_blocking
+from trip_planner.core.memo import memoized
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAX_ENTRIES = 10000
+
+_index: OrderedDict = OrderedDict()
+_index_lock = threading.Lock()
+_index_version = None
+
+
+def normalize_name(name: str) -> str:
+    """Case-fold, strip accents and collapse whitespace so spellings share an entry."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    collapsed = re.sub(r"\s*,\s*", ", ", " ".join(stripped.casefold().split()))
+    return collapsed.strip(" ,.")
+
+
+def parse_coords(value: str):
+    """Parse lat,lon from string."""
+    if "," not in value:
+        return None
+    try:
+        parts = value.split(",", 1)
+        return float(parts[0].strip()), float(parts[1].strip())
+    except ValueError:
+        return None
+
+
+def _sync_index_version(version: int) -> None:
+    """Clear the index if the geocode namespace moved since it was filled. Call with the lock held."""
+    global _index_version
+    if version != _index_version:
+        _index.clear()
+        _index_version = version
+
+
+def _index_put(key: str, entry: dict) -> None:
+    version = cache_client.current_version("geocode")
+    with _index_lock:
+        _sync_index_version(version)
+        _index[key] = entry
+        _index.move_to_end(key)
+        while len(_index) > INDEX_MAX_ENTRIES:
+            _index.popitem(last=False)
+
+
+def _index_get(key: str) -> Optional[dict]:
+    version = cache_client.current_version("geocode")
+    with _index_lock:
+        _sync_index_version(version)
+        entry = _index.get(key)
+        if entry is not None:
+            _index.move_to_end(key)
+        return entry
+
+
+def clear_index() -> None:
+    """Drop the in-process index (the table is kept)."""
+    with _index_lock:
+        _index.clear()
+
+
+def lookup(name: str) -> Optional[dict]:
+    """Resolve a name from coordinates, the in-process index or the table. Never hits the network."""
+    coords = parse_coords(name or "")
+    if coords:
+        return {"name": name, "lat": coords[0], "lon": coords[1], "country": "", "timezone": ""}
+
+    key = normalize_name(name)
+    if not key:
+        return None
+
+    entry = _index_get(key)
+    if entry is not None:
+        return entry
+
+    from trip_planner.models import GeocodeEntry
+    try:
+        row = GeocodeEntry.objects.filter(normalized_name=key).first()
+    except Exception as e:
+        logger.warning(f"Geocode index lookup failed: {e}")
+        return None
+    if row is None:
+        return None
+    entry = row.as_dict()
+    _index_put(key, entry)
+    return entry
+
+
+async def _geocode_openweather(name: str, api_key: str) -> Optional[dict]:
+    resp = await async_http_client.get(
+        "https://api.openweathermap.org/geo/1.0/direct",
+        params={"q": name, "limit": 1, "appid": api_key},
+        timeout=15
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    if not data:
+        return None
+    return {"lat": data[0]["lat"], "lon": data[0]["lon"], "country": data[0].get("country", "")}
+
+
+async def _geocode_google(name: str, api_key: str) -> Optional[dict]:
+    resp = await async_http_client.get(
+        "https://maps.googleapis.com/maps/api/geocode/json",
+        params={"address": name, "key": api_key},
+        timeout=15
+    )
+    resp.raise_for_status()
+    results = resp.json().get("results", [])
+    if not results:
+        return None
+    location = results[0]["geometry"]["location"]
+    country = next(
+        (c.get("short_name", "") for c in results[0].get("address_components", [])
+         if "country" in c.get("types", [])),
+        ""
+    )
+    timezone = await _timezone_google(location["lat"], location["lng"], api_key)
+    return {"lat": location["lat"], "lon": location["lng"], "country": country, "timezone": timezone}
+
+
+async def _timezone_google(lat: float, lon: float, api_key: str) -> str:
+    """IANA timezone for a coordinate from the Time Zone API, or "" if it cannot say."""
+    try:
+        resp = await async_http_client.get(
+            "https://maps.googleapis.com/maps/api/timezone/json",
+            params={"location": f"{lat},{lon}", "timestamp": int(time.time()), "key": api_key},
+            timeout=15
+        )
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception as e:
+        logger.warning(f"Time zone lookup failed for {lat},{lon}: {e}")
+        return ""
+    return data.get("timeZoneId", "") if data.get("status") == "OK" else ""
+
+
+def utc_offset_name(seconds: int) -> str:
+    """"UTC+05:30" for an offset in seconds, as OpenWeather reports it."""
+    sign = "+" if seconds >= 0 else "-"
+    hours, minutes = divmod(abs(int(seconds)) // 60, 60)
+    return f"UTC{sign}{hours:02d}:{minutes:02d}"
+
+
+@memoized
+async def ageocode(name: str) -> Optional[dict]:
+    """Resolve a name to {name, lat, lon, country, timezone}, asking providers on an index miss."""
+    entry = await sync_to_async(lookup)(name)
+    if entry is not None:
+        return entry
+
+    key = normalize_name(name)
+    if not key:
+        return None
+
+    if await sync_to_async(cache_client.is_geocode_miss)(key):
+        return None
+
+    providers = [
+        ("openweather", _geocode_openweather, settings.OPENWEATHER_API_KEY),
+        ("google", _geocode_google, settings.GOOGLE_PLACES_API_KEY),
+    ]
+    asked = False
+    for source, provider, api_key in providers:
+        if not api_key:
+            continue
+        asked = True
+        try:
+            result = await provider(name, api_key)
+        except Exception as e:
+            logger.warning(f"Geocoding via {source} failed for {name}: {e}")
+            continue
+        if result:
+            return await sync_to_async(remember)(name, result["lat"], result["lon"],
+                                                 country=result.get("country", ""),
+                                                 timezone=result.get("timezone", ""), source=source)
+
+    if asked:
+        await sync_to_async(cache_client.set_geocode_miss)(key)
+    return None
+
+
+def geocode(name: str) -> Optional[dict]:
+    """Blocking wrapper around ageocode."""
+    return run_blocking(ageocode, name)
+
+
+def remember(name: str, lat: float, lon: float, country: str = "",
+             timezone: str = "", source: str = "manual") -> dict:
+    """Store a resolved name in the table and the in-process index."""
+    from trip_planner.models import GeocodeEntry
+
+    key = normalize_name(name)
+    entry = {"name": name, "lat": lat, "lon": lon, "country": country, "timezone": timezone}
+    try:
+        GeocodeEntry.objects.update_or_create(
+            normalized_name=key,
+            defaults={"name": name[:255], "lat": lat, "lon": lon, "country": country,
+                      "timezone": timezone, "source": source},
+        )
+    except Exception as e:
+        logger.warning(f"Geocode index write failed: {e}")
+    _index_put(key, entry)
+    return entry
+
+
+def set_timezone(name: str, timezone: str) -> None:
+    """Fill in the timezone of an indexed name that does not have one yet."""
+    from trip_planner.models import GeocodeEntry
+
+    key = normalize_name(name)
+    if not key or not timezone:
+        return
+    try:
+        GeocodeEntry.objects.filter(normalized_name=key, timezone="").update(timezone=timezone)
+    except Exception as e:
+        logger.warning(f"Geocode timezone write failed: {e}")
+    with _index_lock:
+        entry = _index.get(key)
+        if entry is not None and not entry.get("timezone"):
+            _index[key] = {**entry, "timezone": timezone}
+
+
+def remember_many(entries: list, source: str) -> int:
+    """Add many {name, lat, lon, ...} entries, keeping any that are already indexed."""
+    from trip_planner.models import GeocodeEntry
+
+    rows = {}
+    for item in entries:
+        key = normalize_name(item.get("name", ""))
+        if key and item.get("lat") is not None and item.get("lon") is not None:
+            rows[key] = GeocodeEntry(
+                normalized_name=key, name=item["name"][:255], lat=item["lat"], lon=item["lon"],
+                country=item.get("country", ""), timezone=item.get("timezone", ""), source=source,
+            )
+    if not rows:
+        return 0
+    try:
+        GeocodeEntry.objects.bulk_create(list(rows.values()), ignore_conflicts=True)
+    except Exception as e:
+        logger.warning(f"Geocode index bulk write failed: {e}")
+        return 0
+    return len(rows)
+
+
+def import_gazetteer(path: str, source: str = "gazetteer", batch_size: int = 1000) -> int:
+    """
+    Bulk import a CSV with columns name,lat,lon[,country][,timezone].
+    Existing names are overwritten. Returns the number of rows imported.
+    """
+    from trip_planner.models import GeocodeEntry
+
+    def flush(batch: dict) -> None:
+        GeocodeEntry.objects.bulk_create(
+            list(batch.values()),
+            update_conflicts=True,
+            unique_fields=["normalized_name"],
+            update_fields=["name", "lat", "lon", "country", "timezone", "source"],
+        )
+
+    imported = 0
+    batch = {}
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            key = normalize_name(row.get("name", ""))
+            try:
+                lat, lon = float(row["lat"]), float(row["lon"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not key:
+                continue
+            batch[key] = GeocodeEntry(
+                normalized_name=key, name=row["name"].strip()[:255], lat=lat, lon=lon,
+                country=(row.get("country") or "").strip(),
+                timezone=(row.get("timezone") or "").strip(), source=source,
+            )
+            if len(batch) >= batch_size:
+                flush(batch)
+                imported += len(batch)
+                batch = {}
+    if batch:
+        flush(batch)
+        imported += len(batch)
+
+    clear_index()
+    return imported
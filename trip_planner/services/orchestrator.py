@@ -6,11 +6,13 @@ from datetime import datetime, timezone
 
 from trip_planner.agents import (
     PlannerAgent, ResearchAgent, WeatherAgent, AttractionsAgent,
-    SchedulerAgent, FoodAgent, BudgetAgent, ValidatorAgent
+    SchedulerAgent, FoodAgent, BudgetAgent, ValidatorAgent, AlternativesAgent
 )
+from trip_planner.agents.alternatives import slot_id
 from trip_planner.services.gemini import gemini_client
 from trip_planner.models import AgentTrace
 from trip_planner.core.exceptions import GeminiError
+from trip_planner.core.memo import memo_scope
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +50,15 @@ def _persist_result(itinerary, agent_name: str, input_data: dict, output_data: d
 
 def generate_itinerary(trip: dict, itinerary) -> dict:
     """Generate complete itinerary by orchestrating all agents."""
+    with memo_scope() as memo:
+        response = _run_agents(trip, itinerary)
+        stats = memo.stats()
+    _store_trace(itinerary, "orchestrator", "memo", None, stats)
+    logger.info(f"Service calls saved by memoization: {stats['calls_saved']}")
+    return response
+
+
+def _run_agents(trip: dict, itinerary) -> dict:
     logger.info(f"Starting generation for {trip.get('destination')}")
     
     client = gemini_client if gemini_client.is_available else None
@@ -64,6 +75,7 @@ def generate_itinerary(trip: dict, itinerary) -> dict:
     food = FoodAgent(client)
     budget = BudgetAgent(client)
     validator = ValidatorAgent()
+    alternatives = AlternativesAgent(client)
     
     # 1. Research
     research_context = ""
@@ -145,11 +157,20 @@ def generate_itinerary(trip: dict, itinerary) -> dict:
     
     # 8. Validator
     time.sleep(1)  # Rate limit buffer
-    validator_result = validator.run(trip=trip, scheduler_output=scheduler_result.data)
+    validator_result = validator.run(trip=trip, scheduler_output=scheduler_result.data, check_travel=True)
     _persist_result(itinerary, "validator", {"trip": trip}, validator_result.data,
                     validator_result.drafts, validator_result.issues)
     
-    # 9. Travel options
+    # 9. Alternatives for instant swaps
+    time.sleep(1)  # Rate limit buffer
+    alternatives_result = alternatives.run(
+        trip=trip, scheduler_output=scheduler_result.data, attractions_output=attractions_result.data
+    )
+    _persist_result(itinerary, "alternatives", {"trip": trip}, alternatives_result.data,
+                    alternatives_result.drafts, alternatives_result.issues)
+    alternatives_by_slot = alternatives_result.data.get("alternatives", {})
+    
+    # 10. Travel options
     travel_data = research.get_travel_options(trip)
     
     # Build final response
@@ -160,8 +181,12 @@ def generate_itinerary(trip: dict, itinerary) -> dict:
     meals_by_date = {d.get("date"): d.get("meals", []) for d in food_result.data.get("days", [])}
     
     days = []
-    for day in scheduler_result.data.get("days", []):
+    for day_index, day in enumerate(scheduler_result.data.get("days", [])):
         day_date = day.get("date")
+        for block_index, block in enumerate(day.get("schedule", [])):
+            options = alternatives_by_slot.get(slot_id(day_index, block_index))
+            if options:
+                block["alternatives"] = options
         days.append({
             "date": day_date,
             "title": f"{dest} - Day",
@@ -1,13 +1,35 @@
 """
 Google Places API service.
 """
+import asyncio
 import logging
-import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from trip_planner.core.cache import cache_client
+from trip_planner.core.http import async_http_client, run_blocking
+from trip_planner.core.memo import memoized
+from trip_planner.services.geocoding import ageocode, remember_many
+from trip_planner.services.travel_estimate import haversine_km
 
 logger = logging.getLogger(__name__)
 
+ATTRACTIONS_LIMIT = 12
+INTEREST_MAX_PAGES = 2
+INTEREST_CONCURRENCY = 4
+# Ratings are pulled towards the prior until a place has enough reviews
+RATING_PRIOR = 3.5
+RATING_PRIOR_WEIGHT = 50
+INTEREST_OVERLAP_BONUS = 0.05
+
+# Place Details field mask: only what scheduling needs is requested (and billed)
+DETAILS_FIELDS = "place_id,geometry/location,opening_hours,website,url,utc_offset"
+DETAILS_CONCURRENCY = 8
+
+COMFORT_TIERS = ("budget", "midrange", "luxury")
+HOTELS_PER_TIER = 5
+LODGING_MAX_PAGES = 2
+NEXT_PAGE_DELAY = 2  # seconds before a next_page_token becomes valid
+
 
 def _stub_attractions(destination: str) -> dict:
     """Stub data when API unavailable."""
@@ -23,108 +45,336 @@ def _stub_attractions(destination: str) -> dict:
     }
 
 
-def _stub_hotels(destination: str, comfort: str) -> dict:
-    """Stub hotel data."""
+def _stub_lodging(destination: str) -> list:
+    """Stub hotel data for every comfort tier."""
+    names = {"budget": ("Hostel", "Guesthouse"), "midrange": ("Inn", "Suites"), "luxury": ("Grand", "Palace")}
+    return [
+        {"name": f"{destination} {name} ({tier})", "rating": rating,
+         "address": "City Center", "price_level": tier, "tier": tier}
+        for tier, pair in names.items()
+        for name, rating in zip(pair, (4.5, 4.0))
+    ]
+
+
+def _index_locations(results: list, destination: str) -> None:
+    """
+    Feed place coordinates from search results into the shared geocoding
+    index. Bare names ("Hilton", "Old Town") repeat across cities, so they are
+    qualified with the destination; the formatted address is indexed as is.
+    """
+    entries = []
+    for item in results:
+        location = (item.get("geometry") or {}).get("location") or {}
+        if not item.get("name") or not location:
+            continue
+        coords = {"lat": location.get("lat"), "lon": location.get("lng")}
+        entries.append({"name": f"{item['name']}, {destination}", **coords})
+        if item.get("formatted_address"):
+            entries.append({"name": item["formatted_address"], **coords})
+    remember_many(entries, source="places")
+
+
+def _interest_result(item: dict) -> dict:
+    """Keep only the fields ranking and the attraction payload need."""
     return {
-        "hotels": [
-            {"name": f"{destination} Grand ({comfort})", "rating": 4.5, 
-             "address": "Downtown", "price_level": comfort},
-            {"name": f"{destination} Inn ({comfort})", "rating": 4.0, 
-             "address": "City Center", "price_level": comfort},
-        ]
+        "place_id": item.get("place_id") or item.get("name"),
+        "name": item.get("name"),
+        "rating": item.get("rating"),
+        "user_ratings_total": item.get("user_ratings_total", 0),
+        "types": item.get("types") or [],
+        "address": item.get("formatted_address"),
+        "lat": ((item.get("geometry") or {}).get("location") or {}).get("lat"),
+        "lon": ((item.get("geometry") or {}).get("location") or {}).get("lng"),
     }
 
 
-def get_attractions(destination: str, interests: list = None) -> dict:
-    """Fetch attractions from Google Places API."""
-    interests = interests or []
-    interest_key = "-".join(sorted(interests)) if interests else "general"
+async def _search_interests(destination: str, interests: list, api_key: str) -> dict:
+    """Run one text search per interest concurrently; returns {interest: raw results or the exception raised}."""
+    limit = asyncio.Semaphore(INTEREST_CONCURRENCY)
+
+    async def search(interest: str):
+        query = f"top attractions in {destination}" if interest == "general" else f"{interest} in {destination}"
+        async with limit:
+            try:
+                return await _text_search_pages(query, api_key, INTEREST_MAX_PAGES)
+            except Exception as e:
+                logger.error(f"Places API failed for '{interest}': {e}")
+                return e
+
+    return dict(zip(interests, await asyncio.gather(*(search(i) for i in interests))))
+
+
+def _rank_attractions(per_interest: dict) -> list:
+    """Merge interest results by place_id and rank by review-weighted rating and interest overlap."""
+    merged = {}
+    for interest, payload in per_interest.items():
+        for item in payload.get("results", []):
+            entry = merged.setdefault(item["place_id"], {**item, "interests": []})
+            if interest not in entry["interests"]:
+                entry["interests"].append(interest)
+
+    def score(item: dict) -> float:
+        rating = item.get("rating") or 3.5
+        reviews = item.get("user_ratings_total") or 0
+        weighted = (rating * reviews + RATING_PRIOR * RATING_PRIOR_WEIGHT) / (reviews + RATING_PRIOR_WEIGHT)
+        return min(1.0, max(0.1, weighted / 5 + INTEREST_OVERLAP_BONUS * (len(item["interests"]) - 1)))
+
+    attractions = []
+    for item in sorted(merged.values(), key=score, reverse=True)[:ATTRACTIONS_LIMIT]:
+        types_list = item["types"] or ["attraction"]
+        attractions.append({
+            "name": item["name"],
+            "place_id": item["place_id"],
+            "reason": types_list[0].replace("_", " ").title(),
+            "score": round(score(item), 3),
+            "distance_km": 2.0,
+            "categories": item["types"],
+            "address": item["address"],
+            "lat": item.get("lat"),
+            "lon": item.get("lon"),
+        })
+    return attractions
+
+
+def _details_result(result: dict) -> dict:
+    location = (result.get("geometry") or {}).get("location") or {}
+    hours = result.get("opening_hours") or {}
+    return {
+        "lat": location.get("lat"),
+        "lon": location.get("lng"),
+        "opening_hours": hours.get("weekday_text", []),
+        "periods": hours.get("periods", []),
+        "website": result.get("website"),
+        "maps_url": result.get("url"),
+        "utc_offset": result.get("utc_offset"),
+    }
+
+
+async def _fetch_place_details(place_id: str, api_key: str) -> dict:
+    resp = await async_http_client.get(
+        "https://maps.googleapis.com/maps/api/place/details/json",
+        params={"place_id": place_id, "fields": DETAILS_FIELDS, "key": api_key},
+        timeout=15
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    if data.get("status", "OK") != "OK":
+        raise ValueError(f"Place Details status {data.get('status')}")
+    return _details_result(data.get("result", {}))
+
+
+@memoized
+async def aget_place_details(place_ids: list) -> dict:
+    """
+    Details (coordinates, opening hours, website) for many places, keyed by place_id.
+    Each place is cached on its own, so any query returning it reuses the entry;
+    misses are fetched concurrently, at most DETAILS_CONCURRENCY at a time.
+    """
+    ids = list(dict.fromkeys(p for p in place_ids if p))
+    if not ids:
+        return {}
     
-    cached = cache_client.get_places(destination, interest_key)
-    if cached:
-        return cached
+    found = await sync_to_async(cache_client.get_place_details_many)(ids)
+    missing = [p for p in ids if p not in found]
+    api_key = settings.GOOGLE_PLACES_API_KEY
+    if missing and api_key:
+        limit = asyncio.Semaphore(DETAILS_CONCURRENCY)
+        
+        async def fetch(place_id: str):
+            async with limit:
+                try:
+                    return await _fetch_place_details(place_id, api_key)
+                except Exception as e:
+                    logger.warning(f"Place Details failed for {place_id}: {e}")
+                    return None
+        
+        results = await asyncio.gather(*(fetch(p) for p in missing))
+        fetched = {p: details for p, details in zip(missing, results) if details is not None}
+        if fetched:
+            await sync_to_async(cache_client.set_place_details_many)(fetched)
+        found.update(fetched)
+    
+    return {p: found[p] for p in ids if p in found}
+
+
+def get_place_details(place_ids: list) -> dict:
+    """Blocking wrapper around aget_place_details."""
+    return run_blocking(aget_place_details, place_ids)
+
+
+async def _enrich_attractions(destination: str, attractions: list) -> None:
+    """Add coordinates, hours and website from place details, and real distances from the center."""
+    details = await aget_place_details([a["place_id"] for a in attractions if a["place_id"] != a["name"]])
+    for attraction in attractions:
+        extra = details.get(attraction["place_id"]) or {}
+        if attraction.get("lat") is None and extra.get("lat") is not None:
+            attraction["lat"], attraction["lon"] = extra["lat"], extra["lon"]
+        attraction["opening_hours"] = extra.get("opening_hours", [])
+        attraction["website"] = extra.get("website") or extra.get("maps_url")
+    
+    located = [a for a in attractions if a.get("lat") is not None and a.get("lon") is not None]
+    center = await ageocode(destination) if located else None
+    if center:
+        km = haversine_km([center["lat"]], [center["lon"]],
+                          [a["lat"] for a in located], [a["lon"] for a in located])[0]
+        for attraction, distance in zip(located, km):
+            attraction["distance_km"] = round(float(distance), 1)
+
+
+async def aget_attractions(destination: str, interests: list = None) -> dict:
+    """
+    Fetch attractions from Google Places API.
+
+    Each interest is its own search and cache entry, so changing one interest
+    only costs one new query. Results are merged by place_id and ranked locally.
+    """
+    interests = sorted({i.strip().lower() for i in interests or [] if i and i.strip()}) or ["general"]
     
     api_key = settings.GOOGLE_PLACES_API_KEY
     if not api_key:
+        cached = await sync_to_async(cache_client.get_places)(destination, "stub")
+        if cached:
+            return cached
         payload = _stub_attractions(destination)
-        cache_client.set_places(destination, interest_key, payload, ttl=settings.CACHE_TTL_ERROR)
+        await sync_to_async(cache_client.set_places)(destination, "stub", payload, ttl=settings.CACHE_TTL_ERROR)
         return payload
     
-    query = f"top attractions in {destination}"
-    if interests:
-        query = f"{', '.join(interests)} in {destination}"
+    keys = {f"interest:{interest}": interest for interest in interests}
+    found = await sync_to_async(cache_client.get_places_many)(destination, list(keys))
+    per_interest = {keys[key]: value for key, value in found.items()}
     
-    try:
-        resp = requests.get(
+    missing = [interest for interest in interests if interest not in per_interest]
+    if missing:
+        fetched = {}
+        for interest, results in (await _search_interests(destination, missing, api_key)).items():
+            if isinstance(results, Exception):
+                fetched[interest] = {"results": [], "error": str(results)}
+            else:
+                await sync_to_async(_index_locations)(results, destination)
+                fetched[interest] = {"results": [_interest_result(item) for item in results]}
+        ok = {f"interest:{i}": p for i, p in fetched.items() if "error" not in p}
+        failed = {f"interest:{i}": p for i, p in fetched.items() if "error" in p}
+        if ok:
+            await sync_to_async(cache_client.set_places_many)(destination, ok)
+        if failed:
+            await sync_to_async(cache_client.set_places_many)(destination, failed, ttl=settings.CACHE_TTL_ERROR)
+        per_interest.update(fetched)
+    
+    if all("error" in payload for payload in per_interest.values()):
+        return _stub_attractions(destination)
+    
+    attractions = _rank_attractions(per_interest)
+    await _enrich_attractions(destination, attractions)
+    return {"attractions": attractions}
+
+
+@memoized
+def get_attractions(destination: str, interests: list = None) -> dict:
+    """Blocking wrapper around aget_attractions."""
+    return run_blocking(aget_attractions, destination, interests)
+
+
+def _comfort_tier(item: dict) -> str:
+    """Map a Places result to a comfort tier by price_level, or by rating when unpriced."""
+    price_level = item.get("price_level")
+    if price_level is not None:
+        return "budget" if price_level <= 1 else "midrange" if price_level == 2 else "luxury"
+    rating = item.get("rating") or 0
+    return "luxury" if rating >= 4.6 else "budget" if rating < 3.8 else "midrange"
+
+
+async def _text_search_pages(query: str, api_key: str, max_pages: int) -> list:
+    """Run a text search, following next_page_token for up to max_pages pages."""
+    results = []
+    params = {"query": query, "key": api_key}
+    for page in range(max_pages):
+        resp = await async_http_client.get(
             "https://maps.googleapis.com/maps/api/place/textsearch/json",
-            params={"query": query, "key": api_key},
+            params=params,
             timeout=20
         )
         resp.raise_for_status()
         data = resp.json()
-    except Exception as e:
-        logger.error(f"Places API failed: {e}")
-        payload = _stub_attractions(destination)
-        cache_client.set_places(destination, interest_key, payload, ttl=settings.CACHE_TTL_ERROR)
-        return payload
-    
-    attractions = []
-    for item in data.get("results", [])[:12]:
-        rating = item.get("rating", 3.5)
-        # Safe access to types
-        types_list = item.get("types") or ["attraction"]
-        
-        attractions.append({
-            "name": item.get("name"),
-            "reason": types_list[0].replace("_", " ").title(),
-            "score": min(1.0, max(0.1, rating / 5)),
-            "distance_km": 2.0,
-            "categories": item.get("types", []),
-            "address": item.get("formatted_address"),
-        })
-    
-    payload = {"attractions": attractions}
-    cache_client.set_places(destination, interest_key, payload)
-    return payload
+        results.extend(data.get("results", []))
+        token = data.get("next_page_token")
+        if not token or page + 1 >= max_pages:
+            break
+        await asyncio.sleep(NEXT_PAGE_DELAY)
+        params = {"pagetoken": token, "key": api_key}
+    return results
 
 
-def get_hotels(destination: str, comfort_level: str = "midrange") -> dict:
-    """Fetch hotels from Google Places API."""
-    cache_key = f"hotels:{comfort_level}"
-    
-    cached = cache_client.get_places(destination, cache_key)
+@memoized
+async def aget_lodging(destination: str) -> dict:
+    """
+    All hotels for a destination across comfort tiers, from one paginated
+    search cached per destination. Stubs and errors are cached briefly too.
+    """
+    cached = await sync_to_async(cache_client.get_places)(destination, "lodging")
     if cached:
         return cached
     
     api_key = settings.GOOGLE_PLACES_API_KEY
     if not api_key:
-        return _stub_hotels(destination, comfort_level)
-    
-    keywords = {"luxury": "5 star hotel luxury", "budget": "cheap hotel hostel", "midrange": "3 star hotel"}
-    query = f"{keywords.get(comfort_level, 'hotel')} in {destination}"
+        payload = {"lodging": _stub_lodging(destination)}
+        await sync_to_async(cache_client.set_places)(destination, "lodging", payload, ttl=settings.CACHE_TTL_ERROR)
+        return payload
     
     try:
-        resp = requests.get(
-            "https://maps.googleapis.com/maps/api/place/textsearch/json",
-            params={"query": query, "key": api_key},
-            timeout=20
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        results = await _text_search_pages(f"hotels in {destination}", api_key, LODGING_MAX_PAGES)
     except Exception as e:
         logger.error(f"Hotels API failed: {e}")
-        return {"hotels": [], "error": str(e)}
+        payload = {"lodging": [], "error": str(e)}
+        await sync_to_async(cache_client.set_places)(destination, "lodging", payload, ttl=settings.CACHE_TTL_ERROR)
+        return payload
     
-    hotels = [
+    await sync_to_async(_index_locations)(results, destination)
+    
+    lodging = [
         {
             "name": item.get("name"),
             "rating": item.get("rating", 0),
             "address": item.get("formatted_address"),
             "price_level": item.get("price_level", 2),
+            "tier": _comfort_tier(item),
         }
-        for item in data.get("results", [])[:5]
+        for item in results
     ]
     
+    payload = {"lodging": lodging}
+    await sync_to_async(cache_client.set_places)(destination, "lodging", payload)
+    return payload
+
+
+def get_lodging(destination: str) -> dict:
+    """Blocking wrapper around aget_lodging."""
+    return run_blocking(aget_lodging, destination)
+
+
+def _partition_hotels(lodging: dict, comfort_level: str) -> dict:
+    """Hotels for one comfort level out of a destination's lodging set."""
+    target = COMFORT_TIERS.index(comfort_level) if comfort_level in COMFORT_TIERS else 1
+    
+    # The requested tier, or the nearest tier that has anything; best rated first
+    by_distance = {}
+    for hotel in lodging.get("lodging", []):
+        distance = abs(COMFORT_TIERS.index(hotel.get("tier", "midrange")) - target)
+        by_distance.setdefault(distance, []).append(hotel)
+    ranked = sorted(by_distance[min(by_distance)], key=lambda h: -(h.get("rating") or 0)) if by_distance else []
+    hotels = [{k: v for k, v in h.items() if k != "tier"} for h in ranked[:HOTELS_PER_TIER]]
+    
     payload = {"hotels": hotels}
-    cache_client.set_places(destination, cache_key, payload)
+    if "error" in lodging:
+        payload["error"] = lodging["error"]
     return payload
+
+
+async def aget_hotels(destination: str, comfort_level: str = "midrange") -> dict:
+    """Best hotels for a comfort level, partitioned from the destination's lodging set."""
+    return _partition_hotels(await aget_lodging(destination), comfort_level)
+
+
+@memoized
+def get_hotels(destination: str, comfort_level: str = "midrange") -> dict:
+    """Blocking wrapper around aget_hotels."""
+    return run_blocking(aget_hotels, destination, comfort_level)
@@ -0,0 +1,205 @@
+"""
+Deterministic edits for mechanical block instructions.
+
+"move to 3pm", "make it 30 minutes longer", "delete", "swap with next" and
+"shift by 1 hour" are parsed locally and applied to the day's blocks in
+microseconds. Later blocks are pushed forward wherever an edit makes them
+overlap; an edit that would overlap the block before it is left to Gemini,
+like instructions the parser does not recognise. The split is counted for
+/metrics.
+"""
+import re
+import threading
+from datetime import time
+from typing import Optional
+
+DAY_MINUTES = 24 * 60
+
+_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "half an": 0.5, "half a": 0.5}
+_AMOUNT = r"(?P<amount>\d+(?:\.\d+)?|half an?|an?|one|two|three|four)"
+_UNIT = r"\s*(?P<unit>minutes?|mins?|m|hours?|hrs?|h)"
+_TARGET = r"(?:\s+(?:it|this|the block|this block|the activity|this activity))?"
+_CLOCK = r"(?P<time>noon|midday|\d{1,2}(?::\d{2})?\s*(?:am|pm)?)"
+
+_DELETE = re.compile(rf"^(?:please\s+)?(?:delete|remove|cancel|drop|skip){_TARGET}$")
+_SWAP = re.compile(rf"^swap{_TARGET}\s+with\s+(?:the\s+)?(?P<which>next|previous|prev)(?:\s+(?:one|block|activity))?$")
+_MOVE_TO = re.compile(rf"^(?:move|start|reschedule|change){_TARGET}\s+(?:to|at|for)\s+{_CLOCK}$")
+_RESIZE = re.compile(rf"^(?:make{_TARGET}\s+)?{_AMOUNT}{_UNIT}\s+(?P<direction>longer|shorter)$")
+_RESIZE_BY = re.compile(rf"^(?P<verb>extend|lengthen|shorten){_TARGET}\s+by\s+{_AMOUNT}{_UNIT}$")
+_SHIFT = re.compile(
+    rf"^(?P<verb>shift|move|push|delay|bring){_TARGET}(?:\s+(?P<pre>back|forward|later|earlier))?"
+    rf"\s+(?:by\s+)?{_AMOUNT}{_UNIT}(?:\s+(?P<post>later|earlier))?$"
+)
+
+_stats_lock = threading.Lock()
+_stats = {"local": 0, "llm": 0}
+
+
+def _minutes(amount: str, unit: str) -> int:
+    value = _WORDS[amount] if amount in _WORDS else float(amount)
+    return int(round(value * 60 if unit.startswith("h") else value))
+
+
+def _clock_minutes(text: str) -> Optional[int]:
+    if text in ("noon", "midday"):
+        return 12 * 60
+    match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?", text)
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    elif match.group(2) is None and 1 <= hour <= 7:
+        # "move to 3" means the afternoon
+        hour += 12
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def parse_instruction(instruction: str) -> Optional[dict]:
+    """The edit an instruction describes, or None if it needs the model."""
+    text = re.sub(r"\s+", " ", instruction.strip().lower()).rstrip(".!")
+    if _DELETE.match(text):
+        return {"op": "delete"}
+    if match := _SWAP.match(text):
+        return {"op": "swap", "offset": 1 if match["which"] == "next" else -1}
+    if match := _MOVE_TO.match(text):
+        start = _clock_minutes(match["time"])
+        return {"op": "move", "start": start} if start is not None else None
+    if match := _RESIZE.match(text):
+        delta = _minutes(match["amount"], match["unit"])
+        return {"op": "resize", "delta": delta if match["direction"] == "longer" else -delta}
+    if match := _RESIZE_BY.match(text):
+        delta = _minutes(match["amount"], match["unit"])
+        return {"op": "resize", "delta": -delta if match["verb"] == "shorten" else delta}
+    if match := _SHIFT.match(text):
+        delta = _minutes(match["amount"], match["unit"])
+        earlier = match["pre"] in ("earlier", "forward") or match["post"] == "earlier"
+        return {"op": "shift", "delta": -delta if earlier else delta}
+    return None
+
+
+def _to_minutes(value) -> int:
+    if isinstance(value, str):
+        value = time.fromisoformat(value)
+    return value.hour * 60 + value.minute
+
+
+def _to_time(minutes: int) -> time:
+    return time(minutes // 60, minutes % 60)
+
+
+def _span(block: dict) -> tuple:
+    return _to_minutes(block["start_time"]), _to_minutes(block["end_time"])
+
+
+def _place(block: dict, start: int, end: int) -> dict:
+    return {**block, "start_time": _to_time(start), "end_time": _to_time(end)}
+
+
+def _cascade(blocks: list, first: int) -> list:
+    """
+    Push blocks after `first` forward until none overlaps the one before it.
+    Raises ValueError if that runs past midnight.
+    """
+    for j in range(first + 1, len(blocks)):
+        previous_end = _span(blocks[j - 1])[1]
+        start, end = _span(blocks[j])
+        if start < previous_end:
+            blocks[j] = _place(blocks[j], previous_end, previous_end + end - start)
+    return blocks
+
+
+def apply_edit(blocks: list, index: int, edit: dict) -> Optional[tuple]:
+    """
+    (new day blocks, position of the edited block or None if deleted), or
+    None if the edit cannot be applied (no neighbour, past midnight, zero
+    length, or overlapping the block before it).
+    Raises ValueError if the cascade runs past midnight.
+    """
+    blocks = list(blocks)
+    start, end = _span(blocks[index])
+
+    if edit["op"] == "delete":
+        del blocks[index]
+        return blocks, None
+
+    if edit["op"] == "swap":
+        other = index + edit["offset"]
+        if not 0 <= other < len(blocks):
+            return None
+        first, second = sorted((index, other))
+        a_start, a_end = _span(blocks[first])
+        b_start, b_end = _span(blocks[second])
+        gap = max(0, b_start - a_end)
+        moved_start = a_start + b_end - b_start + gap
+        blocks[first], blocks[second] = (
+            _place(blocks[second], a_start, a_start + b_end - b_start),
+            _place(blocks[first], moved_start, moved_start + a_end - a_start),
+        )
+        position, cascade_from = other, first
+    else:
+        if edit["op"] == "move":
+            start, end = edit["start"], edit["start"] + end - start
+        elif edit["op"] == "shift":
+            start, end = start + edit["delta"], end + edit["delta"]
+        elif edit["op"] == "resize":
+            end += edit["delta"]
+        if start < 0 or end <= start or end >= DAY_MINUTES:
+            return None
+        edited = _place(blocks[index], start, end)
+        del blocks[index]
+        # Keep the day in time order; the edited block goes before others starting with it
+        position = next((j for j, block in enumerate(blocks) if _span(block)[0] >= start), len(blocks))
+        blocks.insert(position, edited)
+        # The edited block keeps the requested time; only blocks after it move
+        cascade_from = position
+
+    # Only later blocks are moved, so an overlap with the earlier neighbour needs the model
+    if cascade_from > 0 and _span(blocks[cascade_from - 1])[1] > _span(blocks[cascade_from])[0]:
+        return None
+    _cascade(blocks, cascade_from)
+    return blocks, position
+
+
+def edit_locally(instruction: str, blocks: list, index: int) -> Optional[dict]:
+    """
+    {"blocks", "block", "deleted", "op"} for a mechanical instruction, or None
+    if the model has to handle it.
+    """
+    edit = parse_instruction(instruction)
+    if edit is None or not 0 <= index < len(blocks):
+        return None
+    try:
+        applied = apply_edit(blocks, index, edit)
+    except (KeyError, TypeError, ValueError):
+        return None
+    if applied is None:
+        return None
+    new_blocks, position = applied
+    return {
+        "blocks": new_blocks,
+        "block": new_blocks[position] if position is not None else None,
+        "deleted": position is None,
+        "op": edit["op"],
+    }
+
+
+def record(source: str) -> None:
+    """Count an edit handled "local"ly or by the "llm"."""
+    with _stats_lock:
+        _stats[source] += 1
+
+
+def metrics() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["local"] + stats["llm"]
+    return {**stats, "local_ratio": round(stats["local"] / total, 4) if total else 0.0}
+
+
+def reset_metrics() -> None:
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
@@ -0,0 +1,133 @@
+"""
+Offline travel-time estimator.
+
+Great-circle distance (NumPy haversine over whole matrices) scaled by a
+per-mode detour factor and speed. The driving model is calibrated against
+real Distance Matrix / OSRM results: on first use each process seeds its
+samples from the real results still in the travel cache (endpoints resolved
+through the geocoding index), then adds live results as they come in. Both
+providers only report driving times, so walk and transit use the
+uncalibrated constants below. No network, no cache writes.
+"""
+import logging
+import threading
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from trip_planner.core.cache import cache_client
+from trip_planner.services.geocoding import lookup
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# speed_kmh: typical door-to-door speed in a city; detour: road distance / straight line;
+# overhead_min: fixed cost per trip (waiting, parking)
+MODES = {
+    "walk": {"speed_kmh": 4.8, "detour": 1.3, "overhead_min": 0.0},
+    "transit": {"speed_kmh": 18.0, "detour": 1.4, "overhead_min": 8.0},
+    "drive": {"speed_kmh": 35.0, "detour": 1.35, "overhead_min": 3.0},
+}
+
+CALIBRATION_MIN_SAMPLES = 5
+CALIBRATION_MAX_SAMPLES = 500
+CALIBRATION_BOUNDS = (0.5, 3.0)
+MIN_CALIBRATION_KM = 0.5
+
+_samples = {mode: deque(maxlen=CALIBRATION_MAX_SAMPLES) for mode in MODES}
+_samples_lock = threading.Lock()
+_seeded = False
+
+
+def haversine_km(lats_a, lons_a, lats_b, lons_b) -> np.ndarray:
+    """Pairwise great-circle distances in km, shape (len(a), len(b))."""
+    lat1 = np.radians(np.asarray(lats_a, dtype=float))[:, None]
+    lon1 = np.radians(np.asarray(lons_a, dtype=float))[:, None]
+    lat2 = np.radians(np.asarray(lats_b, dtype=float))[None, :]
+    lon2 = np.radians(np.asarray(lons_b, dtype=float))[None, :]
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def _model_minutes(km: np.ndarray, mode: str) -> np.ndarray:
+    params = MODES[mode]
+    return params["overhead_min"] + km * params["detour"] / params["speed_kmh"] * 60
+
+
+def _seed_from_cache() -> None:
+    """Load the driving samples of earlier processes from the travel cache, once per process."""
+    global _seeded
+    with _samples_lock:
+        if _seeded:
+            return
+        _seeded = True
+    try:
+        cached = cache_client.recent_travel_times(CALIBRATION_MAX_SAMPLES)
+    except Exception as e:
+        logger.warning(f"Calibration seeding skipped: {e}")
+        return
+    # Oldest first, so the most recent results are the last to be evicted
+    for origin, dest, minutes in reversed(cached):
+        origin_coords, dest_coords = location_coords(origin), location_coords(dest)
+        if origin_coords and dest_coords:
+            record_observation(origin_coords, dest_coords, minutes)
+
+
+def calibration_factor(mode: str = "drive") -> float:
+    """Median ratio of real to modelled minutes, or 1.0 until enough samples exist."""
+    if mode == "drive":
+        _seed_from_cache()
+    with _samples_lock:
+        ratios = list(_samples[mode])
+    if len(ratios) < CALIBRATION_MIN_SAMPLES:
+        return 1.0
+    return float(np.clip(np.median(ratios), *CALIBRATION_BOUNDS))
+
+
+def record_observation(origin: tuple, dest: tuple, minutes: float, mode: str = "drive") -> None:
+    """Feed a real provider result into the calibration for a mode."""
+    km = float(haversine_km([origin[0]], [origin[1]], [dest[0]], [dest[1]])[0, 0])
+    if km < MIN_CALIBRATION_KM or minutes <= 0:
+        return
+    modelled = float(_model_minutes(np.array(km), mode))
+    with _samples_lock:
+        _samples[mode].append(minutes / modelled)
+
+
+def reset_calibration() -> None:
+    """Drop all samples; the next calibration reseeds from the travel cache."""
+    global _seeded
+    with _samples_lock:
+        for samples in _samples.values():
+            samples.clear()
+        _seeded = False
+
+
+def estimate_matrix(coords: list, mode: str = "drive") -> np.ndarray:
+    """N×N estimated minutes between (lat, lon) points; None entries give NaN rows/columns."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown travel mode: {mode}")
+    points = np.array([c if c is not None else (np.nan, np.nan) for c in coords], dtype=float).reshape(-1, 2)
+    km = haversine_km(points[:, 0], points[:, 1], points[:, 0], points[:, 1])
+    minutes = _model_minutes(km, mode) * calibration_factor(mode)
+    np.fill_diagonal(minutes, 0.0)
+    return minutes
+
+
+def location_coords(location: str) -> Optional[tuple]:
+    """(lat, lon) from the geocoding index, without touching the network."""
+    place = lookup(location)
+    return (place["lat"], place["lon"]) if place else None
+
+
+def estimate_travel_matrix(locations: list, mode: str = "drive") -> np.ndarray:
+    """Estimated minutes between named locations, resolved from the geocoding index only."""
+    return estimate_matrix([location_coords(loc) for loc in locations], mode)
+
+
+def estimate_minutes(origin: str, destination: str, mode: str = "drive") -> Optional[int]:
+    """Estimated minutes between two named locations, or None if either is not indexed."""
+    value = estimate_travel_matrix([origin, destination], mode)[0, 1]
+    return None if np.isnan(value) else int(round(value))
@@ -1,70 +1,212 @@
 """
 Travel time calculation service.
 """
+import asyncio
 import logging
-import requests
+
+import numpy as np
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from trip_planner.core.cache import cache_client
+from trip_planner.core.http import async_http_client, run_blocking
+from trip_planner.core.memo import memoized
+from trip_planner.services.geocoding import ageocode
+from trip_planner.services.travel_estimate import (
+    estimate_minutes, estimate_travel_matrix, location_coords, record_observation,
+)
 
 logger = logging.getLogger(__name__)
 DEFAULT_TRAVEL_TIME = 20
 
+# Distance Matrix limits: 25 origins or destinations, 100 elements per request
+MATRIX_MAX_SIDE = 25
+MATRIX_MAX_ELEMENTS = 100
+
+
+async def _coords(value: str):
+    """Resolve a location to (lat, lon) through the shared geocoding index."""
+    place = await ageocode(value)
+    return (place["lat"], place["lon"]) if place else None
+
+
+async def _distance_matrix(origins: list, destinations: list, api_key: str) -> dict:
+    """One Distance Matrix request; returns {(origin, dest): minutes} for OK elements."""
+    resp = await async_http_client.get(
+        "https://maps.googleapis.com/maps/api/distancematrix/json",
+        params={"origins": "|".join(origins), "destinations": "|".join(destinations),
+                "key": api_key, "units": "metric"},
+        timeout=15
+    )
+    resp.raise_for_status()
+    minutes = {}
+    for origin, row in zip(origins, resp.json().get("rows", [])):
+        for dest, element in zip(destinations, row.get("elements", [])):
+            if element.get("status") == "OK":
+                minutes[(origin, dest)] = int(element["duration"]["value"] / 60)
+    return minutes
+
 
-def _parse_coords(value: str):
-    """Parse lat,lon from string."""
-    if "," not in value:
-        return None
+async def _osrm_minutes(origin_coords: tuple, dest_coords: tuple):
+    """Driving minutes from OSRM between two coordinate pairs, or None on failure."""
     try:
-        parts = value.split(",", 1)
-        return float(parts[0].strip()), float(parts[1].strip())
-    except ValueError:
-        return None
+        url = f"https://router.project-osrm.org/route/v1/driving/{origin_coords[1]},{origin_coords[0]};{dest_coords[1]},{dest_coords[0]}"
+        resp = await async_http_client.get(url, params={"overview": "false"}, timeout=10, endpoint="osrm/route")
+        resp.raise_for_status()
+        routes = resp.json().get("routes", [])
+        if routes:
+            return int(routes[0]["duration"] / 60)
+    except Exception as e:
+        logger.warning(f"OSRM failed: {e}")
+    return None
 
 
-def get_travel_time_minutes(origin: str, destination: str) -> dict:
+def _observe(minutes: dict) -> None:
+    """Calibrate the offline estimator with real {(origin, dest): minutes} results."""
+    for (origin, dest), value in minutes.items():
+        origin_coords, dest_coords = location_coords(origin), location_coords(dest)
+        if origin_coords and dest_coords:
+            record_observation(origin_coords, dest_coords, value)
+
+
+async def aget_travel_time_minutes(origin: str, destination: str) -> dict:
     """Calculate travel time between locations."""
-    cached = cache_client.get_travel_time(origin, destination)
+    cached = await sync_to_async(cache_client.get_travel_time)(origin, destination)
     if cached is not None:
         return {"travel_time_minutes": cached}
-    
+
     # Try Google Distance Matrix
     api_key = settings.DISTANCE_MATRIX_API_KEY
     if api_key:
         try:
-            resp = requests.get(
-                "https://maps.googleapis.com/maps/api/distancematrix/json",
-                params={"origins": origin, "destinations": destination, "key": api_key, "units": "metric"},
-                timeout=15
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            rows = data.get("rows", [])
-            if rows and rows[0].get("elements"):
-                element = rows[0]["elements"][0]
-                if element.get("status") == "OK":
-                    minutes = int(element["duration"]["value"] / 60)
-                    cache_client.set_travel_time(origin, destination, minutes)
-                    return {"travel_time_minutes": minutes}
+            minutes = (await _distance_matrix([origin], [destination], api_key)).get((origin, destination))
+            if minutes is not None:
+                await sync_to_async(cache_client.set_travel_time)(origin, destination, minutes)
+                await sync_to_async(_observe)({(origin, destination): minutes})
+                return {"travel_time_minutes": minutes}
         except Exception as e:
             logger.warning(f"Distance Matrix failed: {e}")
-    
+
     # Try OSRM with coordinates
-    origin_coords = _parse_coords(origin)
-    dest_coords = _parse_coords(destination)
-    
+    origin_coords = await _coords(origin)
+    dest_coords = await _coords(destination) if origin_coords else None
     if origin_coords and dest_coords:
-        try:
-            url = f"https://router.project-osrm.org/route/v1/driving/{origin_coords[1]},{origin_coords[0]};{dest_coords[1]},{dest_coords[0]}"
-            resp = requests.get(url, params={"overview": "false"}, timeout=10)
-            resp.raise_for_status()
-            routes = resp.json().get("routes", [])
-            if routes:
-                minutes = int(routes[0]["duration"] / 60)
-                cache_client.set_travel_time(origin, destination, minutes)
-                return {"travel_time_minutes": minutes}
-        except Exception as e:
-            logger.warning(f"OSRM failed: {e}")
-    
-    # Fallback
-    cache_client.set_travel_time(origin, destination, DEFAULT_TRAVEL_TIME)
-    return {"travel_time_minutes": DEFAULT_TRAVEL_TIME}
+        minutes = await _osrm_minutes(origin_coords, dest_coords)
+        if minutes is not None:
+            await sync_to_async(cache_client.set_travel_time)(origin, destination, minutes)
+            record_observation(origin_coords, dest_coords, minutes)
+            return {"travel_time_minutes": minutes}
+
+    # Fallback: offline estimate, not cached so a real result can replace it later
+    estimate = await sync_to_async(estimate_minutes)(origin, destination)
+    return {"travel_time_minutes": estimate if estimate is not None else DEFAULT_TRAVEL_TIME}
+
+
+@memoized
+def get_travel_time_minutes(origin: str, destination: str) -> dict:
+    """Blocking wrapper around aget_travel_time_minutes."""
+    return run_blocking(aget_travel_time_minutes, origin, destination)
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _by_destinations(missing: list) -> list:
+    """Group origins that need the same destinations, so no unrequested pair is billed."""
+    wanted = {}
+    for o, d in missing:
+        wanted.setdefault(o, []).append(d)
+    groups = {}
+    for o, destinations in wanted.items():
+        groups.setdefault(tuple(destinations), []).append(o)
+    return [(origins, list(destinations)) for destinations, origins in groups.items()]
+
+
+async def _fetch(groups: list, api_key: str) -> dict:
+    """Distance Matrix for (origins, destinations) groups, split to its limits and issued concurrently."""
+    calls = []
+    for origins, destinations in groups:
+        for dest_chunk in _chunks(destinations, MATRIX_MAX_SIDE):
+            per_request = min(MATRIX_MAX_SIDE, max(1, MATRIX_MAX_ELEMENTS // len(dest_chunk)))
+            for origin_chunk in _chunks(origins, per_request):
+                calls.append(_distance_matrix(origin_chunk, dest_chunk, api_key))
+    fetched = {}
+    for result in await asyncio.gather(*calls, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.warning(f"Distance Matrix failed: {result}")
+        else:
+            fetched.update(result)
+    return fetched
+
+
+async def _travel_times(pairs: list) -> dict:
+    """
+    {(origin, dest): minutes} for the given pairs (origin != dest).
+
+    Known pairs come from cache in one read; only the missing ones are sent
+    to Distance Matrix, grouped by destination set so no element is billed
+    that was not asked for. Real results are written back in one bulk write;
+    pairs it cannot answer are filled from the offline estimator and cached
+    with the error TTL so a real result can replace them soon.
+    """
+    known = await sync_to_async(cache_client.get_travel_times)(pairs) if pairs else {}
+    missing = [pair for pair in pairs if known.get(pair) is None]
+
+    fetched = {}
+    api_key = settings.DISTANCE_MATRIX_API_KEY
+    if missing and api_key:
+        fetched = await _fetch(_by_destinations(missing), api_key)
+
+    new = {pair: fetched[pair] for pair in missing if pair in fetched}
+    if new:
+        await sync_to_async(cache_client.set_travel_times)(new)
+        await sync_to_async(_observe)(new)
+    known.update(new)
+
+    unresolved = [pair for pair in missing if pair not in new]
+    if unresolved:
+        unique = list(dict.fromkeys(loc for pair in unresolved for loc in pair))
+        index = {loc: i for i, loc in enumerate(unique)}
+        estimates = await sync_to_async(estimate_travel_matrix)(unique)
+        fallback = {}
+        for o, d in unresolved:
+            value = estimates[index[o], index[d]]
+            fallback[(o, d)] = DEFAULT_TRAVEL_TIME if np.isnan(value) else int(round(value))
+        await sync_to_async(cache_client.set_travel_times)(fallback, ttl=settings.CACHE_TTL_ERROR, estimated=True)
+        known.update(fallback)
+    return known
+
+
+async def aget_travel_times(pairs: list) -> dict:
+    """
+    Travel minutes for specific (origin, destination) pairs, e.g. consecutive
+    schedule stops. Only those pairs are requested from Distance Matrix.
+    """
+    pairs = list(dict.fromkeys((o, d) for o, d in pairs))
+    known = await _travel_times([(o, d) for o, d in pairs if o != d])
+    return {(o, d): 0 if o == d else known[(o, d)] for o, d in pairs}
+
+
+@memoized
+def get_travel_times(pairs: list) -> dict:
+    """Blocking wrapper around aget_travel_times."""
+    return run_blocking(aget_travel_times, pairs)
+
+
+async def aget_travel_time_matrix(locations: list) -> list:
+    """
+    N×N travel minutes between locations (matrix[i][j] is i → j).
+
+    See ``_travel_times`` for how missing pairs are requested, cached and
+    filled in.
+    """
+    unique = list(dict.fromkeys(locations))
+    known = await _travel_times([(o, d) for o in unique for d in unique if o != d])
+    return [[0 if o == d else known[(o, d)] for d in locations] for o in locations]
+
+
+@memoized
+def get_travel_time_matrix(locations: list) -> list:
+    """Blocking wrapper around aget_travel_time_matrix."""
+    return run_blocking(aget_travel_time_matrix, locations)
@@ -4,9 +4,12 @@ OpenWeather API service.
 import logging
 from datetime import date, timedelta, datetime, timezone
 from collections import defaultdict
-import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from trip_planner.core.cache import cache_client
+from trip_planner.core.http import async_http_client, run_blocking
+from trip_planner.core.memo import memoized
+from trip_planner.services.geocoding import ageocode, set_timezone, utc_offset_name
 
 logger = logging.getLogger(__name__)
 
@@ -33,87 +36,101 @@ def _stub_weather(start_date: date, end_date: date) -> dict:
     }
 
 
-def get_weather(destination: str, start_date: date, end_date: date) -> dict:
-    """Fetch weather forecast from OpenWeather API."""
-    cache_key = f"{start_date}:{end_date}"
-    
-    cached = cache_client.get_weather(destination, cache_key)
-    if cached:
-        return cached
+def _location_key(lat: float, lon: float) -> str:
+    """Round coordinates (~1 km) so nearby geocodes share forecast entries."""
+    return f"{lat:.2f},{lon:.2f}"
+
+
+def _seasonal_day(day: date) -> dict:
+    return {
+        "date": day.isoformat(),
+        "high_c": 23.0, "low_c": 14.0,
+        "precipitation_chance": 0.2,
+        "summary": "Seasonal average",
+    }
+
+
+async def _fetch_forecast(lat: float, lon: float, api_key: str) -> dict:
+    """Fetch the raw 5-day forecast for a coordinate."""
+    forecast_resp = await async_http_client.get(
+        "https://api.openweathermap.org/data/2.5/forecast",
+        params={"lat": lat, "lon": lon, "appid": api_key, "units": "metric"},
+        timeout=15
+    )
+    forecast_resp.raise_for_status()
+    return forecast_resp.json()
+
+
+def _aggregate_days(forecast: dict) -> dict:
+    """Collapse 3-hourly forecast entries into per-day summaries keyed by ISO date."""
+    buckets = defaultdict(list)
+    for item in forecast.get("list", []):
+        ts = datetime.fromtimestamp(item["dt"], tz=timezone.utc).date()
+        buckets[ts].append(item)
     
+    days = {}
+    for day, entries in buckets.items():
+        temps = [e["main"]["temp"] for e in entries]
+        pops = [e.get("pop", 0) for e in entries]
+        days[day.isoformat()] = {
+            "date": day.isoformat(),
+            "high_c": max(temps), "low_c": min(temps),
+            "precipitation_chance": max(pops) if pops else 0,
+            "summary": entries[0]["weather"][0]["description"].title(),
+        }
+    return days
+
+
+async def aget_weather(destination: str, start_date: date, end_date: date) -> dict:
+    """Fetch weather forecast, assembled from per-day cache entries for the location."""
     api_key = settings.OPENWEATHER_API_KEY
     if not api_key:
-        payload = _stub_weather(start_date, end_date)
-        cache_client.set_weather(destination, cache_key, payload, ttl=settings.CACHE_TTL_ERROR)
-        return payload
+        return _stub_weather(start_date, end_date)
     
-    try:
-        # Geocode
-        geo_resp = requests.get(
-            "https://api.openweathermap.org/geo/1.0/direct",
-            params={"q": destination, "limit": 1, "appid": api_key},
-            timeout=15
-        )
-        geo_resp.raise_for_status()
-        geo_data = geo_resp.json()
-        
-        if not geo_data:
-            payload = _stub_weather(start_date, end_date)
-            cache_client.set_weather(destination, cache_key, payload, ttl=settings.CACHE_TTL_ERROR)
-            return payload
-        
-        lat, lon = geo_data[0]["lat"], geo_data[0]["lon"]
-        
-        # Forecast
-        forecast_resp = requests.get(
-            "https://api.openweathermap.org/data/2.5/forecast",
-            params={"lat": lat, "lon": lon, "appid": api_key, "units": "metric"},
-            timeout=15
-        )
-        forecast_resp.raise_for_status()
-        forecast = forecast_resp.json()
-        
-    except Exception as e:
-        logger.error(f"Weather API failed: {e}")
-        payload = _stub_weather(start_date, end_date)
-        cache_client.set_weather(destination, cache_key, payload, ttl=settings.CACHE_TTL_ERROR)
-        return payload
+    place = await ageocode(destination)
+    if place is None:
+        return _stub_weather(start_date, end_date)
     
-    # Aggregate by day
-    buckets = defaultdict(list)
-    for item in forecast.get("list", []):
-        ts = datetime.fromtimestamp(item["dt"], tz=timezone.utc).date()
-        buckets[ts].append(item)
+    location = _location_key(place["lat"], place["lon"])
+    dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    daily = await sync_to_async(cache_client.get_weather_days)(location, [d.isoformat() for d in dates])
+    missing = [d for d in dates if d.isoformat() not in daily]
     
-    days = []
-    current = start_date
-    while current <= end_date:
-        entries = buckets.get(current, [])
-        if not entries:
-            days.append({
-                "date": current.isoformat(),
-                "high_c": 23.0, "low_c": 14.0,
-                "precipitation_chance": 0.2,
-                "summary": "Seasonal average",
-            })
-        else:
-            temps = [e["main"]["temp"] for e in entries]
-            pops = [e.get("pop", 0) for e in entries]
-            days.append({
-                "date": current.isoformat(),
-                "high_c": max(temps), "low_c": min(temps),
-                "precipitation_chance": max(pops) if pops else 0,
-                "summary": entries[0]["weather"][0]["description"].title(),
-            })
-        current += timedelta(days=1)
+    if missing:
+        # The raw forecast is fetched once per location per TTL; every date range reuses it
+        forecast = await sync_to_async(cache_client.get_forecast)(location)
+        if forecast is None:
+            try:
+                forecast = await _fetch_forecast(place["lat"], place["lon"], api_key)
+            except Exception as e:
+                logger.error(f"Weather API failed: {e}")
+                forecast = {"unavailable": True}
+            offset = forecast.get("city", {}).get("timezone")
+            if offset is not None and not place.get("timezone"):
+                await sync_to_async(set_timezone)(destination, utc_offset_name(offset))
+            ttl = settings.CACHE_TTL_ERROR if forecast.get("unavailable") else None
+            await sync_to_async(cache_client.set_forecast)(location, forecast, ttl=ttl)
+        
+        if forecast.get("unavailable"):
+            return _stub_weather(start_date, end_date)
+        
+        aggregated = _aggregate_days(forecast)
+        new_days = {day: data for day, data in aggregated.items() if day not in daily}
+        if new_days:
+            await sync_to_async(cache_client.set_weather_days)(location, new_days)
+        for day in missing:
+            daily[day.isoformat()] = aggregated.get(day.isoformat()) or _seasonal_day(day)
     
     trip_len = (end_date - start_date).days
-    payload = {
+    return {
         "forecast_source": "openweather",
         "overview": "Based on OpenWeather 5-day forecast.",
         "risks": ["Forecast beyond 5 days is extrapolated."] if trip_len >= 5 else [],
-        "daily": days,
+        "daily": [daily[d.isoformat()] for d in dates],
     }
-    
-    cache_client.set_weather(destination, cache_key, payload)
-    return payload
+
+
+@memoized
+def get_weather(destination: str, start_date: date, end_date: date) -> dict:
+    """Blocking wrapper around aget_weather."""
+    return run_blocking(aget_weather, destination, start_date, end_date)
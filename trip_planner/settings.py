@@ -164,6 +164,7 @@ OPENWEATHER_API_KEY = os.environ.get("OPENWEATHER_API_KEY", "")
 GOOGLE_PLACES_API_KEY = os.environ.get("GOOGLE_PLACES_API_KEY", "")
 DISTANCE_MATRIX_API_KEY = os.environ.get("DISTANCE_MATRIX_API_KEY", "")
 CURRENCY_API_KEY = os.environ.get("CURRENCY_API_KEY", "")
+CURRENCY_REFERENCE = os.environ.get("CURRENCY_REFERENCE", "USD")  # rate table base; cross rates derive from it
 
 # Cache Configuration
 REDIS_URL = os.environ.get("REDIS_URL", "")
@@ -171,10 +172,46 @@ REDIS_URL = os.environ.get("REDIS_URL", "")
 # Cache TTLs (seconds)
 CACHE_TTL_WEATHER = int(os.environ.get("CACHE_TTL_WEATHER", "3600"))      # 1 hour
 CACHE_TTL_PLACES = int(os.environ.get("CACHE_TTL_PLACES", "86400"))       # 24 hours
+CACHE_TTL_PLACE_DETAILS = int(os.environ.get("CACHE_TTL_PLACE_DETAILS", "604800"))  # 7 days
+CACHE_TTL_AUTOCOMPLETE = int(os.environ.get("CACHE_TTL_AUTOCOMPLETE", "86400"))  # 24 hours (shared and in-process)
 CACHE_TTL_TRAVEL = int(os.environ.get("CACHE_TTL_TRAVEL", "3600"))        # 1 hour
 CACHE_TTL_CURRENCY = int(os.environ.get("CACHE_TTL_CURRENCY", "43200"))   # 12 hours
 CACHE_TTL_ERROR = int(os.environ.get("CACHE_TTL_ERROR", "60"))            # 1 minute (for failures)
 
+# How often in-process tiers re-check a source's namespace version (seconds)
+CACHE_NAMESPACE_POLL_SECONDS = float(os.environ.get("CACHE_NAMESPACE_POLL_SECONDS", "5"))
+
+# Cached payloads larger than this (bytes, msgpack-encoded) are zlib-compressed
+CACHE_COMPRESS_THRESHOLD = int(os.environ.get("CACHE_COMPRESS_THRESHOLD", "1024"))
+
+# External cache sweeper (manage.py cache_sweep; in-worker when interval > 0)
+CACHE_SWEEP_INTERVAL = int(os.environ.get("CACHE_SWEEP_INTERVAL", "0"))          # seconds, 0 = off
+CACHE_SWEEP_BATCH_SIZE = int(os.environ.get("CACHE_SWEEP_BATCH_SIZE", "500"))
+CACHE_SWEEP_MAX_SECONDS = float(os.environ.get("CACHE_SWEEP_MAX_SECONDS", "10"))
+CACHE_MAX_ROWS = int(os.environ.get("CACHE_MAX_ROWS", "0"))                      # 0 = unlimited
+
+# Outbound HTTP (shared keep-alive pool for all external services)
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "10"))   # hosts kept pooled
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "10"))           # connections per host
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "15"))                   # seconds, when a call sets none
+
+# Idempotency-Key handling on generate, edit and image analysis
+IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", "86400"))                  # stored responses, seconds
+IDEMPOTENCY_LOCK_TTL = int(os.environ.get("IDEMPOTENCY_LOCK_TTL", "180"))          # in-progress marker, > worker timeout
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "110"))  # retry waits this long for the original
+IDEMPOTENCY_POLL_SECONDS = float(os.environ.get("IDEMPOTENCY_POLL_SECONDS", "0.5"))
+
+# /metrics is served to staff sessions, or to "Authorization: Bearer <METRICS_TOKEN>" when set
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Gemini quota and generation admission control
+GEMINI_REQUESTS_PER_MINUTE = int(os.environ.get("GEMINI_REQUESTS_PER_MINUTE", "60"))
+GEMINI_QUOTA_COOLDOWN_SECONDS = int(os.environ.get("GEMINI_QUOTA_COOLDOWN_SECONDS", "60"))  # after all models 429
+GENERATION_GEMINI_CALLS = int(os.environ.get("GENERATION_GEMINI_CALLS", "8"))       # model calls per generation
+GENERATION_EXPECTED_SECONDS = int(os.environ.get("GENERATION_EXPECTED_SECONDS", "45"))  # until one has been timed
+GENERATION_SLO_SECONDS = int(os.environ.get("GENERATION_SLO_SECONDS", "100"))       # below the 120 s worker timeout
+GENERATION_MAX_CONCURRENT = int(os.environ.get("GENERATION_MAX_CONCURRENT", "3"))   # per worker, of 4 threads
+
 # Planner
 PLANNER_BUFFER_MINUTES = int(os.environ.get("PLANNER_BUFFER_MINUTES", "20"))
 
@@ -1,6 +1,9 @@
 """
 URL configuration for Trip Planner.
 """
+import hmac
+
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
@@ -12,6 +15,34 @@ def health_check(request):
     return JsonResponse({"status": "healthy"})
 
 
+def _metrics_allowed(request) -> bool:
+    """Staff sessions, or a bearer token matching METRICS_TOKEN when one is set."""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    scheme, _, supplied = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def metrics_view(request):
+    """Runtime metrics for outbound HTTP, the cache layer, block edits, idempotency keys and admission."""
+    if not _metrics_allowed(request):
+        return JsonResponse({"error": "forbidden"}, status=403)
+    from trip_planner.core import idempotency
+    from trip_planner.core.cache import cache_client
+    from trip_planner.core.http import http_client
+    from trip_planner.services.admission import admission
+    from trip_planner.services import autocomplete, schedule_edit
+    return JsonResponse({
+        "http": http_client.metrics(),
+        "cache": {"encoding": cache_client.encoding_stats()},
+        "autocomplete": autocomplete.metrics(),
+        "edits": schedule_edit.metrics(),
+        "idempotency": idempotency.metrics(),
+        "generation": admission.metrics(),
+    })
+
+
 def home_view(request):
     """Home page with trip planner form."""
     return render(request, "index.html")
@@ -21,6 +52,7 @@ urlpatterns = [
     path("", home_view, name="home"),
     path("admin/", admin.site.urls),
     path("health", health_check, name="health"),
+    path("metrics", metrics_view, name="metrics"),
     path("api/", include("trip_planner.api.urls")),
 ]
 